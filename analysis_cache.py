@@ -0,0 +1,147 @@
+import os
+import json
+import time
+import hashlib
+import sqlite3
+
+# 분석 결과 캐시 설정 (여러 Streamlit 워커 프로세스가 같은 SQLite 파일을 공유)
+ANALYSIS_CACHE_PATH = os.getenv("ANALYSIS_CACHE_PATH", ".cache/analysis_cache.sqlite3")
+ANALYSIS_CACHE_MAX_ENTRIES = int(os.getenv("ANALYSIS_CACHE_MAX_ENTRIES", "1000"))
+ANALYSIS_CACHE_TTL_SECONDS = int(os.getenv("ANALYSIS_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+
+
+# 캐시 키 생성 함수
+# 추출된 텍스트 + 프롬프트 버전 + 모델(deployment) 이름을 함께 해시
+def make_cache_key(content, prompt_version, model):
+    digest = hashlib.sha256()
+    for part in (content, prompt_version, model):
+        digest.update((part or "").encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+# 프롬프트 문자열 목록으로 프롬프트 버전 해시 생성
+def make_prompt_version(*prompts):
+    return hashlib.sha256("\0".join(prompts).encode("utf-8")).hexdigest()[:16]
+
+
+class AnalysisCache:
+    def __init__(
+        self,
+        path=ANALYSIS_CACHE_PATH,
+        max_entries=ANALYSIS_CACHE_MAX_ENTRIES,
+        ttl_seconds=ANALYSIS_CACHE_TTL_SECONDS,
+        namespace="analysis",
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.namespace = namespace
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS analysis_cache (
+                    namespace TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL,
+                    PRIMARY KEY (namespace, key)
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_analysis_cache_accessed "
+                "ON analysis_cache (namespace, accessed_at)"
+            )
+
+    # 프로세스/스레드마다 짧게 연결을 열어 사용 (WAL 모드로 동시 읽기 허용)
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    # 캐시 조회 (만료된 항목은 삭제 후 None 반환)
+    def get(self, key):
+        now = time.time()
+        conn = self._connect()
+        try:
+            with conn:
+                row = conn.execute(
+                    "SELECT value, created_at FROM analysis_cache WHERE namespace = ? AND key = ?",
+                    (self.namespace, key),
+                ).fetchone()
+                if row is None:
+                    return None
+
+                value, created_at = row
+                if self.ttl_seconds and now - created_at > self.ttl_seconds:
+                    conn.execute(
+                        "DELETE FROM analysis_cache WHERE namespace = ? AND key = ?",
+                        (self.namespace, key),
+                    )
+                    return None
+
+                conn.execute(
+                    "UPDATE analysis_cache SET accessed_at = ? WHERE namespace = ? AND key = ?",
+                    (now, self.namespace, key),
+                )
+            return json.loads(value)
+        finally:
+            conn.close()
+
+    # 캐시 저장 후 TTL/LRU 기준으로 정리
+    def set(self, key, value):
+        now = time.time()
+        payload = json.dumps(value, ensure_ascii=False)
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO analysis_cache "
+                    "(namespace, key, value, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                    (self.namespace, key, payload, now, now),
+                )
+                self._evict(conn, now)
+        finally:
+            conn.close()
+
+    def delete(self, key):
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    "DELETE FROM analysis_cache WHERE namespace = ? AND key = ?",
+                    (self.namespace, key),
+                )
+        finally:
+            conn.close()
+
+    def _evict(self, conn, now):
+        # 1) TTL 만료 항목 삭제
+        if self.ttl_seconds:
+            conn.execute(
+                "DELETE FROM analysis_cache WHERE namespace = ? AND created_at < ?",
+                (self.namespace, now - self.ttl_seconds),
+            )
+
+        # 2) 최대 개수를 넘으면 가장 오래 사용되지 않은 항목부터 삭제 (LRU)
+        if self.max_entries:
+            conn.execute(
+                """
+                DELETE FROM analysis_cache
+                WHERE namespace = ? AND key IN (
+                    SELECT key FROM analysis_cache
+                    WHERE namespace = ?
+                    ORDER BY accessed_at DESC
+                    LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.namespace, self.namespace, self.max_entries),
+            )
@@ -0,0 +1,121 @@
+import time
+import queue
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from tracing import copy_context, span
+
+# 분석 파이프라인 기본 동시 실행 수
+PIPELINE_MAX_WORKERS = 6
+# 스트리밍 단계가 실행 중일 때 중간 결과를 확인하는 간격 (초)
+STREAM_POLL_SECONDS = 0.05
+
+
+# 파이프라인 단계 정의
+# depends 에 적힌 단계가 모두 성공하면 그 결과를 키워드 인자로 받아 실행
+# stream=True 인 단계는 fn 이 텍스트 조각을 yield 하고, 합친 텍스트가 최종 결과가 됨
+class Stage:
+    def __init__(self, name, fn, depends=(), stream=False):
+        self.name = name
+        self.fn = fn
+        self.depends = tuple(depends)
+        self.stream = stream
+
+
+# 단계 실행 결과 (실패해도 다른 단계에는 영향을 주지 않음)
+# partial=True 는 스트리밍 단계의 중간 결과 (value 는 지금까지 받은 텍스트)
+class StageResult:
+    def __init__(self, name, value=None, error=None, elapsed=0.0, partial=False):
+        self.name = name
+        self.value = value
+        self.error = error
+        self.elapsed = elapsed
+        self.partial = partial
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+class DependencyFailed(Exception):
+    pass
+
+
+def _run_stage(stage, kwargs, partials):
+    started = time.perf_counter()
+    try:
+        with span(f"stage.{stage.name}"):
+            value = stage.fn(**kwargs)
+            if stage.stream:
+                parts = []
+                for piece in value:
+                    parts.append(piece)
+                    partials.put(StageResult(stage.name, value="".join(parts), partial=True))
+                value = "".join(parts)
+        return StageResult(stage.name, value=value, elapsed=time.perf_counter() - started)
+    except Exception as e:
+        return StageResult(stage.name, error=e, elapsed=time.perf_counter() - started)
+
+
+# 독립적인 단계는 동시에 실행하고, 완료되는 순서대로 결과를 yield
+# 스트리밍 단계의 중간 결과는 STREAM_POLL_SECONDS 마다 단계별 최신 값 하나로 모아서 yield
+def run_pipeline(stages, max_workers=PIPELINE_MAX_WORKERS):
+    stages = list(stages)
+    names = {stage.name for stage in stages}
+    for stage in stages:
+        unknown = [dep for dep in stage.depends if dep not in names]
+        if unknown:
+            raise ValueError(f"'{stage.name}' 단계의 의존 단계가 없습니다: {unknown}")
+
+    results = {}
+    pending = list(stages)
+    running = {}
+    partials = queue.Queue()
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="analysis") as executor:
+        while pending or running:
+            # 실행 가능한 단계 제출 / 의존 단계가 실패한 단계는 실패로 처리
+            for stage in list(pending):
+                failed = [dep for dep in stage.depends if dep in results and not results[dep].ok]
+                if failed:
+                    pending.remove(stage)
+                    result = StageResult(
+                        stage.name, error=DependencyFailed(f"의존 단계 실패: {', '.join(failed)}")
+                    )
+                    results[stage.name] = result
+                    yield result
+                elif all(dep in results for dep in stage.depends):
+                    pending.remove(stage)
+                    kwargs = {dep: results[dep].value for dep in stage.depends}
+                    # 호출한 쪽의 trace 안에서 단계가 기록되도록 실행 컨텍스트를 복사해서 실행
+                    running[
+                        executor.submit(copy_context().run, _run_stage, stage, kwargs, partials)
+                    ] = stage
+
+            if not running:
+                if pending and all(
+                    any(dep not in results for dep in stage.depends) for stage in pending
+                ):
+                    raise ValueError("순환 의존 관계가 있는 단계가 있습니다.")
+                continue
+
+            streaming = any(stage.stream for stage in running.values())
+            done, _ = wait(
+                running,
+                timeout=STREAM_POLL_SECONDS if streaming else None,
+                return_when=FIRST_COMPLETED,
+            )
+
+            latest = {}
+            while True:
+                try:
+                    partial = partials.get_nowait()
+                except queue.Empty:
+                    break
+                latest[partial.name] = partial
+            yield from latest.values()
+
+            for future in done:
+                running.pop(future)
+                result = future.result()
+                results[result.name] = result
+                yield result
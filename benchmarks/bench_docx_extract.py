@@ -0,0 +1,101 @@
+# DOCX 추출 벤치마크
+# 기존 python-docx 기반 추출 함수와 스트리밍 추출 함수의 처리 시간 / 최대 메모리(RSS) 비교
+#
+# 사용법: python benchmarks/bench_docx_extract.py [파일 또는 폴더 ...] (기본값: data/)
+import os
+import sys
+import glob
+import time
+import resource
+import multiprocessing
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+REPEAT = 5
+
+
+# 기존 추출 함수 (비교용)
+def legacy_extract_docx_content(uploaded_file):
+    import docx
+
+    doc = docx.Document(uploaded_file)
+    content = ""
+    for para in doc.paragraphs:
+        content += para.text + "\n"
+    return content
+
+
+def streaming_extract_docx_content(uploaded_file):
+    from extractors import extract_docx_content
+
+    return extract_docx_content(uploaded_file)
+
+
+EXTRACTORS = {
+    "legacy": legacy_extract_docx_content,
+    "streaming": streaming_extract_docx_content,
+}
+
+
+# 별도 프로세스에서 실행해 최대 RSS 증가량(KB)을 측정
+def _measure(name, path, queue):
+    extractor = EXTRACTORS[name]
+    extractor(path)  # 모듈 import 및 워밍업
+
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    for _ in range(REPEAT):
+        with open(path, "rb") as f:
+            content = extractor(f)
+    elapsed = (time.perf_counter() - started) / REPEAT
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    queue.put((elapsed, peak - baseline, len(content)))
+
+
+def measure(name, path):
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    process = context.Process(target=_measure, args=(name, path, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def collect_files(args):
+    paths = args or [os.path.join(ROOT, "data")]
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(glob.glob(os.path.join(path, "*.docx"))))
+        else:
+            files.append(path)
+    return files
+
+
+def main(args):
+    files = collect_files(args)
+    if not files:
+        print("측정할 .docx 파일이 없습니다.")
+        return
+
+    print(f"{'file':40} {'extractor':10} {'ms':>9} {'peak KB':>9} {'chars':>8}")
+    totals = {name: 0.0 for name in EXTRACTORS}
+    for path in files:
+        for name in EXTRACTORS:
+            elapsed, peak_kb, chars = measure(name, path)
+            totals[name] += elapsed
+            print(
+                f"{os.path.basename(path)[:40]:40} {name:10} "
+                f"{elapsed * 1000:9.2f} {peak_kb:9d} {chars:8d}"
+            )
+
+    print()
+    for name, total in totals.items():
+        print(f"{name:10} total {total * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,364 @@
+# 동시 사용자 부하 테스트
+# Streamlit AppTest 세션 여러 개를 스레드로 동시에 실행하여 (Streamlit 서버도 세션마다 스레드 하나)
+# 업로드 → 통합 리뷰(체크리스트 / 피드백) → 문서 검색 대화 흐름을 반복하고
+# 동시 사용자 수를 늘려 가며 재실행 시간 분포, 세션당 메모리, 처리량이 더 늘지 않는 지점(포화점)을 측정
+# Azure 서비스는 fakes.py 의 가짜 구현을 사용
+#
+# 사용법: python benchmarks/bench_load.py --users 1,2,4,8,16 --iterations 2 --llm-latency-ms 300
+import os
+import sys
+import json
+import time
+import pickle
+import random
+import shutil
+import logging
+import argparse
+import tempfile
+import threading
+import mimetypes
+
+from bench_pipeline import ROOT, collect_files, configure_env, git_commit, peak_rss_mb, percentiles
+
+DEFAULT_OUTPUT = os.path.join(ROOT, ".cache", "bench_load.json")
+# 업로드한 문서의 분석 작업이 끝나기를 기다리는 최대 시간 (초)
+ANALYSIS_TIMEOUT_SECONDS = 300
+
+# 문서 검색 화면에서 보내는 질문 (앞의 질문은 단독 질문, 뒤의 질문은 이전 대화를 이어 가는 질문)
+QUESTIONS = [
+    "AI 관련 프로젝트 문서 찾아줘",
+    "Kubernetes 보안 정책 문서 있어?",
+    "배포 자동화 관련 문서 알려줘",
+    "그 문서의 주요 내용을 정리해줘",
+    "비슷한 다른 문서도 있어?",
+]
+
+MIME_TYPES = {
+    ".docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    ".pdf": "application/pdf",
+    ".txt": "text/plain",
+}
+
+
+def current_rss_mb():
+    # Linux 는 현재 RSS, 그 외에는 최대 RSS
+    try:
+        with open("/proc/self/status", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return peak_rss_mb()
+
+
+# session_state 크기 (직렬화한 byte 수)
+def session_state_bytes(at):
+    total = 0
+    for value in at.session_state.to_dict().values():
+        try:
+            total += len(pickle.dumps(value))
+        except Exception:
+            total += len(repr(value).encode("utf-8"))
+    return total
+
+
+# AppTest 는 세션 하나를 실행하도록 만들어져서 여러 스레드에서 동시에 실행할 수 있도록 공유 상태 두 곳을 보정
+# - 실행이 끝날 때마다 전역 Runtime 을 지우므로 다른 세션 실행 중에도 마지막 Runtime 을 계속 사용
+# - 실행마다 스크립트를 다시 컴파일하므로 (Python 3.11 은 동시 컴파일이 실패할 수 있음) 한 번만 컴파일해서 공유
+#   (실제 서버도 모든 세션이 스크립트 캐시 하나를 공유)
+def patch_apptest_for_threads():
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+
+    last_runtime = []
+    bytecode = {}
+    compile_lock = threading.Lock()
+    get_bytecode = ScriptCache.get_bytecode
+
+    def instance(cls):
+        if cls._instance is not None:
+            last_runtime[:] = [cls._instance]
+            return cls._instance
+        if last_runtime:
+            return last_runtime[0]
+        raise RuntimeError("Runtime hasn't been created!")
+
+    def exists(cls):
+        return cls._instance is not None or bool(last_runtime)
+
+    def shared_get_bytecode(self, script_path):
+        with compile_lock:
+            if script_path not in bytecode:
+                bytecode[script_path] = get_bytecode(self, script_path)
+            return bytecode[script_path]
+
+    Runtime.instance = classmethod(instance)
+    Runtime.exists = classmethod(exists)
+    ScriptCache.get_bytecode = shared_get_bytecode
+
+
+# 사용자 한 명 (AppTest 세션 하나)
+class VirtualUser:
+    def __init__(self, index, files, questions_per_visit, seed):
+        from streamlit.testing.v1 import AppTest
+
+        self.index = index
+        self.files = files
+        self.questions_per_visit = questions_per_visit
+        self.random = random.Random(seed + index)
+        self.at = AppTest.from_file(
+            os.path.join(ROOT, "docInspector.py"), default_timeout=ANALYSIS_TIMEOUT_SECONDS
+        )
+        self.samples = []
+        self.errors = []
+
+    # 재실행 한 번의 시간 기록 (record=False 이면 호출하는 쪽에서 여러 단계를 묶어서 기록)
+    def run(self, action, record=True):
+        started = time.perf_counter()
+        try:
+            self.at.run()
+        except Exception as e:
+            self.errors.append(f"{action}: {type(e).__name__}: {e}")
+            return False
+        if record:
+            self.samples.append((action, time.perf_counter() - started))
+        for exception in self.at.exception:
+            self.errors.append(f"{action}: {exception.value}")
+        return not self.at.exception
+
+    def open_page(self, page):
+        self.at.sidebar.radio[0].set_value(page)
+        return self.run(f"page.{page}")
+
+    def upload(self, iteration):
+        path = self.files[(self.index + iteration) % len(self.files)]
+        with open(path, "rb") as f:
+            data = f.read()
+        extension = os.path.splitext(path)[1].lower()
+        mime = MIME_TYPES.get(extension) or mimetypes.guess_type(path)[0] or "application/octet-stream"
+        if not self.open_page("문서 업로드"):
+            return
+        self.at.file_uploader[0].set_value((os.path.basename(path), data, mime))
+
+        # 업로드 재실행은 분석 작업을 제출하자마자 끝나므로
+        # 작업이 끝나고 결과(체크리스트)가 표시되는 재실행까지를 업로드 한 번으로 측정
+        started = time.perf_counter()
+        if not self.run("upload", record=False):
+            return
+        waited = self.wait_for_analysis()
+        if waited is None:
+            return
+        if waited and not self.run("upload", record=False):
+            return
+        self.samples.append(("upload", time.perf_counter() - started))
+
+    # 이 세션이 제출한 분석 작업이 모두 끝날 때까지 대기
+    # (기다린 작업이 있으면 True, 캐시된 결과라서 작업이 없으면 False, 실패하면 None)
+    def wait_for_analysis(self):
+        from job_queue import DONE, FAILED, JOB_POLL_SECONDS, get_job_queue
+
+        state = self.at.session_state
+        jobs = list(state["analysis_jobs"].values()) if "analysis_jobs" in state else []
+        deadline = time.monotonic() + ANALYSIS_TIMEOUT_SECONDS
+        for job_id in jobs:
+            job = get_job_queue().get(job_id)
+            while job is not None and job["status"] not in (DONE, FAILED):
+                if time.monotonic() > deadline:
+                    self.errors.append(f"upload: 분석이 {ANALYSIS_TIMEOUT_SECONDS}초 안에 끝나지 않음")
+                    return None
+                time.sleep(JOB_POLL_SECONDS)
+                job = get_job_queue().get(job_id)
+            if job is None or job["status"] == FAILED:
+                self.errors.append(f"upload: 분석 실패: {job['error'] if job else '작업 없음'}")
+                return None
+        return bool(jobs)
+
+    def review(self):
+        if not self.open_page("통합 리뷰"):
+            return
+        # 업로드에서 분석이 끝났으므로 체크리스트가 있어야 함 (없으면 체크 단계를 건너뛴 채 통과하지 않도록 오류)
+        if not self.at.checkbox:
+            self.errors.append("review.check: 체크리스트 항목이 없음")
+        else:
+            self.at.checkbox[self.random.randrange(len(self.at.checkbox))].check()
+            self.run("review.check")
+        self.at.text_input(key="fn").input(f"user{self.index}")
+        self.at.text_area(key="ft").input("보안 점검 항목도 추가로 확인해야 합니다.")
+        next(button for button in self.at.button if button.label == "전송").click()
+        self.run("review.feedback")
+
+    def search(self):
+        if not self.open_page("문서 검색"):
+            return
+        for question in self.random.sample(QUESTIONS, min(self.questions_per_visit, len(QUESTIONS))):
+            self.at.chat_input[0].set_value(question)
+            if not self.run("search.chat"):
+                return
+
+    # 첫 실행(세션 생성)은 모든 사용자가 마친 뒤에 측정을 시작하도록 barrier 에서 대기
+    def scenario(self, iterations, barrier):
+        try:
+            ok = self.run("first_run")
+        finally:
+            barrier.wait()
+        if not ok:
+            return
+        for iteration in range(iterations):
+            self.upload(iteration)
+            self.review()
+            self.search()
+
+
+# 동시 사용자 수 하나에 대한 측정
+def run_level(users, files, args):
+    virtual_users = [VirtualUser(i, files, args.questions, args.seed) for i in range(users)]
+    rss_before = current_rss_mb()
+    barrier = threading.Barrier(users + 1)
+    threads = [
+        threading.Thread(target=user.scenario, args=(args.iterations, barrier), daemon=True)
+        for user in virtual_users
+    ]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    rss_after = current_rss_mb()
+
+    actions = {}
+    for user in virtual_users:
+        for action, duration in user.samples:
+            actions.setdefault(action, []).append(duration)
+    # 처리량과 전체 분포는 첫 실행을 제외한 재실행 기준
+    samples = [
+        duration for action, durations in actions.items() if action != "first_run" for duration in durations
+    ]
+    state_bytes = [session_state_bytes(user.at) for user in virtual_users]
+    errors = [error for user in virtual_users for error in user.errors]
+
+    return {
+        "users": users,
+        "reruns": len(samples),
+        "seconds": round(elapsed, 3),
+        "reruns_per_sec": round(len(samples) / elapsed, 2) if elapsed else None,
+        **percentiles(samples),
+        "actions": {
+            action: dict(count=len(durations), **percentiles(durations))
+            for action, durations in sorted(actions.items())
+        },
+        "session_state_kb": round(sum(state_bytes) / len(state_bytes) / 1024, 1),
+        "rss_mb": rss_after,
+        "rss_per_session_mb": round(max(0.0, rss_after - rss_before) / users, 2),
+        "errors": len(errors),
+        "error_samples": errors[:5],
+    }
+
+
+# 포화점: 사용자를 늘려도 처리량이 min_gain 이상 늘지 않거나 p95 가 한도를 넘는 첫 단계의 바로 전 단계
+def find_saturation(levels, min_gain, p95_limit_ms):
+    best = None
+    for previous, level in zip([None] + levels, levels):
+        if p95_limit_ms and level["p95_ms"] and level["p95_ms"] > p95_limit_ms:
+            return best, "p95"
+        if previous and level["reruns_per_sec"] < previous["reruns_per_sec"] * (1 + min_gain):
+            return best, "throughput"
+        best = level["users"]
+    return best, None
+
+
+def print_level(level):
+    print(
+        f"{level['users']:>5} users  {level['reruns_per_sec']:>7} reruns/s  "
+        f"p50 {level['p50_ms']:>8} ms  p95 {level['p95_ms']:>8} ms  "
+        f"state {level['session_state_kb']:>7} KB  RSS {level['rss_mb']:>7} MB  errors {level['errors']}",
+        flush=True,
+    )
+
+
+def run(args):
+    from fakes import FakeProfile, install_fakes
+
+    patch_apptest_for_threads()
+    # 재실행마다 반복되는 사용 중단 예정 경고와 session_state 측정 시의 실행 컨텍스트 경고는 숨김
+    for name in ("streamlit.deprecation_util", "streamlit.runtime.scriptrunner_utils.script_run_context"):
+        logging.getLogger(name).disabled = True
+    files = collect_files(args.directory)
+    if not files:
+        print("업로드할 문서가 없습니다.")
+        return 1
+
+    install_fakes(
+        FakeProfile(
+            llm_latency_ms=args.llm_latency_ms,
+            llm_ms_per_token=args.llm_ms_per_token,
+            blob_latency_ms=args.blob_latency_ms,
+            search_latency_ms=args.search_latency_ms,
+            embedding_latency_ms=args.search_latency_ms,
+            error_rate=args.error_rate,
+            seed=args.seed,
+        )
+    )
+
+    levels = []
+    for users in sorted({int(value) for value in args.users.split(",")}):
+        levels.append(run_level(users, files, args))
+        print_level(levels[-1])
+
+    saturation, reason = find_saturation(levels, args.min_gain, args.p95_limit_ms)
+    result = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "profile": {
+            key: value for key, value in vars(args).items() if key not in ("directory", "output")
+        },
+        "levels": levels,
+        "saturation_users": saturation,
+        "saturation_reason": reason,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+    if saturation is None:
+        print("모든 단계에서 처리량이 늘어났습니다. 더 많은 사용자 수로 측정해 보세요.")
+    else:
+        print(f"포화점: 동시 사용자 {saturation}명 ({reason or '-'})")
+
+    if args.output:
+        directory = os.path.dirname(args.output)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+    return 0 if not any(level["errors"] for level in levels) else 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="동시 사용자 부하 테스트")
+    parser.add_argument("directory", nargs="?", default=os.path.join(ROOT, "data"), help="업로드할 문서 폴더")
+    parser.add_argument("--users", default="1,2,4,8", help="동시 사용자 수 단계 (쉼표로 구분)")
+    parser.add_argument("--iterations", type=int, default=2, help="사용자 한 명이 흐름을 반복하는 횟수")
+    parser.add_argument("--questions", type=int, default=3, help="문서 검색 화면에서 보내는 질문 수")
+    parser.add_argument("--llm-latency-ms", type=float, default=300, help="GPT 응답 지연 중앙값")
+    parser.add_argument("--llm-ms-per-token", type=float, default=0.0, help="응답 토큰당 생성 시간")
+    parser.add_argument("--blob-latency-ms", type=float, default=30, help="Blob 요청 지연 중앙값")
+    parser.add_argument("--search-latency-ms", type=float, default=40, help="Search 요청 지연 중앙값")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="429 / 503 오류 비율")
+    parser.add_argument("--rpm", type=int, default=0, help="OpenAI 분당 요청 한도 (0: 제한 없음)")
+    parser.add_argument("--tpm", type=int, default=0, help="OpenAI 분당 토큰 한도 (0: 제한 없음)")
+    parser.add_argument("--min-gain", type=float, default=0.1, help="포화 판단 기준 처리량 증가율")
+    parser.add_argument("--p95-limit-ms", type=float, default=0, help="재실행 p95 한도 (0: 사용 안 함)")
+    parser.add_argument("--seed", type=int, default=0, help="문서 / 질문 선택 난수 시드")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="결과 JSON 파일 경로")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="bench_load_")
+    configure_env(workdir, args.rpm, args.tpm)
+    try:
+        return run(args)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
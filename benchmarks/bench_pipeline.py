@@ -0,0 +1,309 @@
+# 전체 파이프라인 오프라인 벤치마크
+# Azure OpenAI / Blob Storage / AI Search 를 프로세스 내 가짜 구현(fakes.py)으로 바꾸고
+# 문서 폴더를 업로드 → 추출 → 분석 파이프라인 → 검색 순서로 재생하여
+# 추출 처리량, 문서 처리량(docs/sec), 문서당 p50 / p95 시간, 최대 메모리(RSS), 토큰 사용량을 측정
+# 결과는 JSON 파일로 저장하므로 --baseline 으로 이전 결과와 비교할 수 있음
+#
+# 사용법: python benchmarks/bench_pipeline.py [폴더] --repeat 3 --workers 4 --llm-latency-ms 300 --error-rate 0.02
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import shutil
+import argparse
+import platform
+import resource
+import tempfile
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+DEFAULT_OUTPUT = os.path.join(ROOT, ".cache", "bench_pipeline.json")
+
+# 비교할 때 출력하는 지표 (값이 클수록 좋은 지표는 True)
+COMPARE_METRICS = [
+    ("extract.docs_per_sec", True),
+    ("pipeline.docs_per_sec", True),
+    ("pipeline.p95_ms", False),
+    ("search.p95_ms", False),
+    ("peak_rss_mb", False),
+    ("tokens.per_document", False),
+]
+
+
+# 캐시 / 저장소는 임시 폴더에, Azure 설정은 더미 값으로 (모듈 import 전에 설정해야 함)
+def configure_env(workdir, rpm=0, tpm=0, similar_mode="search"):
+    env = {
+        "AZURE_OPENAI_KEY": "dummy",
+        "AZURE_OPENAI_ENDPOINT": "https://dummy.openai.azure.com/",
+        "AZURE_OPENAI_DEPLOYMENT_NAME": "dummy",
+        "AZURE_EMBEDDING_DEPLOYMENT_NAME": "dummy-embedding",
+        "AZURE_SEARCH_ENDPOINT": "https://dummy.search.windows.net",
+        "AZURE_SEARCH_KEY": "dummy",
+        "AZURE_SEARCH_INDEX_NAME": "dummy",
+        "BLOB_CONTAINER_NAME": "bench",
+        "ANALYSIS_CACHE_PATH": os.path.join(workdir, "analysis_cache.sqlite3"),
+        "QUERY_CACHE_PATH": os.path.join(workdir, "query_cache.sqlite3"),
+        "NEAR_DUPLICATE_INDEX_PATH": os.path.join(workdir, "near_duplicates.sqlite3"),
+        "KEYWORD_INDEX_PATH": os.path.join(workdir, "keywords.sqlite3"),
+        "JOB_QUEUE_PATH": os.path.join(workdir, "jobs.sqlite3"),
+        "VECTOR_INDEX_DIR": os.path.join(workdir, "vector_index"),
+        "METADATA_STORE_DIR": os.path.join(workdir, "metadata"),
+        "LLM_RATE_LIMIT_PATH": os.path.join(workdir, "rate_limit.sqlite3"),
+        "TRACE_LOG_PATH": os.path.join(workdir, "traces.jsonl"),
+        "TRACE_METRICS_PATH": "",
+        "OPENAI_RPM_LIMIT": str(rpm),
+        "OPENAI_TPM_LIMIT": str(tpm),
+        "SIMILAR_DOCUMENTS_MODE": similar_mode,
+        "RETRIEVAL_BACKEND": "azure",
+    }
+    for key, value in env.items():
+        os.environ[key] = value
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def percentiles(durations):
+    if not durations:
+        return {"p50_ms": None, "p95_ms": None, "max_ms": None}
+    values = np.array(durations) * 1000
+    return {
+        "p50_ms": round(float(np.percentile(values, 50)), 1),
+        "p95_ms": round(float(np.percentile(values, 95)), 1),
+        "max_ms": round(float(values.max()), 1),
+    }
+
+
+def peak_rss_mb():
+    # Linux 는 KB, macOS 는 byte 단위
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def collect_files(directory):
+    from bulk_ingest import iter_documents
+
+    return list(iter_documents(directory))
+
+
+# 1단계: 추출만 반복 (Azure 호출 없음)
+def bench_extract(paths, repeat):
+    from extractors import extract_content
+    from ingest import IngestBuffer
+
+    durations = []
+    total_bytes = 0
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for path in paths:
+            t = time.perf_counter()
+            buffer = IngestBuffer.from_path(path)
+            extract_content(buffer)
+            durations.append(time.perf_counter() - t)
+            total_bytes += buffer.size
+    elapsed = time.perf_counter() - started
+    return dict(
+        documents=len(durations),
+        seconds=round(elapsed, 3),
+        docs_per_sec=round(len(durations) / elapsed, 2) if elapsed else None,
+        mb_per_sec=round(total_bytes / (1024 * 1024) / elapsed, 2) if elapsed else None,
+        **percentiles(durations),
+    )
+
+
+# 문서 한 건: 업로드 준비 → 추출 → 분석 파이프라인 (분석 캐시는 거치지 않고 항상 실제 분석)
+def _process_document(path):
+    from analysis_pipeline import run_pipeline
+    from doc_analysis import build_analysis_stages
+    from extractors import extract_content
+    from ingest import IngestBuffer
+    from tracing import trace
+
+    started = time.perf_counter()
+    with trace("bench", path=path):
+        buffer = IngestBuffer.from_path(path)
+        content = extract_content(buffer)
+        stages = build_analysis_stages(buffer, content, str(uuid.uuid4()), os.path.basename(path))
+        results = list(run_pipeline(stages))
+    errors = [result.name for result in results if not result.ok]
+    return time.perf_counter() - started, errors
+
+
+# 2단계: 전체 파이프라인을 workers 개씩 동시에 실행
+def bench_pipeline(paths, repeat, workers):
+    from doc_analysis import get_token_usage
+    from llm_gateway import get_llm_gateway
+    from metadata_store import get_metadata_store
+
+    jobs = [path for _ in range(repeat) for path in paths]
+    tokens_started = get_token_usage()["total_tokens"]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        outcomes = list(executor.map(_process_document, jobs))
+    elapsed = time.perf_counter() - started
+    get_metadata_store().flush()
+
+    tokens = get_token_usage()["total_tokens"] - tokens_started
+    failed = sum(1 for _, errors in outcomes if errors)
+    return dict(
+        documents=len(jobs),
+        failed=failed,
+        seconds=round(elapsed, 3),
+        docs_per_sec=round(len(jobs) / elapsed, 2) if elapsed else None,
+        **percentiles([duration for duration, _ in outcomes]),
+        gateway=get_llm_gateway().stats(),
+    ), tokens
+
+
+# 3단계: 분석된 문서로 검색 인덱스를 채우고 하이브리드 검색 반복
+def bench_search(fake_search, queries, seed):
+    from metadata_store import get_metadata_store
+    from retrieval import LocalRetriever, get_retriever
+
+    rows = get_metadata_store().load_all()
+    fake_search.retriever = LocalRetriever.from_metadata(rows)
+    terms = [
+        keyword.strip()
+        for row in rows
+        for keyword in row.get("keywords", "").split(",")
+        if keyword.strip()
+    ]
+    if not terms or not queries:
+        return dict(queries=0, **percentiles([]))
+
+    rng = random.Random(seed)
+    retriever = get_retriever()
+    durations = []
+    for _ in range(queries):
+        query = " ".join(rng.sample(terms, min(2, len(terms))))
+        t = time.perf_counter()
+        retriever.search(query)
+        durations.append(time.perf_counter() - t)
+    return dict(queries=queries, **percentiles(durations))
+
+
+def _lookup(result, dotted):
+    for key in dotted.split("."):
+        if not isinstance(result, dict):
+            return None
+        result = result.get(key)
+    return result
+
+
+# 이전 결과와 비교 출력
+def print_comparison(result, baseline):
+    print(f"\nbaseline: {baseline.get('commit') or '-'} ({baseline.get('timestamp', '-')})")
+    for metric, higher_is_better in COMPARE_METRICS:
+        new, old = _lookup(result, metric), _lookup(baseline, metric)
+        if new is None or not old:
+            continue
+        change = (new - old) / old * 100
+        better = change >= 0 if higher_is_better else change <= 0
+        line = f"{metric:24} {old:>10} → {new:<10} {change:+6.1f}%"
+        print(line if better else f"{line} (regression)")
+
+
+def run(args):
+
+    from fakes import FakeProfile, install_fakes
+
+    paths = collect_files(args.directory)
+    if not paths:
+        print("측정할 문서가 없습니다.")
+        return 1
+
+    profile = FakeProfile(
+        llm_latency_ms=args.llm_latency_ms,
+        llm_ms_per_token=args.llm_ms_per_token,
+        embedding_latency_ms=args.search_latency_ms,
+        blob_latency_ms=args.blob_latency_ms,
+        search_latency_ms=args.search_latency_ms,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+    fakes = install_fakes(profile)
+
+    extract = bench_extract(paths, args.repeat)
+    pipeline, tokens = bench_pipeline(paths, args.repeat, args.workers)
+    search = bench_search(fakes["search"], args.queries, args.seed)
+
+    result = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "corpus": {"directory": args.directory, "files": len(paths), "repeat": args.repeat},
+        "profile": {
+            key: value
+            for key, value in vars(args).items()
+            if key not in ("directory", "output", "baseline", "repeat")
+        },
+        "extract": extract,
+        "pipeline": pipeline,
+        "search": search,
+        "tokens": {
+            "total": tokens,
+            "per_document": round(tokens / pipeline["documents"], 1) if pipeline["documents"] else None,
+        },
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+    if args.output:
+        directory = os.path.dirname(args.output)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            print_comparison(result, json.load(f))
+    return 0 if not pipeline["failed"] else 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="전체 파이프라인 오프라인 벤치마크")
+    parser.add_argument("directory", nargs="?", default=os.path.join(ROOT, "data"), help="문서 폴더")
+    parser.add_argument("--repeat", type=int, default=3, help="문서 폴더를 재생하는 횟수")
+    parser.add_argument("--workers", type=int, default=4, help="동시에 처리할 문서 수")
+    parser.add_argument("--queries", type=int, default=50, help="검색 요청 수")
+    parser.add_argument("--llm-latency-ms", type=float, default=300, help="GPT 응답 지연 중앙값")
+    parser.add_argument("--llm-ms-per-token", type=float, default=0.0, help="응답 토큰당 생성 시간")
+    parser.add_argument("--blob-latency-ms", type=float, default=30, help="Blob 요청 지연 중앙값")
+    parser.add_argument("--search-latency-ms", type=float, default=40, help="Search 요청 지연 중앙값")
+    parser.add_argument("--jitter", type=float, default=0.3, help="지연 분산 (로그 정규 분포 sigma)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="429 / 503 오류 비율")
+    parser.add_argument("--rpm", type=int, default=0, help="OpenAI 분당 요청 한도 (0: 제한 없음)")
+    parser.add_argument("--tpm", type=int, default=0, help="OpenAI 분당 토큰 한도 (0: 제한 없음)")
+    parser.add_argument(
+        "--similar-mode", default="search", choices=("local", "search", "rag"), help="유사 문서 검색 방식"
+    )
+    parser.add_argument("--seed", type=int, default=0, help="지연 / 오류 / 검색어 난수 시드")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="결과 JSON 파일 경로")
+    parser.add_argument("--baseline", help="비교할 이전 결과 JSON 파일")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="bench_pipeline_")
+    configure_env(workdir, args.rpm, args.tpm, args.similar_mode)
+    try:
+        return run(args)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,71 @@
+# 앱 시작 / 재실행 시간 벤치마크
+# 새 프로세스에서 Streamlit AppTest 로 앱을 실행하여
+# 첫 실행(콜드 스타트) 시간, 재실행 시간, 로드된 무거운 모듈을 측정
+#
+# 사용법: python benchmarks/bench_startup.py [스크립트 경로] [재실행 횟수]
+import os
+import sys
+import json
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ["pandas", "PyPDF2", "docx", "sklearn", "openai", "azure.storage.blob", "azure.search.documents"]
+
+# 실제 Azure 에 연결하지 않도록 더미 환경변수 사용
+DUMMY_ENV = {
+    "AZURE_OPENAI_KEY": "dummy",
+    "AZURE_OPENAI_ENDPOINT": "https://dummy.openai.azure.com/",
+    "AZURE_OPENAI_DEPLOYMENT_NAME": "dummy",
+    "AZURE_EMBEDDING_DEPLOYMENT_NAME": "dummy",
+    "AZURE_SEARCH_ENDPOINT": "https://dummy.search.windows.net",
+    "AZURE_SEARCH_KEY": "dummy",
+    "AZURE_SEARCH_INDEX_NAME": "dummy",
+}
+
+CHILD = """
+import sys, time, json
+started = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file(sys.argv[1], default_timeout=120)
+streamlit_ready = time.perf_counter()
+at.run()
+first = time.perf_counter() - streamlit_ready
+reruns = []
+for _ in range(int(sys.argv[2])):
+    t = time.perf_counter()
+    at.run()
+    reruns.append(time.perf_counter() - t)
+heavy = [name for name in json.loads(sys.argv[3]) if name in sys.modules]
+print(json.dumps({"first_run": first, "reruns": reruns, "heavy_modules": heavy, "modules": len(sys.modules)}))
+"""
+
+
+def main(args):
+    script = os.path.abspath(args[0] if args else os.path.join(ROOT, "docInspector.py"))
+    rerun_count = int(args[1]) if len(args) > 1 else 20
+
+    env = dict(os.environ)
+    for key, value in DUMMY_ENV.items():
+        env.setdefault(key, value)
+
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD, script, str(rerun_count), json.dumps(HEAVY_MODULES)],
+        cwd=os.path.dirname(script),
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout.strip().splitlines()[-1]
+    result = json.loads(output)
+
+    print(f"script          : {script}")
+    print(f"first run (cold): {result['first_run'] * 1000:.1f} ms")
+    print(f"rerun median    : {statistics.median(result['reruns']) * 1000:.1f} ms")
+    print(f"loaded modules  : {result['modules']}")
+    print(f"heavy modules   : {', '.join(result['heavy_modules']) or '-'}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,260 @@
+# 벤치마크 / 부하 테스트용 Azure 서비스 가짜 구현
+# Azure OpenAI, Blob Storage, AI Search 클라이언트를 프로세스 안에서 흉내 내고
+# 응답 지연(로그 정규 분포)과 오류(429 / 503) 비율을 설정할 수 있음
+#
+# 사용법: install_fakes(FakeProfile(llm_latency_ms=300, error_rate=0.02))
+import re
+import time
+import random
+import threading
+from types import SimpleNamespace
+
+from chunking import estimate_tokens
+
+
+# 지연 / 오류 설정
+class FakeProfile:
+    def __init__(
+        self,
+        llm_latency_ms=300.0,
+        llm_ms_per_token=0.0,
+        embedding_latency_ms=40.0,
+        blob_latency_ms=30.0,
+        search_latency_ms=40.0,
+        jitter=0.3,
+        error_rate=0.0,
+        retry_after_ms=200,
+        stream_chunk_tokens=8,
+        seed=None,
+    ):
+        self.llm_latency_ms = llm_latency_ms
+        self.llm_ms_per_token = llm_ms_per_token
+        self.embedding_latency_ms = embedding_latency_ms
+        self.blob_latency_ms = blob_latency_ms
+        self.search_latency_ms = search_latency_ms
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.retry_after_ms = retry_after_ms
+        self.stream_chunk_tokens = stream_chunk_tokens
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    # 중앙값이 median_ms 인 로그 정규 분포 지연
+    def sleep(self, median_ms):
+        if median_ms <= 0:
+            return
+        with self._lock:
+            factor = self._random.lognormvariate(0, self.jitter) if self.jitter else 1.0
+        time.sleep(median_ms * factor / 1000)
+
+    # error_rate 확률로 429(대부분) 또는 503 오류 발생
+    def maybe_fail(self):
+        if not self.error_rate:
+            return
+        with self._lock:
+            failed = self._random.random() < self.error_rate
+            status = 429 if self._random.random() < 0.8 else 503
+        if failed:
+            raise FakeAPIError(status, self.retry_after_ms if status == 429 else None)
+
+
+# openai.APIStatusError 와 같은 속성(status_code, response.headers)을 가진 오류
+class FakeAPIError(Exception):
+    def __init__(self, status_code, retry_after_ms=None):
+        super().__init__(f"fake error {status_code}")
+        self.status_code = status_code
+        headers = {"retry-after-ms": str(retry_after_ms)} if retry_after_ms else {}
+        self.response = SimpleNamespace(status_code=status_code, headers=headers)
+
+
+# 시스템 프롬프트에 맞는 그럴듯한 응답 (키워드 / 체크리스트 파싱이 실제와 같은 경로를 타도록)
+def _fake_answer(messages, max_tokens):
+    system = messages[0]["content"] if messages else ""
+    text = messages[-1]["content"] if messages else ""
+    words = [w for w in re.findall(r"[\w가-힣]{2,}", text)][:200]
+    if "키워드" in system:
+        picked = list(dict.fromkeys(words))[:5] or ["문서"]
+        return ", ".join(picked)
+    if "체크리스트" in system:
+        return "\n".join(f"{w} 항목을 검토해야 함" for w in (list(dict.fromkeys(words))[:5] or ["문서"]))
+    answer = " ".join(words) or "응답"
+    # max_tokens 를 넘지 않도록 자름
+    while estimate_tokens(answer) > max_tokens and len(answer) > 1:
+        answer = answer[: len(answer) // 2]
+    return answer
+
+
+class _FakeCompletions:
+    def __init__(self, profile):
+        self.profile = profile
+
+    def create(self, model=None, messages=(), max_tokens=300, stream=False, **kwargs):
+        self.profile.maybe_fail()
+        answer = _fake_answer(list(messages), max_tokens or 300)
+        prompt_tokens = sum(estimate_tokens(m.get("content") or "") + 4 for m in messages)
+        completion_tokens = estimate_tokens(answer)
+        usage = SimpleNamespace(
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            total_tokens=prompt_tokens + completion_tokens,
+        )
+
+        # 첫 토큰까지의 지연 후 토큰 수에 비례한 생성 시간
+        self.profile.sleep(self.profile.llm_latency_ms)
+        if not stream:
+            self.profile.sleep(self.profile.llm_ms_per_token * completion_tokens)
+            return SimpleNamespace(
+                choices=[SimpleNamespace(message=SimpleNamespace(content=answer))], usage=usage
+            )
+        return self._stream(answer, usage)
+
+    def _stream(self, answer, usage):
+        pieces = answer.split(" ")
+        size = max(1, self.profile.stream_chunk_tokens)
+        for start in range(0, len(pieces), size):
+            piece = " ".join(pieces[start : start + size])
+            self.profile.sleep(self.profile.llm_ms_per_token * estimate_tokens(piece))
+            delta = SimpleNamespace(content=piece if start == 0 else " " + piece)
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)], usage=None)
+        yield SimpleNamespace(choices=[], usage=usage)
+
+
+class _FakeEmbeddings:
+    def __init__(self, profile, dim):
+        from vector_index import HashingEmbeddingProvider
+
+        self.profile = profile
+        self.provider = HashingEmbeddingProvider(dim=dim)
+
+    def create(self, model=None, input=(), **kwargs):
+        self.profile.maybe_fail()
+        texts = [input] if isinstance(input, str) else list(input)
+        self.profile.sleep(self.profile.embedding_latency_ms)
+        vectors = self.provider.embed(texts)
+        return SimpleNamespace(data=[SimpleNamespace(embedding=v.tolist()) for v in vectors])
+
+
+# AzureOpenAI 클라이언트
+class FakeAzureOpenAI:
+    def __init__(self, profile, embedding_dim=256):
+        self.chat = SimpleNamespace(completions=_FakeCompletions(profile))
+        self.embeddings = _FakeEmbeddings(profile, embedding_dim)
+
+
+# Blob Storage (컨테이너별 메모리 저장소, 인덱스 태그 조회 지원)
+class FakeBlobServiceClient:
+    url = "https://fakeaccount.blob.core.windows.net/"
+
+    def __init__(self, profile):
+        self.profile = profile
+        self.blobs = {}
+        self.tags = {}
+        self.lock = threading.Lock()
+
+    def get_container_client(self, container):
+        return _FakeContainer(self, container)
+
+    def get_blob_client(self, container, blob):
+        return _FakeBlob(self, container, blob)
+
+
+class _FakeContainer:
+    def __init__(self, service, name):
+        self.service = service
+        self.name = name
+
+    def upload_blob(self, name, data, overwrite=False, tags=None, **kwargs):
+        self.service.profile.sleep(self.service.profile.blob_latency_ms)
+        payload = data.read() if hasattr(data, "read") else bytes(data)
+        with self.service.lock:
+            self.service.blobs[(self.name, name)] = payload
+            self.service.tags[(self.name, name)] = dict(tags or {})
+
+    def find_blobs_by_tags(self, expression):
+        self.service.profile.sleep(self.service.profile.blob_latency_ms)
+        key, value = re.match(r"\"(.+)\" = '(.+)'", expression).groups()
+        with self.service.lock:
+            return [
+                SimpleNamespace(name=name)
+                for (container, name), tags in self.service.tags.items()
+                if container == self.name and tags.get(key) == value
+            ]
+
+    def list_blobs(self, name_starts_with=None, **kwargs):
+        with self.service.lock:
+            names = sorted(
+                name
+                for container, name in self.service.blobs
+                if container == self.name and name.startswith(name_starts_with or "")
+            )
+        return [SimpleNamespace(name=name) for name in names]
+
+    def get_blob_client(self, name):
+        return _FakeBlob(self.service, self.name, name)
+
+
+class _FakeBlob:
+    def __init__(self, service, container, name):
+        self.service = service
+        self.key = (container, name)
+
+    def download_blob(self, **kwargs):
+        self.service.profile.sleep(self.service.profile.blob_latency_ms)
+        with self.service.lock:
+            data = self.service.blobs[self.key]
+        return SimpleNamespace(readall=lambda: data)
+
+    def delete_blob(self, **kwargs):
+        with self.service.lock:
+            self.service.blobs.pop(self.key, None)
+            self.service.tags.pop(self.key, None)
+
+
+# Azure AI Search (프로세스 내 하이브리드 인덱스로 응답)
+class FakeSearchClient:
+    def __init__(self, profile, documents=()):
+        from retrieval import LocalRetriever
+
+        self.profile = profile
+        self.retriever = LocalRetriever(documents)
+
+    def add_documents(self, documents):
+        self.retriever.add(documents)
+
+    def search(self, search_text=None, vector_queries=None, select=None, top=5, **kwargs):
+        # Azure SDK 는 429 / 503 을 재시도 정책 안에서 처리하므로 오류 대신 재시도 지연으로 반영
+        while True:
+            try:
+                self.profile.maybe_fail()
+                break
+            except FakeAPIError:
+                time.sleep(self.profile.retry_after_ms / 1000)
+        self.profile.sleep(self.profile.search_latency_ms)
+        results = []
+        for result in self.retriever.search(search_text or "", k=top):
+            item = {
+                "id": result.id,
+                "title": result.title,
+                "url": result.url,
+                "content": result.content,
+                "@search.score": result.score,
+            }
+            results.append({k: v for k, v in item.items() if not select or k in select or k[0] == "@"})
+        return results
+
+
+# clients.py 의 공유 클라이언트를 가짜 구현으로 교체
+def install_fakes(profile=None, search_documents=()):
+    from clients import set_client
+
+    profile = profile or FakeProfile()
+    openai_client = FakeAzureOpenAI(profile)
+    fakes = {
+        "docs": openai_client,
+        "embedding": openai_client,
+        "blob": FakeBlobServiceClient(profile),
+        "search": FakeSearchClient(profile, search_documents),
+    }
+    for name, client in fakes.items():
+        set_client(name, client)
+    return fakes
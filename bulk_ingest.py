@@ -0,0 +1,234 @@
+# 문서 폴더 일괄 분석 CLI
+# 폴더 안의 PDF / DOCX / TXT 문서를 제한된 작업자 수로 동시에 추출·분석하고
+# 결과를 메타데이터 저장소에 기록. 처리한 문서는 체크포인트 파일에 남겨서
+# 중간에 중단되어도 다시 실행하면 남은 문서부터 이어서 처리
+#
+# 사용법: python bulk_ingest.py data/ --workers 4
+import os
+import sys
+import json
+import time
+import uuid
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from analysis_pipeline import run_pipeline
+from doc_analysis import (
+    analysis_cache,
+    analysis_cache_key,
+    build_analysis_stages,
+    collect_analysis_result,
+    compare_document_sections,
+    find_near_duplicate_analysis,
+    get_token_usage,
+    store_analysis_result,
+    store_near_duplicate_analysis,
+)
+from extractors import extract_content
+from ingest import IngestBuffer
+from llm_gateway import get_llm_gateway
+from metadata_store import get_metadata_store
+from tracing import span, trace
+
+SUPPORTED_EXTENSIONS = (".pdf", ".docx", ".txt")
+DEFAULT_CHECKPOINT = ".cache/bulk_ingest_checkpoint.jsonl"
+# 다시 처리하지 않는 상태 (duplicate: 내용이 거의 같은 문서의 분석 결과를 재사용)
+DONE_STATUSES = ("ok", "cached", "duplicate", "empty")
+
+
+# 체크포인트 파일 (처리 결과를 한 줄씩 추가 기록)
+class Checkpoint:
+    def __init__(self, path):
+        self.path = path
+        self.done = set()
+        self._lock = threading.Lock()
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # 기록 도중 중단된 마지막 줄
+                    if entry.get("status") in DONE_STATUSES:
+                        self.done.add(entry["sha256"])
+
+    def is_done(self, sha256):
+        return sha256 in self.done
+
+    def record(self, entry):
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            if entry.get("status") in DONE_STATUSES:
+                self.done.add(entry["sha256"])
+
+
+def iter_documents(directory):
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for name in sorted(files):
+            if name.lower().endswith(SUPPORTED_EXTENSIONS):
+                yield os.path.join(root, name)
+
+
+# 문서 한 개 처리 (처리 과정은 성능 추적 기록에 bulk_ingest 로 저장)
+def ingest_document(path, checkpoint, upload=True):
+    with trace("bulk_ingest", path=path) as root:
+        entry = _ingest_document(path, checkpoint, upload)
+        root["status"] = entry["status"]
+        return entry
+
+
+# 추출 → 캐시 / 거의 같은 문서 확인 → 분석 파이프라인 실행
+def _ingest_document(path, checkpoint, upload):
+    started = time.perf_counter()
+    buffer = IngestBuffer.from_path(path)
+    entry = {"path": path, "sha256": buffer.sha256}
+
+    if checkpoint.is_done(buffer.sha256):
+        return dict(entry, status="skipped", elapsed=0.0)
+
+    with span("extract", content_type=buffer.content_type, size=buffer.size):
+        content = extract_content(buffer)
+    if not content.strip():
+        entry.update(status="empty", elapsed=time.perf_counter() - started)
+        checkpoint.record(entry)
+        return entry
+
+    cache_key = analysis_cache_key(content)
+    with span("cache.analysis") as cache_span:
+        cache_span["cache_hit"] = analysis_cache.get(cache_key) is not None
+    if cache_span["cache_hit"]:
+        entry.update(status="cached", elapsed=time.perf_counter() - started)
+        checkpoint.record(entry)
+        return entry
+
+    with span("near_duplicate") as duplicate_span:
+        match, reused = find_near_duplicate_analysis(content, cache_key)
+        duplicate_span["cache_hit"] = match is not None
+    if match is not None:
+        document_id = str(uuid.uuid4())
+        store_near_duplicate_analysis(
+            buffer, content, cache_key, document_id, os.path.basename(path), reused, upload=upload
+        )
+        entry.update(
+            status="duplicate",
+            document_id=document_id,
+            duplicate_of=match["filename"],
+            similarity=round(match["similarity"], 4),
+            elapsed=time.perf_counter() - started,
+        )
+        checkpoint.record(entry)
+        return entry
+
+    # 같은 파일명의 이전 버전이 있으면 바뀐 구간 수 기록
+    revision = compare_document_sections(os.path.basename(path), content)
+    if revision is not None:
+        entry["changed_sections"] = f"{revision['changed']}/{revision['total']}"
+
+    document_id = str(uuid.uuid4())
+    stages = build_analysis_stages(
+        buffer, content, document_id, os.path.basename(path), upload=upload
+    )
+    results = {result.name: result for result in run_pipeline(stages)}
+
+    errors = {name: str(result.error) for name, result in results.items() if not result.ok}
+    analysis_result = collect_analysis_result(results)
+    if analysis_result is not None:
+        store_analysis_result(
+            cache_key,
+            content,
+            os.path.basename(path),
+            document_id,
+            analysis_result,
+            results["blob"].value[0],
+        )
+
+    entry.update(
+        status="ok" if not errors else "failed",
+        document_id=document_id,
+        elapsed=time.perf_counter() - started,
+    )
+    if errors:
+        entry["errors"] = errors
+    checkpoint.record(entry)
+    return entry
+
+
+def _print_progress(processed, total, started, tokens_started):
+    elapsed_minutes = max((time.perf_counter() - started) / 60, 1e-9)
+    tokens = get_token_usage()["total_tokens"] - tokens_started
+    print(
+        f"[{processed}/{total}] "
+        f"{processed / elapsed_minutes:.1f} docs/min, {tokens / elapsed_minutes:.0f} tokens/min",
+        flush=True,
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="문서 폴더 일괄 분석")
+    parser.add_argument("directory", help="분석할 문서 폴더 (예: data/)")
+    parser.add_argument("--workers", type=int, default=4, help="동시에 처리할 문서 수")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT, help="체크포인트 파일 경로")
+    parser.add_argument("--no-upload", action="store_true", help="원본 파일을 Blob 에 업로드하지 않음")
+    parser.add_argument("--report-every", type=int, default=10, help="진행 상황 출력 간격 (문서 수)")
+    args = parser.parse_args(argv)
+
+    paths = list(iter_documents(args.directory))
+    checkpoint = Checkpoint(args.checkpoint)
+    print(f"{len(paths)}개 문서, 체크포인트 {len(checkpoint.done)}건", flush=True)
+
+    counts = {}
+    processed = 0
+    started = time.perf_counter()
+    tokens_started = get_token_usage()["total_tokens"]
+
+    # 작업자 수의 두 배까지만 제출하여 수만 건의 문서도 일정한 메모리로 처리
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        running = {}
+        path_iter = iter(paths)
+        while True:
+            while len(running) < args.workers * 2:
+                path = next(path_iter, None)
+                if path is None:
+                    break
+                running[executor.submit(ingest_document, path, checkpoint, not args.no_upload)] = path
+
+            if not running:
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                path = running.pop(future)
+                try:
+                    entry = future.result()
+                except Exception as e:
+                    entry = {"path": path, "status": "failed", "errors": {"extract": str(e)}}
+                if entry["status"] == "failed":
+                    print(f"실패: {path}: {entry['errors']}", file=sys.stderr, flush=True)
+
+                counts[entry["status"]] = counts.get(entry["status"], 0) + 1
+                processed += 1
+                if processed % args.report_every == 0:
+                    _print_progress(processed, len(paths), started, tokens_started)
+
+    get_metadata_store().flush()
+
+    _print_progress(processed, len(paths), started, tokens_started)
+    print(", ".join(f"{status}: {count}" for status, count in sorted(counts.items())))
+    stats = get_llm_gateway().stats()
+    print(
+        f"OpenAI 요청 {stats['requests']}건, 재시도 {stats['retries']}건 (429: {stats['throttled']}건), "
+        f"한도 대기 {stats['wait_seconds']:.1f}초, 동시 요청 한도 {stats['concurrency']}"
+    )
+    return 0 if not counts.get("failed") else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+import os
+
+from chunking import estimate_tokens
+from doc_analysis import gpt_summarize_conversation
+
+# 문서 검색 대화에서 한 번에 보내는 최대 토큰 수 (시스템 프롬프트 + 이전 대화 요약 + 최근 대화)
+CHAT_CONTEXT_MAX_TOKENS = int(os.getenv("CHAT_CONTEXT_MAX_TOKENS", "3000"))
+# 이전 대화 요약의 최대 토큰 수
+CHAT_SUMMARY_MAX_TOKENS = int(os.getenv("CHAT_SUMMARY_MAX_TOKENS", "300"))
+# 예산을 넘으면 최근 대화가 예산의 이 비율 이하가 될 때까지 한 번에 요약으로 옮김
+# (매 질문마다 요약을 다시 만들지 않도록 여유를 둠)
+CHAT_CONTEXT_FOLD_RATIO = float(os.getenv("CHAT_CONTEXT_FOLD_RATIO", "0.6"))
+
+# 메시지 하나의 역할/구분자 토큰
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+# 문서 검색 대화 컨텍스트
+# 시스템 프롬프트와 최근 대화는 그대로 보내고, 예산을 넘는 오래된 대화는
+# 이전 대화 요약에 합쳐서 보내므로 대화가 길어져도 요청 크기가 일정하게 유지됨
+class ChatContext:
+    def __init__(
+        self,
+        max_tokens=CHAT_CONTEXT_MAX_TOKENS,
+        summary_max_tokens=CHAT_SUMMARY_MAX_TOKENS,
+        fold_ratio=CHAT_CONTEXT_FOLD_RATIO,
+        summarize=gpt_summarize_conversation,
+    ):
+        self.max_tokens = max_tokens
+        self.summary_max_tokens = summary_max_tokens
+        self.fold_ratio = fold_ratio
+        self.summarize = summarize
+        self.summary = ""
+        # 요약에 합쳐진 메시지 수 (시스템 프롬프트 제외)
+        self.summarized_count = 0
+        # 메시지별 토큰 수 (새 메시지만 계산)
+        self._token_counts = []
+
+    def _count(self, messages):
+        for message in messages[len(self._token_counts) :]:
+            self._token_counts.append(
+                estimate_tokens(message.get("content") or "") + MESSAGE_OVERHEAD_TOKENS
+            )
+        return self._token_counts
+
+    # 요약에 합칠 메시지 경계 찾기 (start 부터 끝까지가 budget 이내가 되는 가장 앞 위치)
+    # 마지막 메시지(현재 질문)는 예산을 넘어도 항상 포함
+    def _window_start(self, counts, budget):
+        start = len(counts)
+        used = 0
+        while start > self.summarized_count:
+            if start < len(counts) and used + counts[start - 1] > budget:
+                break
+            start -= 1
+            used += counts[start]
+        return start
+
+    # 모델에 보낼 메시지 목록
+    def window(self, messages):
+        system = [m for m in messages[:1] if m["role"] == "system"]
+        history = messages[len(system) :]
+        if len(history) < len(self._token_counts):
+            # 대화가 초기화된 경우
+            self.summary = ""
+            self.summarized_count = 0
+            self._token_counts = []
+        counts = self._count(history)
+
+        system_tokens = sum(estimate_tokens(m["content"]) + MESSAGE_OVERHEAD_TOKENS for m in system)
+        budget = max(0, self.max_tokens - system_tokens - self.summary_max_tokens)
+
+        if self._window_start(counts, budget) > self.summarized_count:
+            # 예산을 넘었으면 여유 있게 줄여서 다음 몇 번의 질문 동안 다시 요약하지 않도록 함
+            start = self._window_start(counts, int(budget * self.fold_ratio))
+            self.summary = self.summarize(
+                self.summary, history[self.summarized_count : start], max_tokens=self.summary_max_tokens
+            )
+            self.summarized_count = start
+
+        window = list(system)
+        if self.summary:
+            window.append({"role": "system", "content": f"이전 대화 요약:\n{self.summary}"})
+        window.extend(history[self.summarized_count :])
+        return window
@@ -0,0 +1,146 @@
+import os
+import threading
+from concurrent.futures import Future
+
+from doc_analysis import gpt_suggest_checklist_items, gpt_suggest_checklist_items_batch
+from keyword_index import tokenize
+
+# 피드백으로 체크리스트 항목 제안 설정
+# 기존 항목과 거의 같은 피드백은 GPT 호출 없이 중복으로 처리하고, GPT 가 제안한 항목도 같은 기준으로 중복 제거
+# (조사 / 어미를 뗀 단어의 글자 2-gram 겹침 비율, 1 이면 같은 단어 구성)
+CHECKLIST_DUPLICATE_THRESHOLD = float(os.getenv("CHECKLIST_DUPLICATE_THRESHOLD", "0.8"))
+# 이 시간 안에 여러 리뷰어가 보낸 피드백은 한 번의 GPT 요청으로 묶음 (0 이면 묶지 않음)
+CHECKLIST_SUGGEST_BATCH_SECONDS = float(os.getenv("CHECKLIST_SUGGEST_BATCH_SECONDS", "0.2"))
+CHECKLIST_SUGGEST_MAX_BATCH = int(os.getenv("CHECKLIST_SUGGEST_MAX_BATCH", "8"))
+
+# 체크리스트 문장에 흔히 붙는 표현 (비교할 때 제외)
+_FILLER_WORDS = set(
+    "확인 검토 해야 필요 필요합니다 여부 추가 명확히 반드시 주세요 봐주세요 부탁드립니다".split()
+)
+
+
+def _bigrams(text):
+    grams = set()
+    for word in tokenize(text):
+        if word in _FILLER_WORDS:
+            continue
+        grams.update(word[i : i + 2] for i in range(len(word) - 1))
+    return grams
+
+
+# 두 문장의 유사도 (글자 2-gram Dice 계수)
+def checklist_similarity(a, b):
+    a, b = _bigrams(a), _bigrams(b)
+    if not a or not b:
+        return 0.0
+    return 2 * len(a & b) / (len(a) + len(b))
+
+
+# 가장 비슷한 기존 항목: (항목, 유사도), 기준 이상인 항목이 없으면 (None, 유사도)
+def find_duplicate_item(text, checklist, threshold=CHECKLIST_DUPLICATE_THRESHOLD):
+    best, best_score = None, 0.0
+    for item in checklist:
+        score = checklist_similarity(text, item)
+        if score > best_score:
+            best, best_score = item, score
+    return (best, best_score) if best_score >= threshold else (None, best_score)
+
+
+# 여러 세션에서 짧은 시간 안에 들어온 제안 요청을 모아서 한 번에 GPT 호출
+# 같은 체크리스트 + 같은 피드백 요청은 하나로 합침
+class ChecklistSuggestionBatcher:
+    def __init__(
+        self,
+        window_seconds=CHECKLIST_SUGGEST_BATCH_SECONDS,
+        max_batch=CHECKLIST_SUGGEST_MAX_BATCH,
+    ):
+        self.window_seconds = window_seconds
+        self.max_batch = max_batch
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._timer = None
+
+    # GPT 답변(항목 또는 '없음')을 결과로 받는 Future 반환
+    def submit(self, feedback, checklist):
+        key = (tuple(checklist), feedback.strip())
+        batch = None
+        with self._lock:
+            future = self._pending.get(key)
+            if future is not None:
+                return future
+            future = self._pending[key] = Future()
+            if len(self._pending) >= self.max_batch:
+                batch = self._take()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.window_seconds, self._flush)
+                self._timer.daemon = True
+                self._timer.start()
+        if batch:
+            self._run(batch)
+        return future
+
+    def _take(self):
+        batch, self._pending = self._pending, {}
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        return batch
+
+    def _flush(self):
+        with self._lock:
+            batch = self._take()
+        if batch:
+            self._run(batch)
+
+    def _run(self, batch):
+        requests = list(batch)
+        try:
+            if len(requests) == 1:
+                checklist, feedback = requests[0]
+                suggestions = [gpt_suggest_checklist_items(feedback, list(checklist))]
+            else:
+                suggestions = gpt_suggest_checklist_items_batch(
+                    [(feedback, list(checklist)) for checklist, feedback in requests]
+                )
+        except Exception as e:
+            for future in batch.values():
+                future.set_exception(e)
+            return
+        for key, suggestion in zip(requests, suggestions):
+            batch[key].set_result(suggestion)
+
+
+_batcher = None
+_batcher_lock = threading.Lock()
+
+
+# 프로세스 공유 제안 요청 묶음 처리기 (여러 리뷰어의 세션이 함께 사용)
+def get_checklist_suggestion_batcher():
+    global _batcher
+    if _batcher is None:
+        with _batcher_lock:
+            if _batcher is None:
+                _batcher = ChecklistSuggestionBatcher()
+    return _batcher
+
+
+# 피드백으로 추가할 체크리스트 항목 (추가할 항목이 없으면 None)
+# 기존 항목과 거의 같은 피드백은 GPT 를 호출하지 않음
+def suggest_checklist_item(feedback, checklist):
+    duplicate, _ = find_duplicate_item(feedback, checklist)
+    if duplicate is not None:
+        return None
+
+    if CHECKLIST_SUGGEST_BATCH_SECONDS > 0:
+        suggestion = get_checklist_suggestion_batcher().submit(feedback, checklist).result()
+    else:
+        suggestion = gpt_suggest_checklist_items(feedback, checklist)
+
+    suggestion = suggestion.strip()
+    if not suggestion or suggestion.lower().startswith("없음"):
+        return None
+    # GPT 가 표현만 바꿔서 기존 항목을 다시 제안한 경우
+    duplicate, _ = find_duplicate_item(suggestion, checklist)
+    if duplicate is not None:
+        return None
+    return suggestion
@@ -0,0 +1,147 @@
+import os
+import re
+import zlib
+
+# tiktoken 이 설치되어 있으면 정확한 토큰 수를, 없으면 근사치를 사용
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# 페이지 구분 문자 (PDF 추출 결과에서 페이지 사이에 삽입)
+PAGE_SEPARATOR = "\f"
+
+# 이 토큰 수를 넘는 문서는 구간별 요약(map) 후 합쳐서(reduce) 분석
+MAP_REDUCE_TOKEN_THRESHOLD = int(os.getenv("MAP_REDUCE_TOKEN_THRESHOLD", "12000"))
+CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", "3000"))
+
+_SENTENCE_END = re.compile(r"(?<=[.!?。])\s+|\n")
+
+_encoding = None
+
+
+def _get_encoding():
+    global _encoding
+    if _encoding is None and tiktoken is not None:
+        try:
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception:
+            _encoding = False
+    return _encoding or None
+
+
+# 토큰 수 추정 함수
+# 한글 등 비 ASCII 문자는 대략 1글자 1토큰, 영문/숫자는 4글자 1토큰으로 계산
+def estimate_tokens(text):
+    if not text:
+        return 0
+
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    return (len(text) - ascii_chars) + (ascii_chars + 3) // 4
+
+
+# 한 번에 보내기에 너무 긴 문서인지 판단
+def needs_map_reduce(text, threshold=MAP_REDUCE_TOKEN_THRESHOLD):
+    return estimate_tokens(text) > threshold
+
+
+# 예산 이내로 들어가는 가장 긴 앞부분의 끝 위치 (토큰 수를 재면서 이분 탐색, 최소 1글자)
+def _fitting_end(text, start, max_tokens):
+    low, high = start + 1, len(text)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if estimate_tokens(text[start:middle]) <= max_tokens:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+# 예산을 넘는 문단은 문장 단위로, 그래도 넘으면 예산에 맞는 길이로 자름
+def _split_oversized(paragraph, max_tokens):
+    pieces = []
+    current = ""
+    for sentence in _SENTENCE_END.split(paragraph):
+        if not sentence:
+            continue
+        candidate = f"{current} {sentence}".strip() if current else sentence
+        if estimate_tokens(candidate) <= max_tokens:
+            current = candidate
+            continue
+
+        if current:
+            pieces.append(current)
+        if estimate_tokens(sentence) <= max_tokens:
+            current = sentence
+        else:
+            # 문장 하나가 예산보다 길면 토큰 수를 재어 강제 분할
+            # (tiktoken 에서는 한글 한 글자가 여러 토큰이기도 해서 글자 수로 자르면 예산을 넘음)
+            start = 0
+            while start < len(sentence):
+                end = _fitting_end(sentence, start, max_tokens)
+                pieces.append(sentence[start:end])
+                start = end
+            current = ""
+
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+# 문단 내용(해시)으로 정하는 구간 경계 (문단 토큰 수에 비례한 확률, 평균 max_tokens / 2 토큰마다 하나)
+# 경계가 앞쪽 구간 길이가 아니라 문단 내용으로 정해지므로 수정본도 바뀐 곳 주변 구간만 달라짐
+def _is_boundary(paragraph, tokens, max_tokens):
+    return zlib.crc32(paragraph.encode("utf-8")) / 2**32 < tokens / max(1, max_tokens // 2)
+
+
+# 문서 분할 함수
+# 페이지와 문단 경계를 지키면서 토큰 예산(max_tokens) 이내의 구간으로 나눔
+# 문서 일부만 고친 수정본은 나머지 구간이 그대로라서 구간 요약 캐시를 재사용
+def split_into_chunks(text, max_tokens=CHUNK_MAX_TOKENS):
+    paragraphs = []
+    for page in text.split(PAGE_SEPARATOR):
+        for paragraph in re.split(r"\n\s*\n", page):
+            paragraph = paragraph.strip()
+            if paragraph:
+                paragraphs.append(paragraph)
+        # 페이지 경계 표시 (가능하면 여기서 구간을 나눔)
+        paragraphs.append(PAGE_SEPARATOR)
+
+    chunks = []
+    current = []
+    current_tokens = 0
+
+    def flush():
+        nonlocal current, current_tokens
+        if current:
+            chunks.append("\n\n".join(current))
+        current = []
+        current_tokens = 0
+
+    for paragraph in paragraphs:
+        if paragraph == PAGE_SEPARATOR:
+            # 구간이 절반 이상 찼으면 페이지 경계에서 끊음
+            if current_tokens >= max_tokens // 2:
+                flush()
+            continue
+
+        tokens = estimate_tokens(paragraph)
+        if tokens > max_tokens:
+            flush()
+            chunks.extend(_split_oversized(paragraph, max_tokens))
+            continue
+
+        if current_tokens + tokens > max_tokens:
+            flush()
+        current.append(paragraph)
+        current_tokens += tokens
+        # 구간이 절반 이상 찼으면 경계 문단 뒤에서 끊음
+        if current_tokens >= max_tokens // 2 and _is_boundary(paragraph, tokens, max_tokens):
+            flush()
+
+    flush()
+    return chunks
@@ -0,0 +1,131 @@
+import os
+import threading
+
+from dotenv import load_dotenv
+
+# 환경변수 로딩
+load_dotenv()
+
+BLOB_CONN_STR = os.getenv("BLOB_CONN_STR", "")
+BLOB_CONTAINER_NAME = os.getenv("BLOB_CONTAINER_NAME", "")
+BLOB_CSV_CONTAINER_NAME = os.getenv("BLOB_CSV_CONTAINER_NAME", "")
+FORM_ENDPOINT = os.getenv("FORM_ENDPOINT", "")
+FORM_KEY = os.getenv("FORM_KEY", "")
+
+# OpenAI API 설정
+openai_api_key = os.getenv("AZURE_OPENAI_KEY")
+opeanai_endpoint = os.getenv("AZURE_OPENAI_ENDPOINT")
+openai_name = os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME")
+openai_api_version = "2024-12-01-preview"
+
+# text embedding 설정
+embedding_name = os.getenv("AZURE_EMBEDDING_DEPLOYMENT_NAME")
+
+# Azure Search AI 설정
+search_endpoint = os.getenv("AZURE_SEARCH_ENDPOINT")
+search_index_name = os.getenv("AZURE_SEARCH_INDEX_NAME")
+search_key = os.getenv("AZURE_SEARCH_KEY")
+
+# 클라이언트 하나가 유지하는 HTTP 연결 수 (분석 파이프라인의 동시 요청 수 이상)
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "20"))
+# 이 크기를 넘는 파일은 블록으로 나누어 병렬 업로드
+BLOB_BLOCK_SIZE = int(os.getenv("BLOB_BLOCK_SIZE", str(4 * 1024 * 1024)))
+
+# 프로세스 전체에서 공유하는 클라이언트 저장소
+# Streamlit 은 재실행 때 앱 스크립트만 다시 실행하고 import 된 모듈은 유지하므로
+# 여기서 만든 클라이언트(와 HTTP 연결 풀)는 모든 세션과 재실행에서 재사용됨
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def _get_or_create(name, factory):
+    client = _clients.get(name)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(name)
+            if client is None:
+                client = factory()
+                _clients[name] = client
+    return client
+
+
+# 테스트/벤치마크용으로 클라이언트를 교체하거나 초기화
+def set_client(name, client):
+    with _clients_lock:
+        _clients[name] = client
+
+
+def reset_clients():
+    with _clients_lock:
+        _clients.clear()
+
+
+# Azure SDK 용 연결 풀 (requests 세션을 재사용)
+def _pooled_transport():
+    import requests
+    from azure.core.pipeline.transport import RequestsTransport
+
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(
+        pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return RequestsTransport(session=session, session_owner=False)
+
+
+def _create_openai_client():
+    # openai 는 import 비용이 커서 처음 사용할 때 로딩
+    from openai import AzureOpenAI
+
+    return AzureOpenAI(
+        api_version=openai_api_version,
+        azure_endpoint=opeanai_endpoint,
+        api_key=openai_api_key,
+        # 재시도는 llm_gateway 에서 공유 한도에 맞춰 처리
+        max_retries=0,
+    )
+
+
+def _create_blob_service_client():
+    from azure.storage.blob import BlobServiceClient
+
+    return BlobServiceClient.from_connection_string(
+        BLOB_CONN_STR,
+        transport=_pooled_transport(),
+        max_single_put_size=BLOB_BLOCK_SIZE,
+        max_block_size=BLOB_BLOCK_SIZE,
+    )
+
+
+def _create_search_client():
+    from azure.search.documents import SearchClient
+    from azure.core.credentials import AzureKeyCredential
+
+    return SearchClient(
+        endpoint=search_endpoint,
+        index_name=search_index_name,
+        credential=AzureKeyCredential(search_key),
+        api_version="2024-03-01-Preview",
+        transport=_pooled_transport(),
+    )
+
+
+# 문서 Azure OpenAI 클라이언트
+def get_docs_client():
+    return _get_or_create("docs", _create_openai_client)
+
+
+# text embedding Azure OpenAI 클라이언트 (문서 클라이언트와 설정이 같으므로 연결 풀 공유)
+def get_embedding_client():
+    return _get_or_create("embedding", get_docs_client)
+
+
+# Azure Blob Storage 클라이언트
+def get_blob_service_client():
+    return _get_or_create("blob", _create_blob_service_client)
+
+
+# Azure Search AI 클라이언트
+def get_search_client():
+    return _get_or_create("search", _create_search_client)
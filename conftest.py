@@ -0,0 +1,23 @@
+import os
+import tempfile
+
+# 테스트 실행 중 모듈이 만드는 캐시 / 색인 파일은 임시 폴더에, Azure 설정은 더미 값으로
+# (모듈 상수가 import 시점에 환경변수를 읽으므로 테스트 모듈보다 먼저 설정)
+_workdir = tempfile.mkdtemp(prefix="docinspector-test-")
+
+for key, value in {
+    "AZURE_OPENAI_DEPLOYMENT_NAME": "test-deployment",
+    "AZURE_EMBEDDING_DEPLOYMENT_NAME": "test-embedding",
+    "ANALYSIS_CACHE_PATH": os.path.join(_workdir, "analysis_cache.sqlite3"),
+    "QUERY_CACHE_PATH": os.path.join(_workdir, "query_cache.sqlite3"),
+    "NEAR_DUPLICATE_INDEX_PATH": os.path.join(_workdir, "near_duplicates.sqlite3"),
+    "KEYWORD_INDEX_PATH": os.path.join(_workdir, "keywords.sqlite3"),
+    "JOB_QUEUE_PATH": os.path.join(_workdir, "jobs.sqlite3"),
+    "VECTOR_INDEX_DIR": os.path.join(_workdir, "vector_index"),
+    "METADATA_STORE_DIR": os.path.join(_workdir, "metadata"),
+    "LLM_RATE_LIMIT_PATH": os.path.join(_workdir, "rate_limit.sqlite3"),
+    "TRACE_LOG_PATH": os.path.join(_workdir, "traces.jsonl"),
+    "TRACE_METRICS_PATH": "",
+    "EMBEDDING_PROVIDER": "hashing",
+}.items():
+    os.environ[key] = value
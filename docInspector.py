@@ -1,70 +1,32 @@
-import os
 import streamlit as st
-from dotenv import load_dotenv
 from datetime import datetime
-from streamlit_chat import message  # streamlit-chat 라이브러리 사용
-from sklearn.metrics.pairwise import cosine_similarity
-from PyPDF2 import PdfReader
-import docx
-from urllib.parse import quote
-
-from azure.storage.blob import BlobServiceClient
-
-# openai 가져오기 (Azure OpenAI 사용하므로 해당 라이브러리 호출)
-from openai import AzureOpenAI
-
-# azure search ai
-from azure.search.documents import SearchClient
-from azure.core.credentials import AzureKeyCredential
-
-import pandas as pd
-import uuid
-from azure.storage.blob import BlobServiceClient
-
-import streamlit.components.v1 as components
 import time
+import html
+import uuid
 
-# 환경변수 로딩
-load_dotenv()
-
-BLOB_CONN_STR = os.getenv("BLOB_CONN_STR", "")
-BLOB_CONTAINER_NAME = os.getenv("BLOB_CONTAINER_NAME", "")
-BLOB_CSV_CONTAINER_NAME = os.getenv("BLOB_CSV_CONTAINER_NAME", "")
-FORM_ENDPOINT = os.getenv("FORM_ENDPOINT", "")
-FORM_KEY = os.getenv("FORM_KEY", "")
-
-# OpenAI API 설정
-openai_api_key = os.getenv("AZURE_OPENAI_KEY")
-opeanai_endpoint = os.getenv("AZURE_OPENAI_ENDPOINT")
-openai_name = os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME")
-
-# 문서 Azure OpenAI 클라이언트 설정
-docs_client = AzureOpenAI(
-    api_version="2024-12-01-preview",
-    azure_endpoint=opeanai_endpoint,
-    api_key=openai_api_key,
-)
-
-# text embedding Azure OpenAI 클라이언트 설정
-embedding_name = os.getenv("AZURE_EMBEDDING_DEPLOYMENT_NAME")
-
-embedding_client = AzureOpenAI(
-    api_version="2024-12-01-preview",
-    azure_endpoint=opeanai_endpoint,
-    api_key=openai_api_key,
+from chat_context import ChatContext
+from checklist_suggest import suggest_checklist_item
+from chunking import needs_map_reduce
+from doc_analysis import (
+    analysis_cache,
+    analysis_cache_key,
+    compare_document_sections,
+    find_near_duplicate_analysis,
+    find_similar_documents_stream,
+    query_cache,
+    similar_documents_from_graph,
+    store_near_duplicate_analysis,
 )
+from extractors import extract_content
+from ingest import IngestBuffer
+from job_queue import DONE, FAILED, JOB_POLL_SECONDS, get_job_queue
+from retrieval import get_retriever
+from llm_gateway import get_llm_gateway
+from metadata_store import get_metadata_store
+from neighbor_graph import NEIGHBOR_CLUSTER_THRESHOLD, cluster_keywords, get_neighbor_graph
+from tracing import recent_spans, span, summarize_spans, tokens_per_trace, trace
 
-# Azure Search AI 클라이언트 설정
-search_endpoint = os.getenv("AZURE_SEARCH_ENDPOINT")
-search_index_name = os.getenv("AZURE_SEARCH_INDEX_NAME")
-search_key = os.getenv("AZURE_SEARCH_KEY")
-
-search_client = SearchClient(
-    endpoint=search_endpoint,
-    index_name=search_index_name,
-    credential=AzureKeyCredential(search_key),
-    api_version="2024-03-01-Preview",
-)
+import streamlit.components.v1 as components
 
 # 페이지 설정
 st.set_page_config(page_title="DocuLens: AI 기반 문서 분석 및 유사 문서 검색 시스템", layout="wide")
@@ -137,223 +99,162 @@ def result_card(title, content, color="#ffffff"):
     )
 
 
-# 상태값 초기화
-if "feedback_list" not in st.session_state:
-    st.session_state.feedback_list = []
-if "messages" not in st.session_state:
-    st.session_state.messages = []
-if "documents" not in st.session_state:
-    st.session_state.documents = []  # 기존 문서 목록 저장용
-if "generated_checklist" not in st.session_state:
-    st.session_state.generated_checklist = []
-
-# 사이드바 메뉴
-menu = ["문서 업로드", "통합 리뷰", "문서 검색"]
-choice = st.sidebar.radio("메뉴", menu)
-
-
-# 파일 업로드 처리
-def upload_file_to_blob(uploaded_file, blob_name):
-    try:
-        blob_service_client = BlobServiceClient.from_connection_string(BLOB_CONN_STR)
-        container_client = blob_service_client.get_container_client(BLOB_CONTAINER_NAME)
-
-        container_client.upload_blob(name=blob_name, data=uploaded_file, overwrite=True)
-
-        msg = st.empty()
-        msg.success(f"'{original_filename}' 파일이 성공적으로 업로드되었습니다.")
-        time.sleep(3)
-        msg.empty()
-
-    except Exception as e:
-        st.error(f"파일 업로드 실패: {e}")
-
-
-# CSV 파일 업로드 함수
-def upload_file_to_csv(uploaded_file, blob_name):
-    try:
-        # CSV 생성 및 업로드
-        df = pd.DataFrame([row])
-        csv_bytes = df.to_csv(index=False, encoding="utf-8-sig").encode("utf-8-sig")
-
-        blob_service = BlobServiceClient.from_connection_string(BLOB_CONN_STR)
-        container = blob_service.get_container_client(BLOB_CSV_CONTAINER_NAME)
-        container.upload_blob(name=f"{document_id}.csv", data=csv_bytes, overwrite=True)
-    except Exception as e:
-        st.error(f"csv 파일 업로드 실패: {e}")
-
-
-# 문서 추출 함수 (PDF, DOCX, TXT 처리)
-def extract_pdf_content(uploaded_file):
-    reader = PdfReader(uploaded_file)
-    content = ""
-    for page in reader.pages:
-        content += page.extract_text()
-    return content
-
-
-def extract_docx_content(uploaded_file):
-    doc = docx.Document(uploaded_file)
-    content = ""
-    for para in doc.paragraphs:
-        content += para.text + "\n"
-    return content
-
-
-# 문서 요약 함수
-def gpt_summarize_document(content):
-    response = docs_client.chat.completions.create(
-        model=openai_name,
-        messages=[
-            {
-                "role": "system",
-                "content": "다음 문서를 400자 이내로 간결히 가독성 있게 요약해줘. 한국어로 요약해줘.",
-            },
-            {"role": "user", "content": content},
-        ],
-        temperature=0.5,
-        max_tokens=300,
-    )
-    summary = response.choices[0].message.content
-    return summary
-
-
-# 문서 주제 추출 함수
-def extract_topic(content):
-    response = docs_client.chat.completions.create(
-        model=openai_name,
-        messages=[
-            {
-                "role": "system",
-                "content": "이 문서의 주제를 한 단어나 짧은 문장으로 간결하게 알려줘. 한국어로 답변해줘.",
-            },
-            {"role": "user", "content": content},
-        ],
-        temperature=0.3,
-        max_tokens=100,
-    )
-    return response.choices[0].message.content.strip()
-
-
-# 키워드 추출 함수
-def extract_keywords_openai(content, num_keywords=5):
-    response = docs_client.chat.completions.create(
-        model=openai_name,
-        messages=[
-            {
-                "role": "system",
-                "content": f"다음 문서에서 가장 중요한 핵심 키워드 {num_keywords}개만 뽑아줘. 한 단어 또는 짧은 명사구 형태로 추출하고, 조사나 불필요한 단어는 제거해줘. 키워드는 쉼표로 구분해서 출력해줘.",
-            },
-            {"role": "user", "content": content},
-        ],
-        temperature=0.3,
-        max_tokens=300,
-    )
-    keywords = response.choices[0].message.content
-    return keywords
-
-
-# 키워드 파싱 함수
-def parse_keywords(gpt_output):
-    candidates = [kw.strip() for kw in gpt_output.split(",")]
-    words = []
-    for phrase in candidates:
-        words.extend(phrase.split(" "))
-    clean_words = list(set(w.lower() for w in words if w and len(w) > 1))
+# 키워드 해시태그 카드
+def keywords_card(keywords):
+    tags_html = "<div style='display: flex; flex-wrap: wrap; gap: 8px; margin-top: 10px;'>"
+    for tag in keywords:
+        tags_html += f"<span style='background-color:#e3f2fd; color: #1565c0; padding:6px 12px; border-radius:12px;'>#{tag}</span>"
+    tags_html += "</div>"
+    result_card("📌 키워드 (해시태그)", tags_html)
+
+
+# 유사 문서 목록 (제목, 유사도, 링크)
+def similar_neighbors_html(neighbors):
+    if not neighbors:
+        return "아직 유사한 문서가 없습니다."
+
+    items = ""
+    for i, neighbor in enumerate(neighbors, 1):
+        title = html.escape(neighbor.get("title") or neighbor["id"])
+        link = html.escape(neighbor.get("link") or "", quote=True)
+        title_html = f"<a href='{link}' target='_blank'>{title}</a>" if link else title
+        # 하이브리드 검색 결과는 유사도 점수 없이 순위만 표시
+        score_html = (
+            f" <span style='font-size:13px; color:gray;'>유사도 {neighbor['score']:.0%}</span>"
+            if neighbor.get("score") is not None
+            else ""
+        )
+        items += f"<div style='margin-bottom:6px;'>{i}. {title_html}{score_html}</div>"
+    return items
 
-    return clean_words  # 해시태그 붙이지 않음
 
+# 문서 검색 결과 목록 (GPT 답변 없이 검색 결과만 표시할 때)
+def search_results_markdown(results):
+    if not results:
+        return "관련 문서를 찾을 수 없습니다."
 
-# 유사 문서 검색 함수
-# Azure Search AI를 사용하여 유사 문서 검색
-def find_similar_documents(messages):
+    lines = []
+    for i, result in enumerate(results, 1):
+        title = result.title or result.id
+        lines.append(f"{i}. [{title}]({result.url})" if result.url else f"{i}. {title}")
+        if result.content:
+            lines.append(f"    {' '.join(result.content.split())[:150]}")
+    return "\n".join(lines)
 
-    # 검색을 위해 쿼리 작성
-    rag_params = {
-        "data_sources": [
-            {
-                "type": "azure_search",
-                "parameters": {
-                    "endpoint": search_endpoint,
-                    "index_name": search_index_name,
-                    "authentication": {
-                        "type": "api_key",
-                        "key": search_key,
-                    },
-                    "query_type": "vector",
-                    "embedding_dependency": {
-                        "type": "deployment_name",
-                        "deployment_name": embedding_name,
-                    },
-                },
-            }
-        ]
-    }
 
-    # Submit the chat request with RAG parameters
-    response = docs_client.chat.completions.create(
-        model=openai_name, messages=messages, extra_body=rag_params
+# 유사 문서 카드
+# response: GPT 답변 문자열 또는 로컬 벡터 인덱스 검색 결과 목록
+def similar_documents_card(response):
+    if isinstance(response, list):
+        response = similar_neighbors_html(response)
+    st.markdown(
+        f"""
+    <div style="background-color:#eef6fb; padding:22px 26px; border-left:6px solid #1f77b4; border-radius:10px; margin-bottom:30px; box-shadow:0 2px 6px rgba(0,0,0,0.06);">
+        <h4 style="margin-top:0; margin-bottom:12px;">📑 유사 문서</h4>
+        <div style="font-size:15px; line-height:1.7; white-space:pre-wrap;">{response}</div>
+    </div>
+    """,
+        unsafe_allow_html=True,
     )
 
-    completion = response.choices[0].message.content
-    return completion
 
+# 문서 분석 작업의 진행 결과
+# 작업 큐에 기록된 단계 결과와 스트리밍 중간 결과를 한 번 읽어서 표시하고 바로 끝남
+# (진행 중이면 st.fragment(run_every=...) 로 이 부분만 주기적으로 다시 실행하고,
+#  polling 중에 작업이 끝나면 앱 전체를 다시 실행해서 완료된 결과를 표시)
+def analysis_job_results(job_id, filename, polling):
+    job = get_job_queue().get(job_id)
+    if job is None:
+        st.error("문서 분석 작업을 찾을 수 없습니다.")
+        return
+    results, partials = job["results"], job["partials"]
+
+    if job["queued_ahead"]:
+        st.caption(f"⏳ 분석 대기 중입니다. (앞에 {job['queued_ahead']}건)")
+    elif polling:
+        st.caption("⏳ 문서 분석 중...")
+
+    # 업로드 알림은 작업마다 한 번만 표시
+    blob = results.get("blob")
+    notified = st.session_state.setdefault("notified_jobs", set())
+    if blob is not None and blob.ok and job_id not in notified:
+        notified.add(job_id)
+        if blob.value[1]:
+            st.toast(f"같은 내용의 파일이 이미 있어 업로드를 건너뛰었습니다. ({blob.value[0]})")
+        else:
+            st.toast(f"'{filename}' 파일이 성공적으로 업로드되었습니다.")
+    elif blob is not None and not blob.ok:
+        st.error(f"파일 업로드 실패: {blob.error}")
+
+    metadata = results.get("metadata")
+    if metadata is not None and not metadata.ok:
+        st.error(f"메타데이터 저장 실패: {metadata.error}")
+
+    checklist = results.get("checklist")
+    if checklist is not None:
+        if checklist.ok:
+            st.session_state.generated_checklist = list(checklist.value)
+        else:
+            st.error(f"체크리스트 생성 실패: {checklist.error}")
+
+    keywords = results.get("keywords")
+    if keywords is None:
+        result_card("📌 키워드 (해시태그)", "분석 중...")
+    elif keywords.ok:
+        keywords_card(keywords.value)
+    else:
+        st.error(f"키워드 추출 실패: {keywords.error}")
 
-# 체크리스트 생성 함수
-def gpt_generate_checklist(text, num_items=5):
-    prompt = f"""
-    다음 문서를 기반으로 검토자가 점검해야 할 체크리스트를 작성해줘.
-    총 {num_items}개 항목을 작성하고, 각 항목은 '을 해야 함'과 같이 검토형 문장으로 작성해줘. 
-    1. 체크리스트의 항목만 출력되도록 하고, 번호는 붙이지 말고, 각 항목은 새 줄로 구분해줘.
-    2. 각 항목은 명확하고 구체적이어야 하며, 검토자가 쉽게 이해할 수 있어야 해.
-    3. 각 항목은 문서의 주요 내용과 관련이 있어야 하며, 문서의 목적을 달성하는 데 도움이 되어야 해.
-    문서: \"\"\"{text}\"\"\"
-    """
-
-    response = docs_client.chat.completions.create(
-        model=openai_name,
-        messages=[
-            {
-                "role": "system",
-                "content": "문서 분석 전문가처럼 체크리스트를 작성해줘.",
-            },
-            {"role": "user", "content": prompt},
-        ],
-        max_tokens=500,
-        temperature=0.3,
-    )
-
-    checklist_raw = response.choices[0].message.content.strip()
-    checklist_items = [
-        item.strip("- ").strip() for item in checklist_raw.split("\n") if item.strip()
-    ]
-
-    return checklist_items
+    topic = results.get("topic")
+    if topic is None:
+        result_card("📌 문서 주제", "분석 중...")
+    elif topic.ok:
+        result_card("📌 문서 주제", topic.value)
+    else:
+        st.error(f"문서 주제 추출 실패: {topic.error}")
+
+    # 스트리밍 중인 요약 / 유사 문서 답변은 받은 데까지 표시
+    summary = results.get("summary")
+    if summary is None and "summary" in partials:
+        result_card("📌 문서 요약", partials["summary"].value + " ▌")
+    elif summary is None:
+        result_card("📌 문서 요약", "분석 중...")
+    elif summary.ok:
+        result_card("📌 문서 요약", summary.value)
+    else:
+        st.error(f"문서 요약 실패: {summary.error}")
+
+    # 유사 문서 섹션 간격 추가
+    st.markdown("<div style='margin-top:30px;'></div>", unsafe_allow_html=True)
+    similar = results.get("similar")
+    if similar is None and "similar" in partials:
+        similar_documents_card(partials["similar"].value + " ▌")
+    elif similar is None:
+        similar_documents_card("유사 문서 검색 대기 중...")
+    elif similar.ok:
+        similar_documents_card(similar.value)
+    else:
+        st.error(f"유사 문서 검색 실패: {similar.error}")
 
+    if job["status"] == FAILED:
+        st.error(f"문서 분석 실패: {job['error']}")
+    if polling and job["status"] in (DONE, FAILED):
+        st.rerun()
 
-def gpt_suggest_checklist_items(feedback, existing_checklist):
-    prompt = f"""
-    현재 체크리스트 항목은 다음과 같습니다:
-    {', '.join(existing_checklist)}
-    
-    아래 내용을 '을 해야 함'과 같이 검토형 문장으로 체크리스트 항목 하나를 추가로 작성해줘.
-    만약 기존의 체크리스트 항목과 중복되는 내용이 있다면, '없음'이라고 답변해줘.
-    
-    피드백: {feedback.strip()}
-    """
 
-    response = docs_client.chat.completions.create(
-        model=openai_name,
-        messages=[
-            {"role": "system", "content": "문서 리뷰 보조 시스템"},
-            {"role": "user", "content": prompt},
-        ],
-        max_tokens=200,
-        temperature=0.2,
-    )
+# 상태값 초기화
+if "feedback_list" not in st.session_state:
+    st.session_state.feedback_list = []
+if "messages" not in st.session_state:
+    st.session_state.messages = []
+if "documents" not in st.session_state:
+    st.session_state.documents = []  # 기존 문서 목록 저장용
+if "generated_checklist" not in st.session_state:
+    st.session_state.generated_checklist = []
 
-    suggestion = response.choices[0].message.content.strip()
-    return suggestion
+# 사이드바 메뉴
+menu = ["문서 업로드", "통합 리뷰", "문서 검색", "문서 관계", "성능"]
+choice = st.sidebar.radio("메뉴", menu)
 
 
 def circular_progress(pct: int):
@@ -452,111 +353,112 @@ if choice == "문서 업로드":
 
         original_filename = uploaded_file.name
 
-        # Azure Blob Storage 업로드
-        with st.spinner("파일 업로드 중..."):
-            upload_file_to_blob(uploaded_file, original_filename)
-
-        # 파일 내용 처리 (PDF, DOCX, TXT 등)
-        if uploaded_file.type == "application/pdf":
-            content = extract_pdf_content(uploaded_file)
-        elif (
-            uploaded_file.type
-            == "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-        ):
-            content = extract_docx_content(uploaded_file)
-        elif uploaded_file.type == "text/plain":
-            content = uploaded_file.read().decode("utf-8")
-
-        if content:
-
-            # session state 초기화
-            # 체크리스트를 session state에 보관
-            st.session_state.generated_checklist = []
-            # 피드백 내용을 session state에 보관
-            st.session_state.feedback_list = []
-
-            # GPT 분석 수행
-            with st.spinner("문서 분석 중..."):
-                topic = extract_topic(content)
-                summary = gpt_summarize_document(content)
-                keywords_raw = extract_keywords_openai(content)
-                keywords = parse_keywords(keywords_raw)
-
-                if not st.session_state.generated_checklist:
-                    checklist_items = gpt_generate_checklist(content)
-                    st.session_state.generated_checklist = checklist_items
-
-            # 결과 출력
-            st.subheader("📊 문서 분석 결과")
-            st.markdown("<hr style='margin-bottom: 2rem;'>", unsafe_allow_html=True)
-
-            # 문서 키워드
-            tags_html = "<div style='display: flex; flex-wrap: wrap; gap: 8px; margin-top: 10px;'>"
-            for tag in keywords:
-                tags_html += f"<span style='background-color:#e3f2fd; color: #1565c0; padding:6px 12px; border-radius:12px;'>#{tag}</span>"
-            tags_html += "</div>"
-            result_card("📌 키워드 (해시태그)", tags_html)
-
-            # 문서 주제
-            result_card("📌 문서 주제", topic)
-
-            # 문서 요약
-            result_card("📌 문서 요약", summary)
-
-            # 유사 문서 섹션 간격 추가
-            st.markdown("<div style='margin-top:30px;'></div>", unsafe_allow_html=True)
-
-            # 주제, 요약 키워드를 CSV로 저장
-            document_id = str(uuid.uuid4())
-            row = {
-                "id": document_id,
-                "filename": uploaded_file.name,
-                "topic": topic,
-                "summary": summary,
-                "keywords": ", ".join(keywords),  # 문자열로 저장
-                "blob_url": f"https://{BLOB_CONTAINER_NAME}.blob.core.windows.net/originals/{document_id}.pdf",
-            }
-
-            # CSV 파일 업로드
-            upload_file_to_csv(uploaded_file, document_id)
-
-            # 유사 문서 검색
-            query_text = f"""
-                            아래 내용을 바탕으로 유사한 문서를 추천해줘. 한국어로 답변해줘.
-
-                            주제: {topic}
-                            요약: {summary}
-                            키워드: {", ".join(keywords)}
-
-                            출력할 때 내용은 아래 형식에 따라 구성하고, 각 문서는 새 줄로 제목 앞에 '①'과 같이 숫자를 붙여서 구분해줘.
-
-                            제목: [문서 제목]
-                            내용: [문서 내용 요약]
-                            링크: [문서 링크]
-                            """
-
-            similar_messages = []
-            similar_messages.append(
-                {
-                    "role": "user",
-                    "content": query_text.strip(),
-                }
-            )
-
-            with st.spinner("유사 문서 검색 중..."):
-                response = find_similar_documents(similar_messages)
-
-            similar_messages.append({"role": "assistant", "content": response})
-            st.markdown(
-                f"""
-            <div style="background-color:#eef6fb; padding:22px 26px; border-left:6px solid #1f77b4; border-radius:10px; margin-bottom:30px; box-shadow:0 2px 6px rgba(0,0,0,0.06);">
-                <h4 style="margin-top:0; margin-bottom:12px;">📑 유사 문서</h4>
-                <div style="font-size:15px; line-height:1.7; white-space:pre-wrap;">{response}</div>
-            </div>
-            """,
-                unsafe_allow_html=True,
-            )
-
+        # 문서 한 건의 처리 과정을 단계별로 기록 (성능 화면에서 확인)
+        with trace("upload", filename=original_filename):
+            # 업로드 파일을 한 번만 읽어 해시를 계산하고, 업로드와 텍스트 추출이 같은 버퍼를 공유
+            with span("ingest"):
+                buffer = IngestBuffer.from_upload(uploaded_file)
+
+            # 파일 내용 처리 (PDF, DOCX, TXT 등)
+            with span("extract", content_type=buffer.content_type, size=buffer.size):
+                content = extract_content(buffer)
+
+            if content:
+
+                # session state 초기화
+                # 체크리스트를 session state에 보관
+                st.session_state.generated_checklist = []
+                # 피드백 내용을 session state에 보관
+                st.session_state.feedback_list = []
+
+                # 같은 문서(텍스트 + 프롬프트 + 모델)의 분석 결과가 캐시에 있으면 재사용
+                cache_key = analysis_cache_key(content)
+                with span("cache.analysis") as cache_span:
+                    cached = analysis_cache.get(cache_key)
+                    cache_span["cache_hit"] = cached is not None
+
+                # 내용이 거의 같은 문서(파일명만 다르거나 일부만 수정된 문서)가 이미 분석되었으면 그 결과를 재사용
+                # 처음 찾았을 때 이 문서의 분석 결과로 저장하므로 다시 실행될 때는 위의 분석 캐시에서 찾음
+                duplicate = None
+                if cached is None:
+                    with span("near_duplicate") as duplicate_span:
+                        duplicate, reused = find_near_duplicate_analysis(content, cache_key)
+                        duplicate_span["cache_hit"] = duplicate is not None
+
+                    if duplicate is not None:
+                        cached = reused
+                        try:
+                            (blob_name, existing), cached = store_near_duplicate_analysis(
+                                buffer, content, cache_key, str(uuid.uuid4()), original_filename, reused
+                            )
+                            if existing:
+                                st.toast(f"같은 내용의 파일이 이미 있어 업로드를 건너뛰었습니다. ({blob_name})")
+                            else:
+                                st.toast(f"'{original_filename}' 파일이 성공적으로 업로드되었습니다.")
+                        except Exception as e:
+                            st.error(f"파일 업로드 실패: {e}")
+
+                # 결과 출력
+                st.subheader("📊 문서 분석 결과")
+                st.markdown("<hr style='margin-bottom: 2rem;'>", unsafe_allow_html=True)
+
+                # 이 세션에서 문서별로 표시 중인 분석 작업
+                analysis_jobs = st.session_state.setdefault("analysis_jobs", {})
+
+                if cached is None:
+                    job_queue = get_job_queue()
+                    job = job_queue.get(analysis_jobs[cache_key]) if cache_key in analysis_jobs else None
+
+                    if job is None:
+                        if needs_map_reduce(content):
+                            # 같은 파일명으로 올린 수정본이면 바뀐 구간만 다시 요약
+                            revision = compare_document_sections(original_filename, content)
+                            if revision is not None:
+                                st.caption(
+                                    f"✏️ 이전 버전과 비교해 바뀐 구간 {revision['changed']}/{revision['total']}개만 "
+                                    "다시 요약하고 나머지는 이전 요약을 재사용합니다."
+                                )
+                            else:
+                                st.caption("📚 긴 문서입니다. 구간별로 나누어 요약한 뒤 분석합니다.")
+
+                        # 분석은 작업 큐에서 실행하고 화면은 진행 결과만 읽어서 표시
+                        # (다시 실행되거나 같은 문서를 다른 사용자가 올려도 진행 중인 작업을 이어서 받음)
+                        job_id, created = job_queue.submit(cache_key, buffer, content, original_filename)
+                        if not created:
+                            st.caption("⏳ 같은 문서의 분석이 이미 진행 중입니다. 진행 중인 결과를 이어서 표시합니다.")
+                        analysis_jobs[cache_key] = job_id
+                        job = job_queue.get(job_id)
+
+                    # 진행 중인 작업은 결과 영역만 주기적으로 갱신하고 스크립트는 바로 끝냄
+                    polling = job["status"] not in (DONE, FAILED)
+                    st.fragment(analysis_job_results, run_every=JOB_POLL_SECONDS if polling else None)(
+                        job["id"], original_filename, polling
+                    )
+                    if not polling:
+                        # 끝난 작업은 한 번만 표시하고, 캐시에 저장되지 않았으면 다음 실행에서 다시 분석
+                        analysis_jobs.pop(cache_key, None)
+                else:
+                    analysis_jobs.pop(cache_key, None)
+                    if duplicate is not None:
+                        st.caption(
+                            f"♻️ 내용이 거의 같은 문서 [{duplicate['filename']}]({duplicate['link']})의 분석 결과를 "
+                            f"재사용했습니다. (유사도 {duplicate['similarity'] * 100:.1f}%)"
+                        )
+                        if duplicate["diff"]:
+                            with st.expander("원본 문서와 다른 부분"):
+                                st.code("\n".join(duplicate["diff"]), language="diff")
+
+                    st.session_state.generated_checklist = list(cached["checklist"])
+                    keywords_card(cached["keywords"])
+                    result_card("📌 문서 주제", cached["topic"])
+                    result_card("📌 문서 요약", cached["summary"])
+
+                    # 유사 문서 섹션 간격 추가
+                    st.markdown("<div style='margin-top:30px;'></div>", unsafe_allow_html=True)
+                    # 분석 이후에 추가된 문서까지 반영된 이웃 그래프의 결과를 우선 표시
+                    similar_documents_card(
+                        similar_documents_from_graph(buffer.sha256) or cached["similar"]
+                    )
 
 elif choice == "통합 리뷰":
     st.header("📋 통합 리뷰 대시보드")
@@ -621,13 +523,9 @@ elif choice == "통합 리뷰":
                             "text": fb,
                         }
                     )
-                    suggestion = gpt_suggest_checklist_items(
-                        fb, st.session_state.generated_checklist
-                    )
-                    if (
-                        suggestion.lower() != "없음"
-                        and suggestion not in st.session_state.generated_checklist
-                    ):
+                    # 기존 항목과 거의 같은 피드백은 GPT 호출 없이 건너뛰고, 제안된 항목도 중복이면 추가하지 않음
+                    suggestion = suggest_checklist_item(fb, st.session_state.generated_checklist)
+                    if suggestion is not None:
                         st.session_state.generated_checklist.append(suggestion)
                     st.rerun()
                 else:
@@ -662,6 +560,19 @@ elif choice == "문서 검색":
                 "content": "당신은 문서 검색을 도와주는 AI 어시스턴트입니다. 사용자가 질문을 입력하면 관련 문서를 찾아 답변해 주세요. 만약 관련 문서가 없다면, '관련 문서를 찾을 수 없습니다.'라고 답변하세요. 문서가 있다면, 꼭 문서 링크를 포함해서 답변해 주세요.",
             },
         ]
+    # 긴 대화는 토큰 예산 안에서 최근 대화만 보내고 오래된 대화는 요약해서 보냄
+    if "chat_context" not in st.session_state:
+        st.session_state.chat_context = ChatContext()
+
+    query_cache_stats = query_cache.stats()
+    if query_cache_stats["hits"] + query_cache_stats["misses"]:
+        st.sidebar.caption(
+            f"질문 캐시 적중률 {query_cache_stats['hit_rate']:.0%} · "
+            f"절약한 응답 시간 {query_cache_stats['saved_seconds']:.0f}초"
+        )
+
+    # 끄면 GPT 답변 없이 검색 서비스의 결과 목록만 바로 표시
+    generate_answer = st.toggle("GPT 답변 생성", value=True)
 
     for message in st.session_state.messages:
         st.chat_message(message["role"]).write(message["content"])
@@ -671,8 +582,113 @@ elif choice == "문서 검색":
         st.session_state.messages.append({"role": "user", "content": user_input})
         st.chat_message("user").write(user_input)
 
-        with st.spinner("응답을 기다리는 중..."):
-            response = find_similar_documents(st.session_state.messages)
+        # 이전 대화 없이 묻는 질문은 비슷한 질문의 답변을 재사용
+        standalone = not any(m["role"] == "assistant" for m in st.session_state.messages)
+
+        with st.chat_message("assistant"):
+            sources = []
+            cached = None
+            if generate_answer and standalone:
+                cached, question_vector = query_cache.lookup(user_input)
+
+            if not generate_answer:
+                response = search_results_markdown(get_retriever().search(user_input))
+                st.markdown(response)
+            elif cached is not None:
+                response = cached["answer"]
+                sources = cached["sources"]
+                st.write(response)
+                st.caption(f"♻️ 비슷한 질문의 답변을 재사용했습니다. (유사도 {cached['score']:.2f})")
+            else:
+                # 답변이 생성되는 대로 표시
+                started = time.perf_counter()
+                window = st.session_state.chat_context.window(st.session_state.messages)
+                response = st.write_stream(find_similar_documents_stream(window, sources))
+                if standalone:
+                    query_cache.store(
+                        user_input, question_vector, response, sources, time.perf_counter() - started
+                    )
+
+            if sources:
+                st.caption(
+                    "출처: " + " · ".join(f"[{source['title']}]({source['url']})" for source in sources)
+                )
 
         st.session_state.messages.append({"role": "assistant", "content": response})
-        st.chat_message("assistant").write(response)
+
+elif choice == "문서 관계":
+    st.header("🗺️ 문서 관계")
+    st.caption("분석한 문서마다 미리 계산해 둔 유사 문서와, 서로 가까운 문서끼리 묶은 주제 군집을 보여줍니다.")
+
+    graph = get_neighbor_graph()
+    with st.spinner("이웃 그래프 갱신 중..."):
+        graph.sync()
+    neighbors, _, records = graph.load()
+
+    if not len(neighbors):
+        st.info("아직 분석한 문서가 없습니다. 문서를 업로드하면 유사 문서 관계가 계산됩니다.")
+    else:
+        threshold = st.slider(
+            "군집 유사도 기준", min_value=0.5, max_value=0.99, value=NEIGHBOR_CLUSTER_THRESHOLD, step=0.01
+        )
+        clusters = graph.clusters(threshold)
+        metadata = get_metadata_store().load_all()
+
+        col1, col2, col3 = st.columns(3)
+        col1.metric("문서 수", len(neighbors))
+        col2.metric("주제 군집 수", len(clusters))
+        col3.metric("군집에 속한 문서", sum(cluster["size"] for cluster in clusters))
+
+        st.subheader("주제 군집")
+        if not clusters:
+            st.caption("기준 이상으로 서로 가까운 문서가 없습니다. 유사도 기준을 낮춰 보세요.")
+        for cluster in clusters[:50]:
+            keywords = cluster_keywords(cluster["documents"], metadata)
+            with st.expander(f"🗂️ {', '.join(keywords) or '주제 군집'} ({cluster['size']}건)"):
+                st.markdown(similar_neighbors_html(cluster["documents"]), unsafe_allow_html=True)
+
+        st.subheader("문서별 유사 문서")
+        titles = {record["id"]: record.get("title") or record["id"] for record in records[: len(neighbors)]}
+        selected = st.selectbox("문서 선택", list(titles), format_func=titles.get)
+        similar_documents_card(graph.neighbors(selected))
+
+elif choice == "성능":
+    st.header("⏱️ 성능 모니터링")
+    st.caption("최근 문서 처리 기록을 바탕으로 단계별 실행 시간과 토큰 사용량을 보여줍니다.")
+
+    spans = recent_spans()
+    if not spans:
+        st.info("아직 기록이 없습니다. 문서를 업로드하면 단계별 실행 시간이 기록됩니다.")
+    else:
+        document_tokens = list(tokens_per_trace(spans).values())
+        sorted_tokens = sorted(document_tokens)
+        gateway_stats = get_llm_gateway().stats()
+
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("분석한 문서 수", len(document_tokens))
+        col2.metric(
+            "문서당 평균 토큰",
+            f"{sum(document_tokens) / len(document_tokens):,.0f}" if document_tokens else "-",
+        )
+        col3.metric(
+            "문서당 p95 토큰",
+            f"{sorted_tokens[int(0.95 * (len(sorted_tokens) - 1))]:,}" if sorted_tokens else "-",
+        )
+        col4.metric("OpenAI 재시도 (429)", f"{gateway_stats['retries']} ({gateway_stats['throttled']})")
+
+        st.subheader("단계별 실행 시간")
+        st.dataframe(summarize_spans(spans), hide_index=True)
+
+        # GPT 호출을 라우팅한 모델 등급(deployment)별로 묶어서 응답 시간 비교
+        tier_spans = [
+            dict(record, name=f"{record['tier']} ({record['model']})")
+            for record in spans
+            if record.get("tier")
+        ]
+        if tier_spans:
+            st.subheader("모델 등급별 응답 시간")
+            st.dataframe(summarize_spans(tier_spans), hide_index=True)
+
+        if document_tokens:
+            st.subheader("문서별 토큰 사용량")
+            st.bar_chart(document_tokens)
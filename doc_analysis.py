@@ -0,0 +1,759 @@
+import os
+import re
+import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from analysis_cache import AnalysisCache, make_cache_key, make_prompt_version
+from analysis_pipeline import Stage
+from chunking import needs_map_reduce, split_into_chunks
+from clients import (
+    embedding_name,
+    search_endpoint,
+    search_index_name,
+    search_key,
+)
+from llm_gateway import get_llm_gateway
+from keyword_index import get_keyword_index, tokenize
+from metadata_store import get_metadata_store
+from model_router import route_task, routing_version
+from neighbor_graph import get_neighbor_graph
+from near_duplicates import NearDuplicateIndex
+from query_cache import SemanticQueryCache
+from retrieval import add_retrieval_document, get_retriever
+from storage import blob_url, build_metadata_row, upload_file_to_blob
+from tracing import copy_context, record_span, span
+from vector_index import get_vector_index
+
+# 업로드 화면의 유사 문서 검색 방식
+# local: 로컬 벡터 인덱스 (구조화된 결과, 수 ms)
+# search: Azure AI Search 하이브리드 검색 (구조화된 결과, GPT 호출 없음) / rag: Azure Search + GPT 답변
+SIMILAR_DOCUMENTS_MODE = os.getenv("SIMILAR_DOCUMENTS_MODE", "local")
+SIMILAR_DOCUMENTS_TOP_K = int(os.getenv("SIMILAR_DOCUMENTS_TOP_K", "5"))
+
+# 키워드 추출 방식
+# local: 분석한 문서 전체의 단어 빈도로 BM25 가중치가 큰 단어 선택 (GPT 호출 없음, 수 ms) / llm: GPT 로 추출
+KEYWORD_EXTRACTION_MODE = os.getenv("KEYWORD_EXTRACTION_MODE", "local")
+
+# 분석 프롬프트
+SUMMARY_PROMPT = "다음 문서를 400자 이내로 간결히 가독성 있게 요약해줘. 한국어로 요약해줘."
+TOPIC_PROMPT = "이 문서의 주제를 한 단어나 짧은 문장으로 간결하게 알려줘. 한국어로 답변해줘."
+KEYWORDS_PROMPT = "다음 문서에서 가장 중요한 핵심 키워드 {num_keywords}개만 뽑아줘. 한 단어 또는 짧은 명사구 형태로 추출하고, 조사나 불필요한 단어는 제거해줘. 키워드는 쉼표로 구분해서 출력해줘."
+CHECKLIST_SYSTEM_PROMPT = "문서 분석 전문가처럼 체크리스트를 작성해줘."
+CHECKLIST_PROMPT = """
+    다음 문서를 기반으로 검토자가 점검해야 할 체크리스트를 작성해줘.
+    총 {num_items}개 항목을 작성하고, 각 항목은 '을 해야 함'과 같이 검토형 문장으로 작성해줘. 
+    1. 체크리스트의 항목만 출력되도록 하고, 번호는 붙이지 말고, 각 항목은 새 줄로 구분해줘.
+    2. 각 항목은 명확하고 구체적이어야 하며, 검토자가 쉽게 이해할 수 있어야 해.
+    3. 각 항목은 문서의 주요 내용과 관련이 있어야 하며, 문서의 목적을 달성하는 데 도움이 되어야 해.
+    문서: \"\"\"{text}\"\"\"
+    """
+CHUNK_SUMMARY_PROMPT = "다음은 긴 문서의 일부야. 나중에 전체 문서의 주제, 요약, 키워드, 체크리스트를 만들 수 있도록 이 부분의 핵심 내용, 주요 용어, 검토가 필요한 사항을 빠짐없이 간결하게 한국어로 정리해줘."
+CHAT_SUMMARY_PROMPT = "다음은 문서 검색 대화의 이전 요약과 그 뒤에 이어진 대화야. 사용자가 찾던 문서와 조건, 답변에서 언급된 문서 제목과 링크를 빠짐없이 포함해서 대화 전체를 간결하게 한국어로 다시 요약해줘."
+SIMILAR_QUERY_PROMPT = """
+                            아래 내용을 바탕으로 유사한 문서를 추천해줘. 한국어로 답변해줘.
+
+                            주제: {topic}
+                            요약: {summary}
+                            키워드: {keywords}
+
+                            출력할 때 내용은 아래 형식에 따라 구성하고, 각 문서는 새 줄로 제목 앞에 '①'과 같이 숫자를 붙여서 구분해줘.
+
+                            제목: [문서 제목]
+                            내용: [문서 내용 요약]
+                            링크: [문서 링크]
+                            """
+
+# 프롬프트가 바뀌면 캐시 키도 바뀌도록 프롬프트 버전 생성
+ANALYSIS_PROMPT_VERSION = make_prompt_version(
+    SUMMARY_PROMPT,
+    TOPIC_PROMPT,
+    KEYWORDS_PROMPT,
+    CHECKLIST_SYSTEM_PROMPT,
+    CHECKLIST_PROMPT,
+    CHUNK_SUMMARY_PROMPT,
+    SIMILAR_QUERY_PROMPT,
+)
+CHUNK_PROMPT_VERSION = make_prompt_version(CHUNK_SUMMARY_PROMPT)
+
+# 문서 분석 결과 캐시 (SQLite 기반, 워커 프로세스 간 공유)
+analysis_cache = AnalysisCache()
+# 긴 문서의 구간별 요약 캐시
+chunk_cache = AnalysisCache(namespace="chunk", max_entries=20000)
+# 긴 문서의 구간 지문 (파일명별 마지막 버전, 같은 이름으로 올린 수정본과 비교)
+section_cache = AnalysisCache(namespace="sections", max_entries=5000)
+# 문서 검색 질문 캐시 (비슷한 질문의 답변 재사용)
+query_cache = SemanticQueryCache()
+# 거의 같은 문서 인덱스 (분석이 끝난 문서를 찾아 분석 결과 재사용)
+near_duplicate_index = NearDuplicateIndex()
+
+
+# 프로세스 전체 토큰 사용량 (일괄 처리 통계용)
+_token_usage = {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+_token_usage_lock = threading.Lock()
+
+
+def get_token_usage():
+    with _token_usage_lock:
+        return dict(_token_usage)
+
+
+def _add_token_usage(usage):
+    if usage is None:
+        return
+    with _token_usage_lock:
+        for key in _token_usage:
+            _token_usage[key] += getattr(usage, key, 0) or 0
+
+
+# 최근 GPT 호출의 응답 시간 (ttft: 첫 토큰까지 걸린 시간, total: 전체 시간, 초 단위)
+# 스트리밍하지 않는 호출은 응답 전체가 한 번에 오므로 ttft 와 total 이 같음
+# tier / model: 라우팅한 모델 등급과 deployment
+_call_latency = deque(maxlen=500)
+_call_latency_lock = threading.Lock()
+
+
+def get_call_latency():
+    with _call_latency_lock:
+        return list(_call_latency)
+
+
+# GPT 호출 한 건의 응답 시간과 토큰 사용량 기록 (성능 추적 기록에도 llm.<이름> 으로 저장)
+# 라우팅 결정(등급, deployment, 출력 예산, 입력 토큰 수, 등급 상향 여부)도 함께 기록
+def _record_call(call_name, started, first_token_at, stream, usage, route=None):
+    finished = time.perf_counter()
+    latency = {
+        "name": call_name,
+        "stream": stream,
+        "ttft": (first_token_at or finished) - started,
+        "total": finished - started,
+        "tier": route.tier if route else None,
+        "model": route.model if route else None,
+    }
+    with _call_latency_lock:
+        _call_latency.append(latency)
+    _add_token_usage(usage)
+
+    tokens = {key: getattr(usage, key, 0) or 0 for key in _token_usage} if usage is not None else {}
+    routing = {}
+    if route is not None:
+        routing = {
+            "tier": route.tier,
+            "model": route.model,
+            "max_tokens": route.max_tokens,
+            "input_tokens": route.input_tokens,
+            "escalated": route.escalated,
+        }
+    record_span(
+        f"llm.{call_name}", latency["total"], ttft=latency["ttft"], stream=stream, **tokens, **routing
+    )
+
+
+# 라우팅 결과의 deployment 와 출력 토큰 예산을 요청에 반영
+def _apply_route(route, kwargs):
+    if route is not None:
+        kwargs["model"] = route.model
+        if route.max_tokens is not None:
+            kwargs["max_tokens"] = route.max_tokens
+    return kwargs
+
+
+# 채팅 완성 요청 (모든 GPT 호출이 게이트웨이를 거쳐 가며 토큰 사용량과 응답 시간을 기록)
+# route: route_task 결과 (작업에 맞는 deployment 와 출력 토큰 예산)
+def _chat_completion(call_name="chat", route=None, **kwargs):
+    started = time.perf_counter()
+    response = get_llm_gateway().chat_completion(**_apply_route(route, kwargs))
+    _record_call(call_name, started, None, False, getattr(response, "usage", None), route)
+    return response
+
+
+# 스트리밍 채팅 완성 요청 (응답 텍스트 조각을 도착하는 대로 yield)
+# sources 목록을 넘기면 Azure Search 답변의 인용 문서(citations)를 추가
+def _stream_chat_completion(call_name="chat", sources=None, route=None, **kwargs):
+    _apply_route(route, kwargs)
+    started = time.perf_counter()
+    first_token_at = None
+    usage = None
+    for chunk in get_llm_gateway().chat_completion(stream=True, **kwargs):
+        usage = getattr(chunk, "usage", None) or usage
+        # Azure 는 콘텐츠 필터 결과만 담긴 빈 chunk 를 먼저 보내기도 함
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta
+        if sources is not None:
+            sources.extend(_citations(getattr(delta, "context", None)))
+        piece = delta.content
+        if piece:
+            if first_token_at is None:
+                first_token_at = time.perf_counter()
+            yield piece
+    _record_call(call_name, started, first_token_at, True, usage, route)
+
+
+def _summary_request(content):
+    return dict(
+        route=route_task("summary", content),
+        messages=[
+            {
+                "role": "system",
+                "content": SUMMARY_PROMPT,
+            },
+            {"role": "user", "content": content},
+        ],
+        temperature=0.5,
+    )
+
+
+# 문서 요약 함수
+def gpt_summarize_document(content):
+    response = _chat_completion("summary", **_summary_request(content))
+    summary = response.choices[0].message.content
+    return summary
+
+
+# 문서 요약 스트리밍 (요약 카드에 생성되는 대로 표시)
+def gpt_summarize_document_stream(content):
+    yield from _stream_chat_completion(
+        "summary", stream_options={"include_usage": True}, **_summary_request(content)
+    )
+
+
+# 문서 구간 요약 함수 (긴 문서 map 단계)
+def gpt_summarize_chunk(chunk):
+    response = _chat_completion(
+        "chunk_summary",
+        route=route_task("chunk_summary", chunk),
+        messages=[
+            {
+                "role": "system",
+                "content": CHUNK_SUMMARY_PROMPT,
+            },
+            {"role": "user", "content": chunk},
+        ],
+        temperature=0.3,
+    )
+    return response.choices[0].message.content.strip()
+
+
+# 구간 요약 캐시 키 (구간 지문으로도 사용)
+def chunk_cache_key(chunk):
+    return make_cache_key(chunk, CHUNK_PROMPT_VERSION, routing_version("chunk_summary"))
+
+
+# 구간 요약 캐시 조회 후 없으면 요약
+def summarize_chunk_cached(chunk):
+    cache_key = chunk_cache_key(chunk)
+    with span("cache.chunk") as cache_span:
+        cached = chunk_cache.get(cache_key)
+        cache_span["cache_hit"] = cached is not None
+    if cached is not None:
+        return cached["summary"]
+
+    summary = gpt_summarize_chunk(chunk)
+    chunk_cache.set(cache_key, {"summary": summary})
+    return summary
+
+
+# 분석에 사용할 본문 준비 함수
+# 토큰 예산 이내면 원문 그대로, 넘으면 구간별 요약을 병렬로 만든 뒤 합쳐서 사용
+def prepare_analysis_content(content, max_workers=4):
+    while needs_map_reduce(content):
+        chunks = split_into_chunks(content)
+        if len(chunks) <= 1:
+            break
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # 구간 요약도 호출한 쪽의 trace 안에서 기록 (스레드마다 실행 컨텍스트 복사)
+            contexts = [copy_context() for _ in chunks]
+            summaries = list(
+                executor.map(
+                    lambda context, chunk: context.run(summarize_chunk_cached, chunk),
+                    contexts,
+                    chunks,
+                )
+            )
+
+        content = "\n\n".join(
+            f"[부분 {i}/{len(summaries)}]\n{summary}" for i, summary in enumerate(summaries, 1)
+        )
+    return content
+
+
+# 긴 문서의 구간 지문 저장 (다음 수정본과 비교할 때 사용)
+def record_document_sections(filename, content):
+    if needs_map_reduce(content):
+        sections = [chunk_cache_key(chunk) for chunk in split_into_chunks(content)]
+        section_cache.set(filename, {"sections": sections})
+
+
+# 같은 파일명의 이전 버전과 구간 비교: {"changed": 바뀐 구간 수, "total": 전체 구간 수}
+# 짧은 문서이거나 이전 버전이 없으면 None (바뀌지 않은 구간은 구간 요약 캐시를 재사용)
+def compare_document_sections(filename, content):
+    if not needs_map_reduce(content):
+        return None
+    previous = section_cache.get(filename)
+    if previous is None:
+        return None
+    previous_sections = set(previous["sections"])
+    sections = [chunk_cache_key(chunk) for chunk in split_into_chunks(content)]
+    changed = sum(1 for section in sections if section not in previous_sections)
+    return {"changed": changed, "total": len(sections)}
+
+
+# 문서 주제 추출 함수
+def extract_topic(content):
+    response = _chat_completion(
+        "topic",
+        route=route_task("topic", content),
+        messages=[
+            {
+                "role": "system",
+                "content": TOPIC_PROMPT,
+            },
+            {"role": "user", "content": content},
+        ],
+        temperature=0.3,
+    )
+    return response.choices[0].message.content.strip()
+
+
+# 키워드 추출 함수
+def extract_keywords_openai(content, num_keywords=5):
+    response = _chat_completion(
+        "keywords",
+        route=route_task("keywords", content, scale=num_keywords),
+        messages=[
+            {
+                "role": "system",
+                "content": KEYWORDS_PROMPT.format(num_keywords=num_keywords),
+            },
+            {"role": "user", "content": content},
+        ],
+        temperature=0.3,
+    )
+    keywords = response.choices[0].message.content
+    return keywords
+
+
+# 키워드 파싱 함수 (GPT 가 답한 순서 유지)
+def parse_keywords(gpt_output):
+    words = gpt_output.replace(",", " ").lower().split()
+    clean_words = list(dict.fromkeys(w for w in words if len(w) > 1))
+
+    return clean_words  # 해시태그 붙이지 않음
+
+
+# 로컬 키워드 추출 (문서를 키워드 색인에 반영하고 BM25 가중치가 큰 단어 반환)
+# document_id 는 같은 문서를 다시 분석해도 단어 빈도를 한 번만 세도록 내용 해시 사용
+def extract_keywords_local(content, document_id, num_keywords=5):
+    return get_keyword_index().extract(document_id, content, num_keywords)
+
+
+# 유사 문서 검색 요청 구성
+# Azure Search AI를 사용하여 유사 문서 검색
+def _rag_request(messages):
+
+    # 검색을 위해 쿼리 작성
+    rag_params = {
+        "data_sources": [
+            {
+                "type": "azure_search",
+                "parameters": {
+                    "endpoint": search_endpoint,
+                    "index_name": search_index_name,
+                    "authentication": {
+                        "type": "api_key",
+                        "key": search_key,
+                    },
+                    "query_type": "vector",
+                    "embedding_dependency": {
+                        "type": "deployment_name",
+                        "deployment_name": embedding_name,
+                    },
+                },
+            }
+        ]
+    }
+
+    # Submit the chat request with RAG parameters
+    return dict(route=route_task("similar", messages), messages=messages, extra_body=rag_params)
+
+
+# Azure Search 답변의 인용 문서 (제목, 링크)
+def _citations(context):
+    if not isinstance(context, dict):
+        return []
+    return [
+        {
+            "title": citation.get("title") or citation.get("filepath") or "",
+            "url": citation.get("url") or "",
+        }
+        for citation in context.get("citations") or []
+    ]
+
+
+# 유사 문서 검색 함수
+def find_similar_documents(messages):
+    response = _chat_completion("similar", **_rag_request(messages))
+
+    completion = response.choices[0].message.content
+    return completion
+
+
+# 유사 문서 검색 스트리밍 (긴 RAG 답변을 생성되는 대로 표시)
+def find_similar_documents_stream(messages, sources=None):
+    yield from _stream_chat_completion("similar", sources=sources, **_rag_request(messages))
+
+
+def _similar_query_messages(topic, summary, keywords):
+    query_text = SIMILAR_QUERY_PROMPT.format(
+        topic=topic, summary=summary, keywords=", ".join(keywords)
+    )
+    return [{"role": "user", "content": query_text.strip()}]
+
+
+# 분석 결과(주제, 요약, 키워드)를 바탕으로 유사 문서 검색
+def find_similar_documents_for_analysis(topic, summary, keywords):
+    return find_similar_documents(_similar_query_messages(topic, summary, keywords))
+
+
+def find_similar_documents_for_analysis_stream(topic, summary, keywords):
+    yield from find_similar_documents_stream(_similar_query_messages(topic, summary, keywords))
+
+
+# 로컬 벡터 인덱스에 저장할 문서 정보 (id 는 내용 해시)
+def similar_document(buffer, document_id, filename, blob_name):
+    return {
+        "id": buffer.sha256,
+        "document_id": document_id,
+        "title": filename,
+        "link": blob_url(blob_name),
+    }
+
+
+# 유사도 계산에 사용할 문서 표현 (주제 + 요약 + 키워드)
+def build_similarity_text(topic, summary, keywords):
+    return f"주제: {topic}\n요약: {summary}\n키워드: {', '.join(keywords)}"
+
+
+# 현재 문서를 로컬 벡터 인덱스에 추가하고 이웃 그래프에서 유사 문서 조회
+# document: 인덱스에 저장할 정보 (id 는 내용 해시, title, link 등)
+def find_similar_documents_local(document, topic, summary, keywords, k=SIMILAR_DOCUMENTS_TOP_K):
+    # 이미 추가된 문서는 인덱스가 파일 잠금 안에서 확인해서 건너뜀
+    get_vector_index().add([document], texts=[build_similarity_text(topic, summary, keywords)])
+
+    # 새 문서를 이웃 그래프에 반영 (기존 문서의 이웃 목록도 함께 갱신)
+    graph = get_neighbor_graph()
+    graph.sync()
+    return graph.neighbors(document["id"], k=k)
+
+
+# 이미 분석한 문서의 현재 유사 문서 (이후에 추가된 문서까지 반영된 이웃 그래프에서 읽음)
+# local 방식이 아니거나 그래프에 없는 문서는 None
+def similar_documents_from_graph(document_id, k=SIMILAR_DOCUMENTS_TOP_K):
+    if SIMILAR_DOCUMENTS_MODE != "local":
+        return None
+    return get_neighbor_graph().neighbors(document_id, k=k) or None
+
+
+# 문서 검색 대화 요약 함수 (오래된 대화를 이전 요약에 합쳐서 다시 요약)
+def gpt_summarize_conversation(previous_summary, messages, max_tokens=300):
+    conversation = "\n".join(f"{message['role']}: {message['content']}" for message in messages)
+    if previous_summary:
+        conversation = f"[이전 요약]\n{previous_summary}\n\n[이어진 대화]\n{conversation}"
+
+    response = _chat_completion(
+        "chat_summary",
+        route=route_task("chat_summary", conversation, limit=max_tokens),
+        messages=[
+            {"role": "system", "content": CHAT_SUMMARY_PROMPT},
+            {"role": "user", "content": conversation},
+        ],
+        temperature=0.3,
+    )
+    return response.choices[0].message.content.strip()
+
+
+# 검색 서비스에서 직접 유사 문서 검색 (키워드: 주제 + 키워드, 벡터: 주제 + 요약 + 키워드)
+def find_similar_documents_search(
+    topic, summary, keywords, k=SIMILAR_DOCUMENTS_TOP_K, exclude_id=None
+):
+    results = get_retriever().search(
+        " ".join([topic, *keywords]),
+        k=k + 1,
+        vector_text=build_similarity_text(topic, summary, keywords),
+    )
+    return [result.to_dict() for result in results if result.id != exclude_id][:k]
+
+
+# 체크리스트 생성 함수
+def gpt_generate_checklist(text, num_items=5):
+    prompt = CHECKLIST_PROMPT.format(num_items=num_items, text=text)
+
+    response = _chat_completion(
+        "checklist",
+        route=route_task("checklist", text, scale=num_items),
+        messages=[
+            {
+                "role": "system",
+                "content": CHECKLIST_SYSTEM_PROMPT,
+            },
+            {"role": "user", "content": prompt},
+        ],
+        temperature=0.3,
+    )
+
+    checklist_raw = response.choices[0].message.content.strip()
+    checklist_items = [
+        item.strip("- ").strip() for item in checklist_raw.split("\n") if item.strip()
+    ]
+
+    return checklist_items
+
+
+def gpt_suggest_checklist_items(feedback, existing_checklist):
+    prompt = f"""
+    현재 체크리스트 항목은 다음과 같습니다:
+    {', '.join(existing_checklist)}
+    
+    아래 내용을 '을 해야 함'과 같이 검토형 문장으로 체크리스트 항목 하나를 추가로 작성해줘.
+    만약 기존의 체크리스트 항목과 중복되는 내용이 있다면, '없음'이라고 답변해줘.
+    
+    피드백: {feedback.strip()}
+    """
+
+    response = _chat_completion(
+        "checklist_suggest",
+        route=route_task("checklist_suggest", prompt),
+        messages=[
+            {"role": "system", "content": "문서 리뷰 보조 시스템"},
+            {"role": "user", "content": prompt},
+        ],
+        temperature=0.2,
+    )
+
+    suggestion = response.choices[0].message.content.strip()
+    return suggestion
+
+
+# 여러 피드백의 체크리스트 항목을 한 번에 제안 (requests: (피드백, 기존 체크리스트) 목록)
+# 피드백 순서대로 항목 또는 '없음' 목록 반환, 같은 체크리스트는 프롬프트에 한 번만 포함
+def gpt_suggest_checklist_items_batch(requests):
+    checklists = {}
+    lines = []
+    for number, (feedback, existing_checklist) in enumerate(requests, 1):
+        key = tuple(existing_checklist)
+        if key not in checklists:
+            checklists[key] = len(checklists) + 1
+            lines.append(f"[체크리스트 {checklists[key]}] {', '.join(existing_checklist)}")
+        lines.append(f"[피드백 {number}] (체크리스트 {checklists[key]}) {feedback.strip()}")
+
+    items = "\n".join(lines)
+    prompt = f"""
+    아래 각 피드백마다 '을 해야 함'과 같이 검토형 문장으로 체크리스트 항목 하나를 작성해줘.
+    피드백이 괄호 안에 적힌 체크리스트의 기존 항목과 중복되는 내용이라면, '없음'이라고 답변해줘.
+    답변은 피드백 번호 순서대로 한 줄에 하나씩 '번호. 항목' 형식으로 작성해줘.
+    
+    {items}
+    """
+
+    response = _chat_completion(
+        "checklist_suggest",
+        route=route_task("checklist_suggest", prompt, scale=len(requests)),
+        messages=[
+            {"role": "system", "content": "문서 리뷰 보조 시스템"},
+            {"role": "user", "content": prompt},
+        ],
+        temperature=0.2,
+    )
+
+    answers = {}
+    for line in response.choices[0].message.content.splitlines():
+        match = re.match(r"\s*(\d+)\s*[.):]\s*(.+)", line)
+        if match:
+            answers[int(match.group(1))] = match.group(2).strip()
+    # 답변이 빠진 피드백은 추가할 항목이 없는 것으로 처리
+    return [answers.get(number, "없음") for number in range(1, len(requests) + 1)]
+
+
+# 분석 결과 캐시 키 (추출 텍스트 + 프롬프트 버전 + 유사 문서 검색 / 키워드 추출 방식 + 작업별 모델)
+def analysis_cache_key(content):
+    return make_cache_key(
+        content,
+        f"{ANALYSIS_PROMPT_VERSION}:{SIMILAR_DOCUMENTS_MODE}:{KEYWORD_EXTRACTION_MODE}",
+        routing_version("topic", "summary", "keywords", "checklist", "chunk_summary", "similar"),
+    )
+
+
+# 분석 결과 메타데이터 저장
+# 새 문서가 추가되면 예전 문서 목록으로 만든 검색 답변은 재사용하지 않고, 검색기에는 새 문서만 추가
+def save_analysis_metadata(buffer, document_id, filename, blob_name, topic, summary, keywords):
+    row = build_metadata_row(
+        document_id,
+        filename,
+        topic,
+        summary,
+        keywords,
+        content_hash=buffer.sha256,
+        blob_name=blob_name,
+    )
+    get_metadata_store().append(row)
+    query_cache.invalidate()
+    add_retrieval_document(row)
+
+
+# 캐시에 저장하는 분석 단계
+ANALYSIS_RESULT_STAGES = ("topic", "summary", "keywords", "checklist", "similar")
+# 캐시에 저장하려면 함께 성공해야 하는 단계 (원본이 저장되지 않은 문서는 링크가 없으므로 다음 업로드 때 다시 처리)
+REQUIRED_STAGES = ANALYSIS_RESULT_STAGES + ("blob",)
+
+
+# 문서 분석 파이프라인 단계 구성
+# 서로 독립적인 작업(업로드, 주제/요약/키워드/체크리스트)은 동시에 실행하고
+# 메타데이터 저장과 유사 문서 검색만 주제/요약/키워드 결과를 기다림
+# 긴 문서는 구간 요약(map)을 합친 본문으로 주제/요약/키워드/체크리스트를 생성(reduce)
+# stream=True 이면 요약과 (rag 방식의) 유사 문서 답변을 생성되는 대로 중간 결과로 받음
+def build_analysis_stages(buffer, content, document_id, filename, upload=True, stream=False):
+    # blob: (Blob 이름, 업로드를 건너뛰었는지 여부) - 같은 내용이 다른 이름으로 이미 있으면 그 Blob 에 연결
+    def save_metadata(blob, topic, summary, keywords):
+        save_analysis_metadata(buffer, document_id, filename, blob[0], topic, summary, keywords)
+
+    def analysis_content():
+        prepared = prepare_analysis_content(content)
+        record_document_sections(filename, content)
+        return prepared
+
+    stages = [
+        Stage("analysis_content", analysis_content),
+        Stage(
+            "topic",
+            lambda analysis_content: extract_topic(analysis_content),
+            depends=("analysis_content",),
+        ),
+        Stage(
+            "summary",
+            lambda analysis_content: (
+                gpt_summarize_document_stream(analysis_content)
+                if stream
+                else gpt_summarize_document(analysis_content)
+            ),
+            depends=("analysis_content",),
+            stream=stream,
+        ),
+        Stage(
+            "checklist",
+            lambda analysis_content: gpt_generate_checklist(analysis_content),
+            depends=("analysis_content",),
+        ),
+        Stage(
+            "metadata",
+            save_metadata,
+            depends=("blob", "topic", "summary", "keywords"),
+        ),
+    ]
+    if upload:
+        stages.insert(0, Stage("blob", lambda: upload_file_to_blob(buffer, filename)))
+    else:
+        # 업로드하지 않을 때도 링크는 같은 형태로 만들 수 있도록 파일명을 Blob 이름으로 사용
+        stages.insert(0, Stage("blob", lambda: (filename, False)))
+
+    # 로컬 키워드 추출은 긴 문서도 구간 요약을 기다리지 않고 원문 전체로 바로 실행
+    if KEYWORD_EXTRACTION_MODE == "llm":
+        # 방식을 바꿔도 단어 빈도가 이어지도록 색인에는 계속 반영
+        def extract_keywords(analysis_content):
+            get_keyword_index().add(buffer.sha256, tokenize(content))
+            return parse_keywords(extract_keywords_openai(analysis_content))
+
+        stages.append(Stage("keywords", extract_keywords, depends=("analysis_content",)))
+    else:
+        stages.append(
+            Stage("keywords", lambda: extract_keywords_local(content, buffer.sha256))
+        )
+
+    # 유사 문서 검색: 로컬 벡터 인덱스(기본), 검색 서비스 직접 조회 또는 Azure Search + GPT
+    if SIMILAR_DOCUMENTS_MODE == "local":
+        def similar_local(blob, topic, summary, keywords):
+            return find_similar_documents_local(
+                similar_document(buffer, document_id, filename, blob[0]), topic, summary, keywords
+            )
+
+        stages.append(
+            Stage("similar", similar_local, depends=("blob", "topic", "summary", "keywords"))
+        )
+    elif SIMILAR_DOCUMENTS_MODE == "search":
+        stages.append(
+            Stage(
+                "similar",
+                lambda topic, summary, keywords: find_similar_documents_search(
+                    topic, summary, keywords, exclude_id=document_id
+                ),
+                depends=("topic", "summary", "keywords"),
+            )
+        )
+    else:
+        stages.append(
+            Stage(
+                "similar",
+                find_similar_documents_for_analysis_stream
+                if stream
+                else find_similar_documents_for_analysis,
+                depends=("topic", "summary", "keywords"),
+                stream=stream,
+            )
+        )
+    return stages
+
+
+# 파이프라인 실행 결과를 캐시에 저장할 형태로 변환 (분석 / 업로드 단계가 하나라도 실패하면 None)
+def collect_analysis_result(results):
+    if not all(name in results and results[name].ok for name in REQUIRED_STAGES):
+        return None
+    return {name: results[name].value for name in ANALYSIS_RESULT_STAGES}
+
+
+# 분석 결과 저장 (분석 캐시 + 거의 같은 문서 인덱스)
+# blob_name: 실제로 저장된 Blob 이름 (같은 내용이 다른 이름으로 이미 있으면 그 이름)
+def store_analysis_result(cache_key, content, filename, document_id, analysis_result, blob_name):
+    analysis_cache.set(cache_key, analysis_result)
+    near_duplicate_index.add(cache_key, content, filename, document_id, blob_url(blob_name))
+
+
+# 내용이 거의 같은 문서의 분석 결과: (찾은 문서, 분석 결과), 없으면 (None, None)
+# 찾은 문서는 filename / link / similarity / diff(다른 줄 목록) 포함
+def find_near_duplicate_analysis(content, cache_key):
+    match = near_duplicate_index.find(content, exclude_key=cache_key)
+    if match is None:
+        return None, None
+    # 캐시에서 밀려난 문서는 다시 분석
+    analysis_result = analysis_cache.get(match["key"])
+    if analysis_result is None:
+        return None, None
+    return match, analysis_result
+
+
+# 거의 같은 문서의 분석 결과를 새 문서의 분석 결과로 저장
+# GPT 분석만 건너뛰고 업로드, 메타데이터, 키워드 색인, 유사 문서 인덱스, 분석 캐시는 새로 분석한 문서와 같게 처리
+# (다음 업로드나 화면을 다시 실행할 때는 분석 캐시에서 바로 찾음)
+# 반환값: ((Blob 이름, 업로드를 건너뛰었는지 여부), 저장한 분석 결과)
+def store_near_duplicate_analysis(
+    buffer, content, cache_key, document_id, filename, analysis_result, upload=True
+):
+    with span("blob"):
+        blob = upload_file_to_blob(buffer, filename) if upload else (filename, False)
+
+    topic, summary, keywords = (
+        analysis_result["topic"],
+        analysis_result["summary"],
+        analysis_result["keywords"],
+    )
+    get_keyword_index().add(buffer.sha256, tokenize(content))
+    record_document_sections(filename, content)
+    save_analysis_metadata(buffer, document_id, filename, blob[0], topic, summary, keywords)
+    if SIMILAR_DOCUMENTS_MODE == "local":
+        similar = find_similar_documents_local(
+            similar_document(buffer, document_id, filename, blob[0]), topic, summary, keywords
+        )
+        analysis_result = dict(analysis_result, similar=similar)
+
+    store_analysis_result(cache_key, content, filename, document_id, analysis_result, blob[0])
+    return blob, analysis_result
@@ -0,0 +1,263 @@
+import io
+import os
+import time
+import queue
+import zipfile
+import threading
+import multiprocessing
+import xml.etree.ElementTree as ET
+
+from chunking import PAGE_SEPARATOR
+from ingest import open_view
+
+PDF_CONTENT_TYPE = "application/pdf"
+DOCX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+TEXT_CONTENT_TYPE = "text/plain"
+
+# 페이지 수가 이 값 이상인 PDF만 프로세스 풀로 병렬 추출 (작은 문서는 프로세스 생성 비용이 더 큼)
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "16"))
+PDF_MAX_WORKERS = int(os.getenv("PDF_MAX_WORKERS", str(min(8, os.cpu_count() or 1))))
+# 페이지 하나에 허용하는 최대 추출 시간 (초, 페이지 추출을 시작한 시각부터)
+PDF_PAGE_TIMEOUT_SECONDS = float(os.getenv("PDF_PAGE_TIMEOUT_SECONDS", "20"))
+# 프로세스 풀에서 페이지 결과를 기다리면서 추출 시작 시각을 다시 확인하는 간격 (초)
+PDF_POLL_SECONDS = 0.5
+
+# 작업 프로세스마다 한 번만 읽어 두는 PDF 와 페이지별 추출 시작 시각 (공유 메모리)
+_worker_reader = None
+_worker_started = None
+
+
+def _as_view(source):
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return memoryview(source)
+    if hasattr(source, "seek"):
+        source.seek(0)
+    return memoryview(source.read())
+
+
+def _init_pdf_worker(pdf_bytes, started):
+    from PyPDF2 import PdfReader
+
+    global _worker_reader, _worker_started
+    _worker_reader = PdfReader(io.BytesIO(pdf_bytes))
+    _worker_started = started
+
+
+def _extract_page_text(page):
+    # extract_text() 가 None 을 돌려주는 페이지도 있음
+    return page.extract_text() or ""
+
+
+def _extract_worker_page(index):
+    _worker_started[index] = time.time()
+    return _extract_page_text(_worker_reader.pages[index])
+
+
+# 스레드에서 first 페이지부터 순서대로 추출해서 results 에 (페이지 번호, 텍스트 또는 예외) 전달
+def _extract_thread_pages(view, first, results, started):
+    from PyPDF2 import PdfReader
+
+    try:
+        reader = PdfReader(open_view(view))
+        for index in range(first, len(reader.pages)):
+            started[index] = time.monotonic()
+            results.put((index, _extract_page_text(reader.pages[index])))
+    except BaseException as e:
+        results.put((None, e))
+
+
+# 작은 PDF: 작업 스레드 하나에서 순서대로 추출 (프로세스 생성 비용 없음)
+# 페이지가 page_timeout 안에 끝나지 않으면 빈 텍스트로 건너뛰고, 남은 페이지를 추출할 첫 페이지 번호(0부터) 반환
+# (스레드는 강제로 멈출 수 없으므로 멈춘 스레드는 끝날 때까지 백그라운드에 남음)
+def _iter_thread_pages(view, page_count, page_timeout):
+    results = queue.Queue()
+    started = {}
+    threading.Thread(
+        target=_extract_thread_pages, args=(view, 0, results, started), name="pdf-page", daemon=True
+    ).start()
+
+    progress = time.monotonic()
+    for index in range(page_count):
+        while True:
+            # 페이지 추출을 시작한 시각부터, 아직 시작 전이면 앞 페이지가 끝난 시각부터 page_timeout
+            remaining = started.get(index, progress) + page_timeout - time.monotonic()
+            try:
+                finished, text = results.get(timeout=max(0.0, remaining))
+                break
+            except queue.Empty:
+                if started.get(index, progress) + page_timeout <= time.monotonic():
+                    yield index + 1, ""
+                    return index + 1
+        if finished is None:
+            raise text
+        progress = time.monotonic()
+        yield index + 1, text
+    return page_count
+
+
+# 큰 PDF: first 페이지부터 프로세스 풀로 병렬 추출
+# 페이지마다 작업 프로세스에서 추출을 시작한 시각부터 page_timeout 을 적용하므로 멈춘 페이지가 여러 개여도
+# 동시에 시간을 잼. 모든 작업 프로세스가 멈춰서 시작하지 못한 페이지는 마지막으로 진행된 시각부터 재고,
+# 그 시간도 넘으면 풀을 정리하고 남은 페이지를 새 작업 프로세스에서 추출
+def _iter_pool_pages(view, page_count, max_workers, page_timeout, first=0):
+    # 멀티스레드인 Streamlit 서버에서 fork 하지 않도록 spawn 사용
+    context = multiprocessing.get_context("spawn")
+    started = context.RawArray("d", page_count)
+    pool = context.Pool(
+        processes=max(1, min(max_workers, page_count - first)),
+        initializer=_init_pdf_worker,
+        initargs=(bytes(view), started),
+    )
+    restart = None
+    try:
+        pending = [
+            pool.apply_async(_extract_worker_page, (index,)) for index in range(first, page_count)
+        ]
+        progress = 0.0
+        for index, result in enumerate(pending, first):
+            text = ""
+            while True:
+                progress = max(progress, max(started))
+                # 작업 프로세스가 아직 PDF 를 읽는 중이면(시작한 페이지가 없으면) 시간을 재지 않음
+                begin = started[index] or progress
+                remaining = begin + page_timeout - time.time() if begin else PDF_POLL_SECONDS
+                try:
+                    text = result.get(timeout=max(0.0, min(remaining, PDF_POLL_SECONDS)))
+                    progress = time.time()
+                    break
+                except multiprocessing.TimeoutError:
+                    if remaining > 0:
+                        continue
+                # 처리 시간이 너무 긴 페이지는 건너뜀
+                if not started[index]:
+                    restart = index
+                break
+            if restart is not None:
+                break
+            yield index + 1, text
+    finally:
+        # 멈춘 페이지가 있어도 작업 프로세스를 모두 정리
+        pool.terminate()
+        pool.join()
+
+    if restart is not None:
+        yield from _iter_pool_pages(view, page_count, max_workers, page_timeout, first=restart)
+
+
+# PDF 페이지 스트리밍 추출 함수
+# (페이지 번호, 텍스트)를 페이지 순서대로 yield
+# 페이지 하나의 추출 시간이 page_timeout 을 넘으면 그 페이지는 빈 텍스트로 건너뜀
+def iter_pdf_pages(source, max_workers=PDF_MAX_WORKERS, page_timeout=PDF_PAGE_TIMEOUT_SECONDS):
+    # PyPDF2 는 PDF 를 처리할 때만 로딩
+    from PyPDF2 import PdfReader
+
+    view = _as_view(source)
+    reader = PdfReader(open_view(view))
+    page_count = len(reader.pages)
+
+    if page_count < PDF_PARALLEL_MIN_PAGES or max_workers <= 1:
+        first = yield from _iter_thread_pages(view, page_count, page_timeout)
+        if first >= page_count:
+            return
+        # 멈춘 페이지가 있는 문서의 남은 페이지는 멈추면 정리할 수 있는 작업 프로세스에서 추출
+        yield from _iter_pool_pages(view, page_count, max_workers, page_timeout, first=first)
+        return
+
+    yield from _iter_pool_pages(view, page_count, max_workers, page_timeout)
+
+
+# 문서 추출 함수 (PDF)
+# 페이지 사이에는 페이지 구분 문자를 넣어 한 번에 합침
+def extract_pdf_content(uploaded_file):
+    return PAGE_SEPARATOR.join(text for _, text in iter_pdf_pages(uploaded_file))
+
+
+# DOCX 본문 XML 태그
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_W_BODY = _W + "body"
+_W_P = _W + "p"
+_W_R = _W + "r"
+_W_T = _W + "t"
+_W_TAB = _W + "tab"
+_W_BR = _W + "br"
+_W_CR = _W + "cr"
+_W_TC = _W + "tc"
+_W_TBL = _W + "tbl"
+
+
+# DOCX 블록 스트리밍 추출 함수
+# word/document.xml 을 압축 해제하면서 점진적으로 파싱하여
+# 본문 문단은 ("paragraph", 텍스트), 표 셀은 ("cell", 텍스트)로 문서 순서대로 yield
+def iter_docx_blocks(source):
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = io.BytesIO(source)
+    elif hasattr(source, "seek"):
+        source.seek(0)
+
+    with zipfile.ZipFile(source) as archive, archive.open("word/document.xml") as xml_file:
+        body = None
+        runs = []  # 현재 문단의 텍스트 조각
+        cells = []  # 열려 있는 표 셀마다 문단 목록 (중첩 표 지원)
+        depth = 0  # body 기준 깊이
+        run_depth = 0  # 열려 있는 run(w:r) 수, 문단 속성(w:pPr)의 탭 위치 정의는 run 밖에 있음
+
+        for event, elem in ET.iterparse(xml_file, events=("start", "end")):
+            if event == "start":
+                if elem.tag == _W_BODY:
+                    body = elem
+                elif body is not None:
+                    depth += 1
+                    if elem.tag == _W_TC:
+                        cells.append([])
+                    elif elem.tag == _W_R:
+                        run_depth += 1
+                continue
+
+            if body is None or elem is body:
+                continue
+            depth -= 1
+
+            tag = elem.tag
+            if tag == _W_T:
+                runs.append(elem.text or "")
+            elif tag == _W_R:
+                run_depth -= 1
+            elif tag == _W_TAB and run_depth:
+                runs.append("\t")
+            elif tag in (_W_BR, _W_CR) and run_depth:
+                runs.append("\n")
+            elif tag == _W_P:
+                text = "".join(runs)
+                runs = []
+                if cells:
+                    cells[-1].append(text)
+                else:
+                    yield "paragraph", text
+            elif tag == _W_TC:
+                yield "cell", "\n".join(p for p in cells.pop() if p)
+
+            # 처리가 끝난 요소는 바로 비워서 메모리 사용량을 일정하게 유지
+            if depth == 0:
+                body.clear()
+            elif tag in (_W_P, _W_TC, _W_TBL):
+                elem.clear()
+
+
+# 문서 추출 함수 (DOCX)
+# 본문 문단과 표 셀 내용을 문서 순서대로 한 줄씩 합침
+def extract_docx_content(uploaded_file):
+    return "".join(
+        text + "\n" for kind, text in iter_docx_blocks(uploaded_file) if kind == "paragraph" or text
+    )
+
+
+# 문서 추출 함수 (PDF, DOCX, TXT 처리)
+# 업로드 버퍼(IngestBuffer)의 내용 형식에 따라 텍스트 추출
+def extract_content(buffer):
+    if buffer.content_type == PDF_CONTENT_TYPE:
+        return extract_pdf_content(buffer.view())
+    elif buffer.content_type == DOCX_CONTENT_TYPE:
+        return extract_docx_content(buffer.open())
+    elif buffer.content_type == TEXT_CONTENT_TYPE:
+        return buffer.text()
+    return ""
@@ -0,0 +1,137 @@
+import io
+import os
+import mmap
+import hashlib
+import mimetypes
+import tempfile
+
+# 메모리에 보관할 최대 크기 (넘으면 임시 파일로 내려 씀)
+INGEST_SPOOL_MAX_BYTES = int(os.getenv("INGEST_SPOOL_MAX_BYTES", str(16 * 1024 * 1024)))
+INGEST_READ_CHUNK_BYTES = 1024 * 1024
+
+
+# 메모리 뷰를 복사 없이 읽는 파일 객체 (열 때마다 독립적인 읽기 위치를 가짐)
+class _ViewReader(io.RawIOBase):
+    def __init__(self, view):
+        self._view = view
+        self._pos = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, b):
+        size = min(len(b), len(self._view) - self._pos)
+        if size <= 0:
+            return 0
+        b[:size] = self._view[self._pos : self._pos + size]
+        self._pos += size
+        return size
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            self._pos = offset
+        elif whence == io.SEEK_CUR:
+            self._pos += offset
+        elif whence == io.SEEK_END:
+            self._pos = len(self._view) + offset
+        self._pos = max(0, self._pos)
+        return self._pos
+
+    def tell(self):
+        return self._pos
+
+
+# 업로드 파일 버퍼
+# 스트림을 한 번만 읽으면서 해시를 계산하고,
+# 업로드/해시/텍스트 추출은 모두 같은 버퍼를 복사 없이 공유
+class IngestBuffer:
+    def __init__(self, view, sha256, name, content_type, _owner=None):
+        self._view = view
+        self.sha256 = sha256
+        self.name = name
+        self.content_type = content_type
+        self.size = len(view)
+        self._owner = _owner  # mmap / 임시 파일 수명 유지
+
+    # Streamlit UploadedFile 등 BytesIO 는 내부 버퍼를 그대로 사용
+    @classmethod
+    def from_upload(cls, uploaded_file, name=None, content_type=None):
+        name = name or getattr(uploaded_file, "name", "")
+        content_type = content_type or getattr(uploaded_file, "type", None) or _guess_type(name)
+
+        if hasattr(uploaded_file, "getbuffer"):
+            view = uploaded_file.getbuffer()
+            digest = hashlib.sha256()
+            for start in range(0, len(view), INGEST_READ_CHUNK_BYTES):
+                digest.update(view[start : start + INGEST_READ_CHUNK_BYTES])
+            return cls(view, digest.hexdigest(), name, content_type)
+
+        return cls.from_stream(uploaded_file, name, content_type)
+
+    # 일반 스트림은 읽으면서 해시를 계산하고, 크면 임시 파일로 내려 씀
+    @classmethod
+    def from_stream(cls, stream, name="", content_type=None):
+        content_type = content_type or _guess_type(name)
+        digest = hashlib.sha256()
+        data = bytearray()
+        spill = None
+        while True:
+            block = stream.read(INGEST_READ_CHUNK_BYTES)
+            if not block:
+                break
+            digest.update(block)
+            if spill is None and len(data) + len(block) > INGEST_SPOOL_MAX_BYTES:
+                spill = tempfile.TemporaryFile()
+                spill.write(data)
+                data = None
+            if spill is None:
+                data += block
+            else:
+                spill.write(block)
+
+        if spill is None:
+            return cls(memoryview(data), digest.hexdigest(), name, content_type)
+
+        spill.flush()
+        mapped = mmap.mmap(spill.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(memoryview(mapped), digest.hexdigest(), name, content_type, _owner=(spill, mapped))
+
+    # 로컬 파일은 mmap 으로 열어서 한 번만 읽으며 해시 계산
+    @classmethod
+    def from_path(cls, path, content_type=None):
+        name = os.path.basename(path)
+        content_type = content_type or _guess_type(name)
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return cls(memoryview(b""), hashlib.sha256().hexdigest(), name, content_type)
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        view = memoryview(mapped)
+        digest = hashlib.sha256()
+        for start in range(0, len(view), INGEST_READ_CHUNK_BYTES):
+            digest.update(view[start : start + INGEST_READ_CHUNK_BYTES])
+        return cls(view, digest.hexdigest(), name, content_type, _owner=mapped)
+
+    # 전체 내용의 메모리 뷰 (복사 없음)
+    def view(self):
+        return self._view
+
+    # 독립적인 읽기 위치를 가진 파일 객체
+    def open(self):
+        return open_view(self._view)
+
+    # 텍스트 파일 디코딩
+    def text(self, encoding="utf-8"):
+        return str(self._view, encoding)
+
+
+# 메모리 뷰를 파일 객체로 열기 (복사 없음)
+def open_view(view):
+    return io.BufferedReader(_ViewReader(memoryview(view)))
+
+
+def _guess_type(name):
+    return mimetypes.guess_type(name or "")[0] or "application/octet-stream"
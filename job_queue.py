@@ -0,0 +1,287 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from analysis_pipeline import StageResult, run_pipeline
+from doc_analysis import build_analysis_stages, collect_analysis_result, store_analysis_result
+from tracing import copy_context
+
+# 문서 분석 작업 큐 설정
+# 작업 상태와 단계별 결과를 SQLite 에 기록하므로 화면이 다시 실행되거나 브라우저가 다시 연결되어도
+# 같은 작업의 결과를 이어서 받을 수 있음 (여러 Streamlit 워커 프로세스가 같은 파일 공유)
+JOB_QUEUE_PATH = os.getenv("JOB_QUEUE_PATH", ".cache/jobs.sqlite3")
+# 동시에 분석하는 문서 수 (넘는 작업은 대기)
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+# 실행 중인 작업이 이 시간 동안 갱신되지 않으면 (작업하던 프로세스 종료 등) 중단된 것으로 보고
+# 조회할 때 실패로 기록 (화면은 기다리기를 멈추고 다음 실행에서 다시 제출)
+JOB_STALE_SECONDS = float(os.getenv("JOB_STALE_SECONDS", "120"))
+# 끝난 작업 기록 보관 기간
+JOB_RETENTION_SECONDS = int(os.getenv("JOB_RETENTION_SECONDS", str(24 * 3600)))
+# 화면에서 작업 진행 상황을 다시 읽어서 표시하는 간격 (초, 결과 영역만 다시 실행)
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "0.3"))
+# 스트리밍 중간 결과를 기록하는 최소 간격 (초)
+JOB_PROGRESS_INTERVAL_SECONDS = 0.2
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+# 결과가 커서 기록하지 않는 단계 (다른 단계의 입력으로만 사용)
+UNRECORDED_STAGES = ("analysis_content",)
+
+
+# 문서 분석 작업 큐
+# 작업은 이 프로세스의 작업자 풀에서 실행하고, 같은 분석 캐시 키(문서 내용 + 프롬프트 + 모델)의 작업이
+# 대기 중이거나 실행 중이면 새로 만들지 않고 그 작업 ID 를 돌려줌 (같은 파일을 여러 명이 올려도 분석은 한 번)
+class AnalysisJobQueue:
+    def __init__(
+        self,
+        path=JOB_QUEUE_PATH,
+        workers=JOB_WORKERS,
+        stale_seconds=JOB_STALE_SECONDS,
+        retention_seconds=JOB_RETENTION_SECONDS,
+    ):
+        self.path = path
+        self.stale_seconds = stale_seconds
+        self.retention_seconds = retention_seconds
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+        # 이 프로세스에서 대기 / 실행 중인 작업 (주기적으로 갱신 시각을 기록)
+        self._owned = set()
+        self._owned_lock = threading.Lock()
+        self._heartbeat = None
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        conn = self._connect()
+        try:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    key TEXT NOT NULL,
+                    filename TEXT NOT NULL,
+                    document_id TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    results TEXT NOT NULL,
+                    partials TEXT NOT NULL,
+                    error TEXT,
+                    pid INTEGER,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_key ON jobs (key, status)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at)")
+        finally:
+            conn.close()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    # 중단된 것으로 보고 실패로 기록한 작업은 뒤늦게 진행하던 작업자가 다시 바꾸지 않음
+    def _update(self, job_id, **values):
+        values["updated_at"] = time.time()
+        columns = ", ".join(f"{name} = ?" for name in values)
+        conn = self._connect()
+        try:
+            conn.execute(
+                f"UPDATE jobs SET {columns} WHERE id = ? AND status != ?",
+                (*values.values(), job_id, FAILED),
+            )
+        finally:
+            conn.close()
+
+    # 작업 제출: (작업 ID, 새로 만들었는지 여부) 반환
+    # buffer / content 는 새 작업을 만들 때만 사용
+    def submit(self, key, buffer, content, filename):
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT id, updated_at FROM jobs WHERE key = ? AND status IN (?, ?) "
+                "ORDER BY created_at DESC LIMIT 1",
+                (key, QUEUED, RUNNING),
+            ).fetchone()
+            if row is not None and now - row[1] < self.stale_seconds:
+                conn.execute("COMMIT")
+                return row[0], False
+            if row is not None:
+                conn.execute(
+                    "UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE id = ?",
+                    (FAILED, "작업이 중단되어 다시 제출했습니다.", now, row[0]),
+                )
+
+            job_id = uuid.uuid4().hex
+            document_id = str(uuid.uuid4())
+            conn.execute(
+                "INSERT INTO jobs (id, key, filename, document_id, status, results, partials, "
+                "pid, created_at, updated_at) VALUES (?, ?, ?, ?, ?, '{}', '{}', ?, ?, ?)",
+                (job_id, key, filename, document_id, QUEUED, os.getpid(), now, now),
+            )
+            if self.retention_seconds:
+                conn.execute(
+                    "DELETE FROM jobs WHERE status IN (?, ?) AND updated_at < ?",
+                    (DONE, FAILED, now - self.retention_seconds),
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+        with self._owned_lock:
+            self._owned.add(job_id)
+        self._start_heartbeat()
+        # 제출한 쪽의 trace 안에서 단계가 기록되도록 실행 컨텍스트를 복사해서 실행
+        self._executor.submit(
+            copy_context().run, self._run, job_id, key, buffer, content, filename, document_id
+        )
+        return job_id, True
+
+    def _run(self, job_id, key, buffer, content, filename, document_id):
+        try:
+            self._update(job_id, status=RUNNING)
+            stages = build_analysis_stages(buffer, content, document_id, filename, stream=True)
+
+            results = {}
+            recorded = {}
+            partials = {}
+            written_at = 0.0
+            for result in run_pipeline(stages):
+                if result.partial:
+                    partials[result.name] = result.value
+                    if time.monotonic() - written_at >= JOB_PROGRESS_INTERVAL_SECONDS:
+                        self._update(job_id, partials=json.dumps(partials, ensure_ascii=False))
+                        written_at = time.monotonic()
+                    continue
+
+                results[result.name] = result
+                partials.pop(result.name, None)
+                recorded[result.name] = {
+                    "value": None if result.name in UNRECORDED_STAGES else result.value,
+                    "error": None if result.ok else str(result.error),
+                    "elapsed": result.elapsed,
+                }
+                self._update(
+                    job_id,
+                    results=json.dumps(recorded, ensure_ascii=False, default=str),
+                    partials=json.dumps(partials, ensure_ascii=False),
+                )
+
+            # 모든 분석 단계가 성공한 경우에만 캐시에 저장
+            analysis_result = collect_analysis_result(results)
+            if analysis_result is not None:
+                store_analysis_result(
+                    key, content, filename, document_id, analysis_result, results["blob"].value[0]
+                )
+            self._update(job_id, status=DONE, partials="{}")
+        except Exception as e:
+            self._update(job_id, status=FAILED, error=f"{type(e).__name__}: {e}")
+        finally:
+            with self._owned_lock:
+                self._owned.discard(job_id)
+
+    # 이 프로세스의 대기 / 실행 중인 작업의 갱신 시각을 주기적으로 기록
+    # (작업자 풀이 모두 사용 중이거나 오래 걸리는 단계가 실행 중이어도 중단된 작업으로 보지 않도록)
+    def _start_heartbeat(self):
+        with self._owned_lock:
+            if self._heartbeat is not None:
+                return
+            self._heartbeat = threading.Thread(target=self._beat, name="job-heartbeat", daemon=True)
+            self._heartbeat.start()
+
+    def _beat(self):
+        while True:
+            time.sleep(max(1.0, self.stale_seconds / 4))
+            with self._owned_lock:
+                owned = list(self._owned)
+            if not owned:
+                continue
+            conn = self._connect()
+            try:
+                conn.executemany(
+                    "UPDATE jobs SET updated_at = ? WHERE id = ? AND status IN (?, ?)",
+                    [(time.time(), job_id, QUEUED, RUNNING) for job_id in owned],
+                )
+            except sqlite3.Error:
+                pass
+            finally:
+                conn.close()
+
+    # 작업 상태 조회 (없으면 None)
+    # results / partials 는 단계 이름별 StageResult, queued_ahead 는 먼저 대기 중인 작업 수
+    # 작업하던 프로세스가 종료되어 갱신이 멈춘 작업은 실패로 기록 (화면이 계속 기다리지 않도록)
+    def get(self, job_id):
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT key, filename, document_id, status, results, partials, error, "
+                "created_at, updated_at FROM jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+            if row is None:
+                return None
+            if row[3] in (QUEUED, RUNNING) and time.time() - row[8] >= self.stale_seconds:
+                error = "작업하던 프로세스가 응답하지 않아 분석이 중단되었습니다."
+                # 그 사이 갱신된 작업(heartbeat)은 그대로 둠
+                stale = conn.execute(
+                    "UPDATE jobs SET status = ?, error = ?, updated_at = ? "
+                    "WHERE id = ? AND status = ? AND updated_at = ?",
+                    (FAILED, error, time.time(), job_id, row[3], row[8]),
+                )
+                if stale.rowcount:
+                    row = (*row[:3], FAILED, row[4], row[5], error, *row[7:])
+            queued_ahead = 0
+            if row[3] == QUEUED:
+                queued_ahead = conn.execute(
+                    "SELECT COUNT(*) FROM jobs WHERE status = ? AND created_at < ?", (QUEUED, row[7])
+                ).fetchone()[0]
+        finally:
+            conn.close()
+
+        return {
+            "id": job_id,
+            "key": row[0],
+            "filename": row[1],
+            "document_id": row[2],
+            "status": row[3],
+            "results": {
+                name: StageResult(
+                    name, value=value["value"], error=value["error"], elapsed=value["elapsed"]
+                )
+                for name, value in json.loads(row[4]).items()
+            },
+            "partials": {
+                name: StageResult(name, value=value, partial=True)
+                for name, value in json.loads(row[5]).items()
+            },
+            "error": row[6],
+            "queued_ahead": queued_ahead,
+        }
+
+
+_job_queue = None
+_job_queue_lock = threading.Lock()
+
+
+# 프로세스 공유 작업 큐 (작업자 풀은 프로세스 안의 모든 세션이 함께 사용)
+def get_job_queue():
+    global _job_queue
+    if _job_queue is None:
+        with _job_queue_lock:
+            if _job_queue is None:
+                _job_queue = AnalysisJobQueue()
+    return _job_queue
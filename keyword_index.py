@@ -0,0 +1,146 @@
+import os
+import re
+import math
+import sqlite3
+import threading
+from collections import Counter
+
+# 로컬 키워드 추출 설정
+# 분석한 문서의 단어별 문서 빈도(df)를 SQLite 에 누적해서 BM25 가중치로 문서의 핵심 단어를 고름
+# (GPT 호출 없이 수 ms 안에 키워드 생성, 여러 Streamlit 워커 프로세스가 같은 파일 공유)
+KEYWORD_INDEX_PATH = os.getenv("KEYWORD_INDEX_PATH", ".cache/keywords.sqlite3")
+KEYWORD_BM25_K1 = 1.2
+
+_TOKEN_PATTERN = re.compile(r"[a-z][a-z0-9+#.\-]*[a-z0-9+#]|[가-힣]+")
+# 단어 끝의 조사 / 어미 (긴 것부터 제거, 남는 글자가 2자 이상일 때만)
+# 이 / 가 / 과 / 로 / 도 / 한 / 된 처럼 명사의 마지막 글자로도 흔한 한 글자는 넣지 않음
+# (게이트웨이, 전문가, 연구결과, 워크플로, 재평가 등이 잘리지 않도록)
+_SUFFIXES = sorted(
+    (
+        "은 는 을 를 의 에 와 만 며 "
+        "으로 에서 에게 까지 부터 처럼 보다 이나 이며 이고 에는 라는 "
+        "에서는 으로는 으로서 으로써 에게서 에서도 이라는 "
+        "하고 하는 하여 하며 한다 했다 하기 해야 되는 되어 된다 있다 있는 없는 이다 "
+        "합니다 입니다 됩니다"
+    ).split(),
+    key=len,
+    reverse=True,
+)
+_STOPWORDS = set(
+    (
+        "및 등 위한 위해 통해 대한 대해 관련 경우 이상 이하 또는 그리고 하지만 따라서 "
+        "있음 없음 필요 사용 내용 부분 기타 모든 각각 "
+        "the and for with from that this are was not"
+    ).split()
+)
+
+
+# 문서를 키워드 후보 단어 목록으로 변환 (소문자, 조사 / 어미 제거)
+def tokenize(text):
+    tokens = []
+    for token in _TOKEN_PATTERN.findall((text or "").lower()):
+        for suffix in _SUFFIXES:
+            if token.endswith(suffix) and len(token) - len(suffix) >= 2:
+                token = token[: -len(suffix)]
+                break
+        if len(token) > 1 and token not in _STOPWORDS:
+            tokens.append(token)
+    return tokens
+
+
+# 단어별 문서 빈도 저장소
+class KeywordIndex:
+    def __init__(self, path=KEYWORD_INDEX_PATH):
+        self.path = path
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        conn = self._connect()
+        try:
+            conn.execute("CREATE TABLE IF NOT EXISTS keyword_documents (id TEXT PRIMARY KEY)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS keyword_df (term TEXT PRIMARY KEY, df INTEGER NOT NULL)"
+            )
+        finally:
+            conn.close()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    # 문서 추가 (같은 id 는 한 번만 반영)
+    def add(self, document_id, terms):
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            inserted = conn.execute(
+                "INSERT OR IGNORE INTO keyword_documents (id) VALUES (?)", (document_id,)
+            ).rowcount
+            if inserted:
+                conn.executemany(
+                    "INSERT INTO keyword_df (term, df) VALUES (?, 1) "
+                    "ON CONFLICT (term) DO UPDATE SET df = df + 1",
+                    [(term,) for term in set(terms)],
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    # (전체 문서 수, 단어별 문서 빈도)
+    def document_frequencies(self, terms):
+        terms = list(set(terms))
+        frequencies = {}
+        conn = self._connect()
+        try:
+            total = conn.execute("SELECT COUNT(*) FROM keyword_documents").fetchone()[0]
+            # SQLite 변수 개수 제한 때문에 나눠서 조회
+            for start in range(0, len(terms), 500):
+                part = terms[start : start + 500]
+                frequencies.update(
+                    conn.execute(
+                        f"SELECT term, df FROM keyword_df WHERE term IN ({', '.join('?' * len(part))})",
+                        part,
+                    ).fetchall()
+                )
+        finally:
+            conn.close()
+        return total, frequencies
+
+    # 문서를 색인에 반영하고 BM25 가중치가 큰 단어 num_keywords 개 반환
+    # 한 문서 안에서 순위를 매기므로 문서 길이 보정은 생략 (모든 단어에 같은 값)
+    def extract(self, document_id, content, num_keywords=5):
+        terms = tokenize(content)
+        if not terms:
+            return []
+        self.add(document_id, terms)
+
+        counts = Counter(terms)
+        total, frequencies = self.document_frequencies(counts)
+        scores = {}
+        for term, count in counts.items():
+            df = frequencies.get(term, 1)
+            idf = math.log(1 + (total - df + 0.5) / (df + 0.5))
+            scores[term] = idf * count * (KEYWORD_BM25_K1 + 1) / (count + KEYWORD_BM25_K1)
+        # 점수가 같으면 문서에 먼저 나온 단어 우선
+        return sorted(scores, key=scores.get, reverse=True)[:num_keywords]
+
+
+_keyword_index = None
+_keyword_index_lock = threading.Lock()
+
+
+# 프로세스 공유 키워드 색인
+def get_keyword_index():
+    global _keyword_index
+    if _keyword_index is None:
+        with _keyword_index_lock:
+            if _keyword_index is None:
+                _keyword_index = KeywordIndex()
+    return _keyword_index
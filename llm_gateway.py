@@ -0,0 +1,347 @@
+import os
+import time
+import random
+import sqlite3
+import threading
+
+from chunking import estimate_tokens
+from clients import get_docs_client, get_embedding_client
+
+# Azure OpenAI 호출 한도 설정 (deployment 할당량에 맞춰 지정, 0 이면 제한 없음)
+# 여러 세션과 워커 프로세스가 같은 SQLite 파일의 토큰 버킷을 공유
+LLM_RATE_LIMIT_PATH = os.getenv("LLM_RATE_LIMIT_PATH", ".cache/rate_limit.sqlite3")
+OPENAI_RPM_LIMIT = int(os.getenv("OPENAI_RPM_LIMIT", "300"))
+OPENAI_TPM_LIMIT = int(os.getenv("OPENAI_TPM_LIMIT", "50000"))
+# 프로세스당 동시 요청 수 (429 응답에 따라 1 ~ 최댓값 사이에서 자동 조절)
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+LLM_INITIAL_CONCURRENCY = int(os.getenv("LLM_INITIAL_CONCURRENCY", "4"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "6"))
+LLM_BACKOFF_BASE_SECONDS = 0.5
+LLM_BACKOFF_MAX_SECONDS = 30.0
+
+# 다시 시도할 HTTP 상태 코드
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+
+# 프로세스 간 공유 토큰 버킷 (분당 요청 수 / 분당 토큰 수)
+# 버킷 상태를 SQLite 한 행에 두고 BEGIN IMMEDIATE 트랜잭션 안에서 충전/차감
+class SharedRateLimiter:
+    def __init__(self, path=LLM_RATE_LIMIT_PATH, rpm=OPENAI_RPM_LIMIT, tpm=OPENAI_TPM_LIMIT):
+        self.path = path
+        self.rpm = rpm
+        self.tpm = tpm
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        conn = self._connect()
+        try:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS rate_limit (
+                    scope TEXT PRIMARY KEY,
+                    requests REAL NOT NULL,
+                    tokens REAL NOT NULL,
+                    updated_at REAL NOT NULL,
+                    blocked_until REAL NOT NULL
+                )
+                """
+            )
+        finally:
+            conn.close()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    # 버킷을 읽어 경과 시간만큼 충전한 뒤 update(requests, tokens, blocked_until, now) 결과를 저장
+    def _transact(self, scope, update):
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT requests, tokens, updated_at, blocked_until FROM rate_limit WHERE scope = ?",
+                (scope,),
+            ).fetchone()
+            if row is None:
+                requests, tokens, blocked_until = float(self.rpm), float(self.tpm), 0.0
+            else:
+                requests, tokens, updated_at, blocked_until = row
+                elapsed = max(0.0, now - updated_at)
+                requests = min(self.rpm, requests + elapsed * self.rpm / 60)
+                tokens = min(self.tpm, tokens + elapsed * self.tpm / 60)
+
+            requests, tokens, blocked_until, result = update(requests, tokens, blocked_until, now)
+            conn.execute(
+                "INSERT OR REPLACE INTO rate_limit "
+                "(scope, requests, tokens, updated_at, blocked_until) VALUES (?, ?, ?, ?, ?)",
+                (scope, requests, tokens, now, blocked_until),
+            )
+            conn.execute("COMMIT")
+            return result
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    # 요청 1건과 tokens 만큼의 여유가 생길 때까지 대기 후 차감
+    def acquire(self, scope, tokens):
+        if not self.rpm and not self.tpm:
+            return 0.0
+        # 한 요청이 버킷 용량보다 크면 가득 찰 때까지만 기다림
+        tokens = min(tokens, self.tpm) if self.tpm else 0
+
+        def take(available_requests, available_tokens, blocked_until, now):
+            if blocked_until > now:
+                return available_requests, available_tokens, blocked_until, blocked_until - now
+
+            waits = []
+            if self.rpm and available_requests < 1:
+                waits.append((1 - available_requests) * 60 / self.rpm)
+            if self.tpm and available_tokens < tokens:
+                waits.append((tokens - available_tokens) * 60 / self.tpm)
+            if waits:
+                return available_requests, available_tokens, blocked_until, max(waits)
+
+            if self.rpm:
+                available_requests -= 1
+            if self.tpm:
+                available_tokens -= tokens
+            return available_requests, available_tokens, blocked_until, 0.0
+
+        waited = 0.0
+        while True:
+            wait = self._transact(scope, take)
+            if wait <= 0:
+                return waited
+            # 여러 프로세스가 동시에 깨어나지 않도록 대기 시간에 지터 추가
+            wait = min(wait, LLM_BACKOFF_MAX_SECONDS) * random.uniform(1.0, 1.2)
+            time.sleep(wait)
+            waited += wait
+
+    # 실제 사용량으로 보정 (예상보다 적게 쓰면 돌려받고, 많이 쓰면 추가 차감)
+    def adjust(self, scope, tokens):
+        if not self.tpm or not tokens:
+            return
+
+        def apply(requests, available_tokens, blocked_until, now):
+            return requests, available_tokens - tokens, blocked_until, None
+
+        self._transact(scope, apply)
+
+    # 429 응답의 retry-after 동안 모든 프로세스의 요청을 멈춤
+    def block(self, scope, seconds):
+        def apply(requests, tokens, blocked_until, now):
+            return requests, tokens, max(blocked_until, now + seconds), None
+
+        self._transact(scope, apply)
+
+
+# AIMD 방식의 동시 요청 수 제한
+# 성공하면 한도를 조금씩(1/한도) 늘리고, 429 를 받으면 절반으로 줄임 (다른 오류는 한도를 바꾸지 않음)
+class AdaptiveConcurrency:
+    def __init__(self, initial=LLM_INITIAL_CONCURRENCY, maximum=LLM_MAX_CONCURRENCY, minimum=1):
+        self.minimum = minimum
+        self.maximum = max(minimum, maximum)
+        self.limit = float(min(max(initial, minimum), self.maximum))
+        self._in_flight = 0
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        with self._cond:
+            while self._in_flight >= int(self.limit):
+                self._cond.wait()
+            self._in_flight += 1
+            return time.monotonic()
+
+    # started: acquire 가 돌려준 시작 시각
+    def release(self, started, succeeded=False, throttled=False):
+        with self._cond:
+            self._in_flight -= 1
+            if throttled:
+                # 한도를 줄이기 전에 시작한 요청의 429 는 이미 반영된 것으로 보고 무시
+                if started >= self._last_decrease:
+                    self.limit = max(self.minimum, self.limit / 2)
+                    self._last_decrease = time.monotonic()
+            elif succeeded:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self._cond.notify_all()
+
+
+def _status_code(error):
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status
+
+
+def _is_retryable(error):
+    if _status_code(error) in RETRYABLE_STATUS_CODES:
+        return True
+    # 연결 오류 / 타임아웃
+    import openai
+
+    return isinstance(error, openai.APIConnectionError)
+
+
+# 응답 헤더의 retry-after-ms / retry-after (초) 읽기
+def _retry_after_seconds(error):
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except (TypeError, ValueError):
+        pass
+    return None
+
+
+# 지수 백오프 + full jitter
+def _backoff_seconds(attempt):
+    return random.uniform(0, min(LLM_BACKOFF_MAX_SECONDS, LLM_BACKOFF_BASE_SECONDS * 2**attempt))
+
+
+def _estimate_chat_tokens(kwargs):
+    prompt_tokens = sum(
+        estimate_tokens(message.get("content") or "") + 4 for message in kwargs.get("messages", [])
+    )
+    return prompt_tokens + (kwargs.get("max_tokens") or 1000)
+
+
+# Azure OpenAI 호출 게이트웨이
+# 모든 호출이 공유 토큰 버킷 → 동시 요청 수 제한 → 재시도 순서로 거쳐 감
+class LLMGateway:
+    def __init__(self, rate_limiter=None, concurrency=None, max_retries=LLM_MAX_RETRIES):
+        self.rate_limiter = rate_limiter or SharedRateLimiter()
+        self.concurrency = concurrency or AdaptiveConcurrency()
+        self.max_retries = max_retries
+        self._stats = {"requests": 0, "retries": 0, "throttled": 0, "failed": 0, "wait_seconds": 0.0}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, key, value=1):
+        with self._stats_lock:
+            self._stats[key] += value
+
+    def stats(self):
+        with self._stats_lock:
+            return dict(self._stats, concurrency=round(self.concurrency.limit, 2))
+
+    # stream=True 인 요청은 응답을 끝까지 읽을 때까지 동시 요청 슬롯을 잡고 있는 StreamingResponse 반환
+    def _call(self, create, kwargs, scope, estimated_tokens):
+        attempt = 0
+        while True:
+            self._count("wait_seconds", self.rate_limiter.acquire(scope, estimated_tokens))
+            started = self.concurrency.acquire()
+            try:
+                self._count("requests")
+                response = create(**kwargs)
+            except Exception as e:
+                throttled = _status_code(e) == 429
+                self.concurrency.release(started, throttled=throttled)
+                if attempt >= self.max_retries or not _is_retryable(e):
+                    self._count("failed")
+                    raise
+                retry_after = _retry_after_seconds(e)
+            except BaseException:
+                self.concurrency.release(started)
+                raise
+            else:
+                if kwargs.get("stream"):
+                    return StreamingResponse(self, response, scope, estimated_tokens, started)
+                self.concurrency.release(started, succeeded=True)
+                return response
+
+            self._count("retries")
+            if throttled:
+                self._count("throttled")
+                # 다음 acquire 에서 모든 프로세스가 retry-after 만큼 대기
+                self.rate_limiter.block(scope, retry_after or _backoff_seconds(attempt))
+            else:
+                time.sleep(retry_after if retry_after is not None else _backoff_seconds(attempt))
+            attempt += 1
+
+    # 실제 사용량으로 토큰 버킷 보정
+    def _adjust_usage(self, scope, usage, estimated_tokens):
+        if usage is not None and getattr(usage, "total_tokens", None):
+            self.rate_limiter.adjust(scope, usage.total_tokens - estimated_tokens)
+
+    # 채팅 완성 요청 (stream=True 이면 StreamingResponse)
+    def chat_completion(self, **kwargs):
+        scope = kwargs.get("model") or ""
+        estimated = _estimate_chat_tokens(kwargs)
+        response = self._call(get_docs_client().chat.completions.create, kwargs, scope, estimated)
+        if not kwargs.get("stream"):
+            self._adjust_usage(scope, getattr(response, "usage", None), estimated)
+        return response
+
+    # 임베딩 요청
+    def embeddings(self, **kwargs):
+        scope = kwargs.get("model") or ""
+        texts = kwargs.get("input")
+        texts = [texts] if isinstance(texts, str) else texts or []
+        estimated = sum(estimate_tokens(text) for text in texts)
+        return self._call(get_embedding_client().embeddings.create, kwargs, scope, estimated)
+
+
+# 스트리밍 응답
+# 조각을 모두 받거나 중간에 닫을 때까지 동시 요청 슬롯을 잡고 있다가 반납하고,
+# 마지막 조각의 usage 로 토큰 버킷을 보정
+class StreamingResponse:
+    def __init__(self, gateway, chunks, scope, estimated_tokens, started):
+        self._gateway = gateway
+        self._response = chunks
+        self._chunks = iter(chunks)
+        self._scope = scope
+        self._estimated_tokens = estimated_tokens
+        self._started = started
+        self._usage = None
+        self._closed = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            chunk = next(self._chunks)
+        except StopIteration:
+            self.close(succeeded=True)
+            raise
+        except BaseException:
+            self.close()
+            raise
+        self._usage = getattr(chunk, "usage", None) or self._usage
+        return chunk
+
+    # 끝까지 읽지 않고 닫으면 한도를 늘리지 않고 슬롯만 반납
+    def close(self, succeeded=False):
+        if self._closed:
+            return
+        self._closed = True
+        self._gateway.concurrency.release(self._started, succeeded=succeeded)
+        if not succeeded and hasattr(self._response, "close"):
+            self._response.close()
+        self._gateway._adjust_usage(self._scope, self._usage, self._estimated_tokens)
+
+    def __del__(self):
+        self.close()
+
+
+_gateway = None
+_gateway_lock = threading.Lock()
+
+
+# 프로세스 공유 게이트웨이 (동시 요청 수 한도는 프로세스 안의 모든 세션이 함께 사용)
+def get_llm_gateway():
+    global _gateway
+    if _gateway is None:
+        with _gateway_lock:
+            if _gateway is None:
+                _gateway = LLMGateway()
+    return _gateway
@@ -0,0 +1,250 @@
+import os
+import sys
+import json
+import time
+import uuid
+import atexit
+import threading
+from datetime import datetime, timezone
+
+from clients import BLOB_CSV_CONTAINER_NAME, get_blob_service_client
+
+# 메타데이터 저장소 설정
+# METADATA_STORE_DIR 이 지정되면 로컬 폴더, 아니면 Blob 컨테이너(BLOB_CSV_CONTAINER_NAME)에 저장
+METADATA_STORE_DIR = os.getenv("METADATA_STORE_DIR", "")
+METADATA_FLUSH_ROWS = int(os.getenv("METADATA_FLUSH_ROWS", "50"))
+METADATA_FLUSH_INTERVAL_SECONDS = float(os.getenv("METADATA_FLUSH_INTERVAL_SECONDS", "30"))
+METADATA_COMPACT_SEGMENTS = int(os.getenv("METADATA_COMPACT_SEGMENTS", "20"))
+
+SEGMENT_PREFIX = "segments/"
+MANIFEST_PREFIX = "manifests/"
+
+
+# Blob 컨테이너 저장소
+class BlobMetadataBackend:
+    def __init__(self, container_name=BLOB_CSV_CONTAINER_NAME):
+        self.container_name = container_name
+
+    def _container(self):
+        return get_blob_service_client().get_container_client(self.container_name)
+
+    def list(self, prefix):
+        return sorted(blob.name for blob in self._container().list_blobs(name_starts_with=prefix))
+
+    def read(self, name):
+        return self._container().get_blob_client(name).download_blob().readall()
+
+    def write(self, name, data):
+        self._container().upload_blob(name=name, data=data, overwrite=True)
+
+    def delete(self, name):
+        self._container().get_blob_client(name).delete_blob()
+
+
+# 로컬 폴더 저장소 (일괄 처리, 벤치마크, 오프라인 실행용)
+class LocalMetadataBackend:
+    def __init__(self, directory):
+        self.directory = directory
+
+    def _path(self, name):
+        return os.path.join(self.directory, *name.split("/"))
+
+    def list(self, prefix):
+        folder = os.path.dirname(self._path(prefix))
+        if not os.path.isdir(folder):
+            return []
+        base = prefix.rsplit("/", 1)[0] + "/" if "/" in prefix else ""
+        return sorted(
+            base + name
+            for name in os.listdir(folder)
+            if (base + name).startswith(prefix) and not name.endswith(".tmp")
+        )
+
+    def read(self, name):
+        with open(self._path(name), "rb") as f:
+            return f.read()
+
+    def write(self, name, data):
+        path = self._path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def delete(self, name):
+        try:
+            os.remove(self._path(name))
+        except FileNotFoundError:
+            pass
+
+
+def _encode_rows(rows):
+    return "".join(json.dumps(row, ensure_ascii=False) + "\n" for row in rows).encode("utf-8")
+
+
+def _decode_rows(data):
+    return [json.loads(line) for line in data.decode("utf-8").splitlines() if line.strip()]
+
+
+# 시간 순으로 정렬되는 객체 이름 생성
+def _object_name(prefix):
+    return f"{prefix}{time.time_ns():020d}-{uuid.uuid4().hex[:8]}.jsonl"
+
+
+# 문서 메타데이터 저장소
+# 행을 모아 두었다가 한 번에 append-only JSONL 세그먼트로 저장하고,
+# 세그먼트가 쌓이면 압축(compaction)하여 큰 매니페스트 파일 몇 개로 합침
+class MetadataStore:
+    def __init__(
+        self,
+        backend,
+        flush_rows=METADATA_FLUSH_ROWS,
+        flush_interval=METADATA_FLUSH_INTERVAL_SECONDS,
+        compact_segments=METADATA_COMPACT_SEGMENTS,
+    ):
+        self.backend = backend
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.compact_segments = compact_segments
+        self._pending = []
+        self._lock = threading.Lock()
+        self._timer = None
+
+    # 행 추가 (일정 개수가 쌓이거나 일정 시간이 지나면 저장)
+    def append(self, row):
+        row = dict(row)
+        row.setdefault("updated_at", datetime.now(timezone.utc).isoformat())
+
+        with self._lock:
+            self._pending.append(row)
+            should_flush = len(self._pending) >= self.flush_rows
+            if not should_flush and self._timer is None and self.flush_interval > 0:
+                self._timer = threading.Timer(self.flush_interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+        if should_flush:
+            self.flush()
+
+    # 모아 둔 행을 세그먼트 하나로 저장 (세그먼트가 많이 쌓였으면 압축)
+    def flush(self, compact=True):
+        with self._lock:
+            rows = self._pending
+            self._pending = []
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+        if not rows:
+            return None
+
+        name = _object_name(SEGMENT_PREFIX)
+        try:
+            self.backend.write(name, _encode_rows(rows))
+        except Exception:
+            # 저장에 실패한 행은 다음 flush 때 다시 시도
+            with self._lock:
+                self._pending[:0] = rows
+            raise
+
+        if (
+            compact
+            and self.compact_segments
+            and len(self.backend.list(SEGMENT_PREFIX)) >= self.compact_segments
+        ):
+            self.compact()
+        return name
+
+    # 매니페스트와 세그먼트를 읽어 id 기준으로 병합 (나중에 수정된 행 우선)
+    def _read_merged(self):
+        manifests = self.backend.list(MANIFEST_PREFIX)
+        segments = self.backend.list(SEGMENT_PREFIX)
+
+        rows = {}
+        for name in manifests + segments:
+            try:
+                data = self.backend.read(name)
+            except Exception:
+                # 다른 프로세스가 압축하면서 지운 세그먼트는 이미 매니페스트에 반영됨
+                continue
+            for row in _decode_rows(data):
+                current = rows.get(row["id"])
+                if current is None or row.get("updated_at", "") >= current.get("updated_at", ""):
+                    rows[row["id"]] = row
+        return rows, manifests, segments
+
+    # 세그먼트 압축: 전체를 새 매니페스트 하나로 쓰고, 읽어 들인 이전 파일은 삭제
+    # 동시에 여러 프로세스가 압축해도 load_all 은 남은 매니페스트를 모두 병합하므로 행이 사라지지 않음
+    def compact(self):
+        self.flush(compact=False)
+        rows, manifests, segments = self._read_merged()
+        if len(manifests) + len(segments) <= 1:
+            return None
+
+        name = _object_name(MANIFEST_PREFIX)
+        self.backend.write(name, _encode_rows(sorted(rows.values(), key=lambda r: r["id"])))
+        for old in manifests + segments:
+            self.backend.delete(old)
+        return name
+
+    # 전체 메타데이터 로딩 (작은 파일 수천 개 대신 매니페스트 몇 개와 최근 세그먼트만 읽음)
+    def load_all(self):
+        rows, _, _ = self._read_merged()
+        with self._lock:
+            for row in self._pending:
+                rows[row["id"]] = row
+        return MetadataIndex(rows.values())
+
+
+# id / 내용 해시 기준 조회용 인덱스
+class MetadataIndex:
+    def __init__(self, rows):
+        self.by_id = {}
+        self.by_hash = {}
+        for row in rows:
+            self.by_id[row["id"]] = row
+            if row.get("content_hash"):
+                self.by_hash[row["content_hash"]] = row
+
+    def __len__(self):
+        return len(self.by_id)
+
+    def __iter__(self):
+        return iter(self.by_id.values())
+
+    def get(self, document_id):
+        return self.by_id.get(document_id)
+
+    def get_by_hash(self, content_hash):
+        return self.by_hash.get(content_hash)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+# 프로세스 공유 메타데이터 저장소
+def get_metadata_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                if METADATA_STORE_DIR:
+                    backend = LocalMetadataBackend(METADATA_STORE_DIR)
+                else:
+                    backend = BlobMetadataBackend()
+                _store = MetadataStore(backend)
+                # 프로세스 종료 시 남은 행 저장
+                atexit.register(_store.flush, compact=False)
+    return _store
+
+
+# 사용법: python metadata_store.py [compact|count]
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "count"
+    store = get_metadata_store()
+    if command == "compact":
+        print(store.compact() or "압축할 세그먼트가 없습니다.")
+    else:
+        print(len(store.load_all()))
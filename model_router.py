@@ -0,0 +1,72 @@
+import os
+from collections import namedtuple
+
+from chunking import estimate_tokens
+from clients import openai_name
+
+# 모델 등급별 deployment
+# small 을 지정하지 않으면 모든 작업이 기존 deployment(AZURE_OPENAI_DEPLOYMENT_NAME) 하나를 사용
+MODEL_TIERS = {
+    "small": os.getenv("AZURE_OPENAI_SMALL_DEPLOYMENT_NAME") or openai_name,
+    "large": openai_name,
+}
+# small 등급 작업이라도 입력이 이 토큰 수를 넘으면 large 등급으로 올려서 처리
+MODEL_ESCALATION_TOKENS = int(os.getenv("MODEL_ESCALATION_TOKENS", "6000"))
+
+# 작업별 기본 등급과 출력 토큰 예산
+# 예산 = 입력 토큰 수 x ratio 를 (min_tokens, max_tokens) 범위로 자른 값
+# 항목 수에 비례하는 작업(키워드, 체크리스트, 피드백 묶음)은 범위에 항목 수(scale)를 곱함
+# max_tokens 가 None 이면 출력 길이를 제한하지 않음
+TaskRoute = namedtuple("TaskRoute", "tier min_tokens ratio max_tokens")
+
+TASK_ROUTES = {
+    "topic": TaskRoute("small", 40, 0.02, 100),
+    "keywords": TaskRoute("small", 10, 0.05, 60),
+    "chunk_summary": TaskRoute("small", 150, 0.25, 600),
+    "checklist_suggest": TaskRoute("small", 60, 0.5, 200),
+    "chat_summary": TaskRoute("small", 100, 0.3, 300),
+    "summary": TaskRoute("large", 150, 0.5, 300),
+    "checklist": TaskRoute("large", 60, 0.1, 100),
+    "similar": TaskRoute("large", None, None, None),
+}
+
+# 라우팅 결과 (GPT 호출 기록에 등급 / deployment / 예산과 함께 남김)
+Route = namedtuple("Route", "task tier model max_tokens input_tokens escalated")
+
+
+# 작업의 기본 등급 (MODEL_TIER_<작업 이름> 환경변수로 변경, 예: MODEL_TIER_SUMMARY=small)
+def task_tier(task):
+    tier = os.getenv(f"MODEL_TIER_{task.upper()}", TASK_ROUTES[task].tier)
+    return tier if tier in MODEL_TIERS else TASK_ROUTES[task].tier
+
+
+# 작업에 사용할 deployment 와 출력 토큰 예산 결정
+# text: 모델에 보내는 입력 (문자열 또는 메시지 목록), limit: 호출하는 쪽에서 정한 출력 토큰 상한
+def route_task(task, text, scale=1, limit=None):
+    if isinstance(text, str):
+        input_tokens = estimate_tokens(text)
+    else:
+        input_tokens = sum(estimate_tokens(message.get("content") or "") for message in text)
+
+    config = TASK_ROUTES[task]
+    tier = task_tier(task)
+    escalated = tier == "small" and input_tokens > MODEL_ESCALATION_TOKENS
+    if escalated:
+        tier = "large"
+
+    max_tokens = None
+    if config.max_tokens is not None:
+        max_tokens = min(
+            config.max_tokens * scale,
+            max(config.min_tokens * scale, int(input_tokens * config.ratio)),
+        )
+    if limit is not None:
+        max_tokens = min(max_tokens or limit, limit)
+    return Route(task, tier, MODEL_TIERS[tier], max_tokens, input_tokens, escalated)
+
+
+# 캐시 키에 넣는 라우팅 설정 (deployment 나 작업별 등급이 바뀌면 캐시 키도 바뀜)
+def routing_version(*tasks):
+    parts = [f"{task}={task_tier(task)}" for task in tasks]
+    parts += [f"{tier}={name}" for tier, name in sorted(MODEL_TIERS.items())]
+    return ",".join(parts)
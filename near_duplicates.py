@@ -0,0 +1,209 @@
+import os
+import re
+import time
+import zlib
+import difflib
+import hashlib
+import sqlite3
+
+import numpy as np
+
+# 거의 같은 문서 찾기 설정
+# 추출한 텍스트의 글자 shingle 로 MinHash 서명을 만들고 LSH 밴드로 후보를 찾은 뒤
+# 후보만 실제 Jaccard 유사도를 계산 (문서 수가 늘어도 조회 비용은 후보 수에 비례)
+NEAR_DUPLICATE_INDEX_PATH = os.getenv("NEAR_DUPLICATE_INDEX_PATH", ".cache/near_duplicates.sqlite3")
+# 같은 양식으로 작성된 서로 다른 문서도 0.9 이상이 나올 수 있어 높게 설정
+NEAR_DUPLICATE_THRESHOLD = float(os.getenv("NEAR_DUPLICATE_THRESHOLD", "0.95"))
+NEAR_DUPLICATE_SHINGLE_SIZE = 5
+# MinHash 순열 수 = 밴드 수 x 밴드당 행 수 (후보가 되는 유사도 기준 약 (1/16)^(1/8) = 0.71)
+NEAR_DUPLICATE_BANDS = 16
+NEAR_DUPLICATE_ROWS = 8
+# 화면에 보여 주는 다른 줄 수
+NEAR_DUPLICATE_DIFF_LINES = 20
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+# 긴 문서의 서명을 계산할 때 한 번에 처리하는 shingle 수 (메모리 제한)
+_SIGNATURE_BLOCK = 4096
+
+
+def normalize_text(text):
+    return " ".join(re.sub(r"[^\w]+", " ", (text or "").lower()).split())
+
+
+def _shingle_hashes(normalized, size=NEAR_DUPLICATE_SHINGLE_SIZE):
+    if len(normalized) <= size:
+        shingles = {normalized} if normalized else set()
+    else:
+        shingles = {normalized[i : i + size] for i in range(len(normalized) - size + 1)}
+    return np.unique(np.array([zlib.crc32(s.encode("utf-8")) for s in shingles], dtype=np.uint64))
+
+
+def jaccard(a, b):
+    if not len(a) and not len(b):
+        return 1.0
+    intersection = len(np.intersect1d(a, b, assume_unique=True))
+    return intersection / (len(a) + len(b) - intersection)
+
+
+# 다른 줄 목록 (원본에만 있는 줄은 "-", 새 문서에만 있는 줄은 "+")
+def diff_lines(original, content, limit=NEAR_DUPLICATE_DIFF_LINES):
+    lines = [
+        line
+        for line in difflib.ndiff(
+            [l.strip() for l in original.splitlines() if l.strip()],
+            [l.strip() for l in content.splitlines() if l.strip()],
+        )
+        if line[:1] in ("-", "+")
+    ]
+    return lines[:limit]
+
+
+# 거의 같은 문서 인덱스 (여러 Streamlit 워커 프로세스가 같은 SQLite 파일을 공유)
+# key 는 분석 캐시 키라서 찾은 문서의 분석 결과를 캐시에서 바로 가져올 수 있음
+class NearDuplicateIndex:
+    def __init__(
+        self,
+        path=NEAR_DUPLICATE_INDEX_PATH,
+        threshold=NEAR_DUPLICATE_THRESHOLD,
+        bands=NEAR_DUPLICATE_BANDS,
+        rows=NEAR_DUPLICATE_ROWS,
+    ):
+        self.path = path
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = rows
+
+        # 순열 계수는 고정 시드로 생성 (저장된 서명과 항상 같은 순열)
+        generator = np.random.RandomState(1)
+        count = bands * rows
+        self._a = generator.randint(1, 1 << 61, size=count, dtype=np.uint64)
+        self._b = generator.randint(0, 1 << 61, size=count, dtype=np.uint64)
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS near_duplicates (
+                    key TEXT PRIMARY KEY,
+                    filename TEXT NOT NULL,
+                    document_id TEXT NOT NULL,
+                    link TEXT NOT NULL,
+                    signature BLOB NOT NULL,
+                    content BLOB NOT NULL,
+                    created_at REAL NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS near_duplicate_bands (
+                    band INTEGER NOT NULL,
+                    bucket INTEGER NOT NULL,
+                    key TEXT NOT NULL,
+                    PRIMARY KEY (band, bucket, key)
+                )
+                """
+            )
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def signature(self, hashes):
+        signature = np.full(len(self._a), _MAX_HASH, dtype=np.uint64)
+        for start in range(0, len(hashes), _SIGNATURE_BLOCK):
+            block = hashes[start : start + _SIGNATURE_BLOCK, None]
+            # uint64 곱셈의 overflow 는 의도된 것 (datasketch 와 같은 방식)
+            with np.errstate(over="ignore"):
+                values = ((block * self._a + self._b) % _MERSENNE_PRIME) & _MAX_HASH
+            signature = np.minimum(signature, values.min(axis=0))
+        return signature
+
+    def _buckets(self, signature):
+        for band in range(self.bands):
+            part = signature[band * self.rows : (band + 1) * self.rows].tobytes()
+            digest = hashlib.blake2b(part, digest_size=8).digest()
+            yield band, int.from_bytes(digest, "little", signed=True)
+
+    # 분석이 끝난 문서 추가
+    def add(self, key, content, filename, document_id="", link=""):
+        normalized = normalize_text(content)
+        signature = self.signature(_shingle_hashes(normalized))
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO near_duplicates "
+                    "(key, filename, document_id, link, signature, content, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        key,
+                        filename,
+                        document_id or "",
+                        link or "",
+                        signature.tobytes(),
+                        zlib.compress(content.encode("utf-8")),
+                        time.time(),
+                    ),
+                )
+                conn.executemany(
+                    "INSERT OR IGNORE INTO near_duplicate_bands (band, bucket, key) VALUES (?, ?, ?)",
+                    [(band, bucket, key) for band, bucket in self._buckets(signature)],
+                )
+        finally:
+            conn.close()
+
+    # 가장 비슷한 문서 (threshold 이상인 문서가 없으면 None)
+    # exclude_key: 같은 내용의 문서(분석 캐시에서 찾을 수 있는 문서)는 제외
+    def find(self, content, exclude_key=None):
+        hashes = _shingle_hashes(normalize_text(content))
+        signature = self.signature(hashes)
+        conn = self._connect()
+        try:
+            candidates = set()
+            for band, bucket in self._buckets(signature):
+                candidates.update(
+                    row[0]
+                    for row in conn.execute(
+                        "SELECT key FROM near_duplicate_bands WHERE band = ? AND bucket = ?",
+                        (band, bucket),
+                    )
+                )
+            candidates.discard(exclude_key)
+
+            best = None
+            for key in candidates:
+                row = conn.execute(
+                    "SELECT filename, document_id, link, signature, content FROM near_duplicates "
+                    "WHERE key = ?",
+                    (key,),
+                ).fetchone()
+                if row is None:
+                    continue
+                # 서명으로 추정한 유사도가 기준보다 많이 낮으면 원문 비교 생략
+                estimate = float(np.mean(np.frombuffer(row[3], dtype=np.uint64) == signature))
+                if estimate < self.threshold - 0.15:
+                    continue
+                original = zlib.decompress(row[4]).decode("utf-8")
+                similarity = jaccard(hashes, _shingle_hashes(normalize_text(original)))
+                if similarity >= self.threshold and (best is None or similarity > best["similarity"]):
+                    best = {
+                        "key": key,
+                        "filename": row[0],
+                        "document_id": row[1],
+                        "link": row[2],
+                        "similarity": similarity,
+                        "original": original,
+                    }
+        finally:
+            conn.close()
+
+        if best is not None:
+            best["diff"] = diff_lines(best.pop("original"), content)
+        return best
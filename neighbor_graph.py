@@ -0,0 +1,262 @@
+import os
+import json
+import threading
+from collections import Counter
+
+import numpy as np
+
+from vector_index import get_vector_index
+
+# Windows 에는 fcntl 이 없으므로 파일 잠금 없이 동작
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# 문서 이웃 그래프 설정
+# 벡터 인덱스의 모든 문서에 대해 가장 비슷한 문서 k 개를 미리 계산해 두고 문서가 추가될 때마다 갱신
+# (유사 문서 조회는 계산 없이 그래프에서 읽기만 함)
+NEIGHBOR_GRAPH_K = int(os.getenv("NEIGHBOR_GRAPH_K", "10"))
+# 서로 상위 k 이웃이면서 유사도가 이 값 이상인 문서를 같은 주제 군집으로 묶음
+NEIGHBOR_CLUSTER_THRESHOLD = float(os.getenv("NEIGHBOR_CLUSTER_THRESHOLD", "0.8"))
+# 유사도 행렬을 계산할 때의 블록 크기 (블록 하나의 점수 행렬이 2048 x 2048 float32 = 16MB)
+GRAPH_BLOCK_ROWS = 2048
+
+
+def _merge_top_k(best_index, best_scores, index, scores, k):
+    best_index = np.concatenate([best_index, index], axis=1)
+    best_scores = np.concatenate([best_scores, scores], axis=1)
+    if best_scores.shape[1] > k:
+        keep = np.argpartition(-best_scores, k - 1, axis=1)[:, :k]
+        best_index = np.take_along_axis(best_index, keep, axis=1)
+        best_scores = np.take_along_axis(best_scores, keep, axis=1)
+    return best_index, best_scores
+
+
+# 문서 이웃 그래프
+# 행 i 는 벡터 인덱스의 i 번째 문서이고, 이웃 번호(int32)와 유사도(float16)를 k 개씩 파일에 저장
+# (10만 건, k=10 이면 약 6MB / 계산은 블록 단위라서 문서 수가 늘어도 메모리 사용량 일정)
+class NeighborGraph:
+    def __init__(self, index=None, k=NEIGHBOR_GRAPH_K):
+        # 빈 인덱스도 len() 이 0 이라 거짓이므로 None 인지로 확인
+        self.index = index if index is not None else get_vector_index()
+        self.k = k
+        directory = self.index.directory
+        self._neighbors_path = os.path.join(directory, "neighbors.i32")
+        self._scores_path = os.path.join(directory, "neighbor_scores.f16")
+        self._info_path = os.path.join(directory, "neighbors.json")
+        self._lock_path = os.path.join(directory, "neighbors.lock")
+        self._lock = threading.Lock()
+        self._rows_by_id = {}
+
+    def _rows(self):
+        if not os.path.exists(self._neighbors_path):
+            return 0
+        return min(
+            os.path.getsize(self._neighbors_path) // (self.k * 4),
+            os.path.getsize(self._scores_path) // (self.k * 2),
+        )
+
+    # 이웃 파일만 쓰고 멈춘 프로세스가 남긴 행을 잘라 두 파일의 행 수를 맞춤
+    # (맞추지 않으면 다음에 추가하는 행부터 이웃 번호와 유사도가 서로 다른 문서의 것이 됨)
+    def _truncate(self, rows):
+        for path, itemsize in ((self._neighbors_path, 4), (self._scores_path, 2)):
+            if os.path.exists(path) and os.path.getsize(path) > rows * self.k * itemsize:
+                os.truncate(path, rows * self.k * itemsize)
+
+    def _open(self, rows, mode="r"):
+        neighbors = np.memmap(self._neighbors_path, dtype=np.int32, mode=mode, shape=(rows, self.k))
+        scores = np.memmap(self._scores_path, dtype=np.float16, mode=mode, shape=(rows, self.k))
+        return neighbors, scores
+
+    # queries(행 번호 offset 부터)의 top-k 이웃을 columns 범위의 문서에서 찾음 (자기 자신 제외)
+    def _top_k(self, matrix, queries, offset, columns):
+        best_index = np.zeros((len(queries), 0), dtype=np.int32)
+        best_scores = np.zeros((len(queries), 0), dtype=np.float32)
+        rows = np.arange(offset, offset + len(queries))[:, None]
+        for start in range(columns.start, columns.stop, GRAPH_BLOCK_ROWS):
+            stop = min(start + GRAPH_BLOCK_ROWS, columns.stop)
+            scores = queries @ np.asarray(matrix[start:stop]).T
+            scores[rows == np.arange(start, stop)[None, :]] = -np.inf
+            # 블록 안에서 먼저 k 개로 줄인 뒤 지금까지의 후보와 합침
+            top = min(self.k, scores.shape[1])
+            index = np.argpartition(-scores, top - 1, axis=1)[:, :top]
+            best_index, best_scores = _merge_top_k(
+                best_index,
+                best_scores,
+                (index + start).astype(np.int32),
+                np.take_along_axis(scores, index, axis=1),
+                self.k,
+            )
+        return best_index, best_scores
+
+    # 벡터 인덱스에 새로 추가된 문서를 그래프에 반영 (반영한 문서 수 반환)
+    # 새 문서의 이웃을 계산하고, 기존 문서의 이웃 목록에 새 문서가 들어가야 하면 그 행만 고쳐 씀
+    def sync(self):
+        matrix, _ = self.index.snapshot()
+        if matrix is None:
+            return 0
+        total = matrix.shape[0]
+
+        with self._lock, open(self._lock_path, "ab") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                self._check_info()
+                done = self._rows()
+                if done >= total:
+                    return 0
+                self._truncate(done)
+
+                for start in range(done, total, GRAPH_BLOCK_ROWS):
+                    stop = min(start + GRAPH_BLOCK_ROWS, total)
+                    self._update_existing(matrix, start, stop)
+                    self._append(matrix, start, stop)
+                return total - done
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _check_info(self):
+        info = {"k": self.k}
+        if os.path.exists(self._info_path):
+            with open(self._info_path, encoding="utf-8") as f:
+                if json.load(f) == info:
+                    return
+        # k 가 바뀌었으면 처음부터 다시 계산
+        for path in (self._neighbors_path, self._scores_path):
+            if os.path.exists(path):
+                os.remove(path)
+        with open(self._info_path, "w", encoding="utf-8") as f:
+            json.dump(info, f)
+
+    # 기존 행(0 ~ start)의 이웃 목록에 새 문서(start ~ stop) 반영
+    def _update_existing(self, matrix, start, stop):
+        if start == 0:
+            return
+        new = np.asarray(matrix[start:stop])
+        neighbors, scores = self._open(start, mode="r+")
+        index = np.arange(start, stop, dtype=np.int32)[None, :]
+        for block_start in range(0, start, GRAPH_BLOCK_ROWS):
+            block_stop = min(block_start + GRAPH_BLOCK_ROWS, start)
+            new_scores = np.asarray(matrix[block_start:block_stop]) @ new.T
+            current = scores[block_start:block_stop].astype(np.float32)
+            # 새 문서가 기존 이웃보다 가까운 행만 다시 씀
+            changed = np.flatnonzero(new_scores.max(axis=1) > current.min(axis=1))
+            if not len(changed):
+                continue
+            best_index, best_scores = _merge_top_k(
+                neighbors[block_start:block_stop][changed],
+                current[changed],
+                np.broadcast_to(index, (len(changed), index.shape[1])),
+                new_scores[changed],
+                self.k,
+            )
+            order = np.argsort(-best_scores, axis=1)
+            neighbors[block_start + changed] = np.take_along_axis(best_index, order, axis=1)
+            scores[block_start + changed] = np.take_along_axis(best_scores, order, axis=1)
+        neighbors.flush()
+        scores.flush()
+
+    # 새 문서(start ~ stop)의 이웃 목록을 파일 끝에 추가 (이웃이 k 개보다 적으면 -1 로 채움)
+    def _append(self, matrix, start, stop):
+        queries = np.asarray(matrix[start:stop])
+        best_index, best_scores = self._top_k(matrix, queries, start, range(0, stop))
+        padded_index = np.full((len(queries), self.k), -1, dtype=np.int32)
+        padded_scores = np.full((len(queries), self.k), -np.inf, dtype=np.float32)
+        order = np.argsort(-best_scores, axis=1)
+        width = best_index.shape[1]
+        padded_index[:, :width] = np.take_along_axis(best_index, order, axis=1)
+        padded_scores[:, :width] = np.take_along_axis(best_scores, order, axis=1)
+        # 문서가 k 개보다 적을 때 후보에 섞인 자기 자신(-inf) 제외
+        padded_index[np.isneginf(padded_scores)] = -1
+        with open(self._neighbors_path, "ab") as f:
+            f.write(padded_index.tobytes())
+        with open(self._scores_path, "ab") as f:
+            f.write(padded_scores.astype(np.float16).tobytes())
+
+    # 이웃 번호 / 유사도 배열과 벡터 인덱스 항목 목록
+    def load(self):
+        _, records = self.index.snapshot()
+        rows = min(self._rows(), len(records))
+        if rows == 0:
+            return np.zeros((0, self.k), np.int32), np.zeros((0, self.k), np.float16), records
+        neighbors, scores = self._open(rows)
+        return neighbors, scores, records
+
+    # 문서의 이웃 목록 (벡터 인덱스 항목 + score, 그래프에 없으면 빈 목록)
+    def neighbors(self, document_id, k=None):
+        neighbors, scores, records = self.load()
+        with self._lock:
+            for i in range(len(self._rows_by_id), len(records)):
+                self._rows_by_id[records[i]["id"]] = i
+            row = self._rows_by_id.get(document_id)
+        if row is None or row >= len(neighbors):
+            return []
+        return [
+            dict(records[j], score=float(score))
+            for j, score in zip(neighbors[row][: k or self.k], scores[row][: k or self.k])
+            if j >= 0
+        ]
+
+    # 주제 군집: 서로 상위 이웃이면서 유사도가 threshold 이상인 문서를 union-find 로 묶음
+    # 문서 2개 이상인 군집만 [{"documents": [항목...], "size": n}] 형태로 큰 순서대로 반환
+    def clusters(self, threshold=NEIGHBOR_CLUSTER_THRESHOLD):
+        neighbors, scores, records = self.load()
+        rows = len(neighbors)
+        neighbors = np.asarray(neighbors, dtype=np.int64)
+
+        # 서로 이웃인 간선만 사용 (한쪽만 가까운 간선으로 군집이 사슬처럼 커지는 것을 막음)
+        close = np.asarray(scores, dtype=np.float32) >= threshold
+        source, column = np.nonzero(close & (neighbors >= 0))
+        target = neighbors[source, column]
+        forward = source * rows + target
+        mutual = (source < target) & np.isin(forward, target * rows + source)
+
+        parent = list(range(rows))
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        for i, j in zip(source[mutual].tolist(), target[mutual].tolist()):
+            parent[find(i)] = find(j)
+
+        members = {}
+        for i in range(rows):
+            members.setdefault(find(i), []).append(records[i])
+        groups = [
+            {"documents": documents, "size": len(documents)}
+            for documents in members.values()
+            if len(documents) > 1
+        ]
+        return sorted(groups, key=lambda group: group["size"], reverse=True)
+
+
+# 군집 이름 (구성 문서의 키워드 중 많이 나온 순서)
+def cluster_keywords(documents, metadata, top=3):
+    counts = Counter()
+    for document in documents:
+        row = (
+            metadata.get_by_hash(document["id"])
+            or metadata.get(document.get("document_id"))
+            or {}
+        )
+        counts.update(k.strip() for k in (row.get("keywords") or "").split(",") if k.strip())
+    return [keyword for keyword, _ in counts.most_common(top)]
+
+
+_graph = None
+_graph_lock = threading.Lock()
+
+
+# 프로세스 공유 문서 이웃 그래프
+def get_neighbor_graph():
+    global _graph
+    if _graph is None:
+        with _graph_lock:
+            if _graph is None:
+                _graph = NeighborGraph()
+    return _graph
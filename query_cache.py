@@ -0,0 +1,180 @@
+import os
+import json
+import time
+import sqlite3
+
+import numpy as np
+
+from vector_index import get_embedding_provider
+
+# 문서 검색 질문 캐시 설정 (비슷한 질문에는 이전 답변을 재사용)
+QUERY_CACHE_PATH = os.getenv("QUERY_CACHE_PATH", ".cache/query_cache.sqlite3")
+QUERY_CACHE_THRESHOLD = float(os.getenv("QUERY_CACHE_THRESHOLD", "0.92"))
+QUERY_CACHE_TTL_SECONDS = int(os.getenv("QUERY_CACHE_TTL_SECONDS", str(24 * 3600)))
+QUERY_CACHE_MAX_ENTRIES = int(os.getenv("QUERY_CACHE_MAX_ENTRIES", "1000"))
+
+
+# 질문 임베딩 기반 답변 캐시
+# 질문 벡터와 코사인 유사도가 threshold 이상인 이전 질문이 있으면 그 답변과 출처를 반환
+# 새 문서가 추가되면 invalidate() 로 비워서 예전 문서 목록으로 만든 답변을 다시 쓰지 않음
+class SemanticQueryCache:
+    def __init__(
+        self,
+        path=QUERY_CACHE_PATH,
+        threshold=QUERY_CACHE_THRESHOLD,
+        ttl_seconds=QUERY_CACHE_TTL_SECONDS,
+        max_entries=QUERY_CACHE_MAX_ENTRIES,
+        provider=None,
+    ):
+        self.path = path
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._provider = provider
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS query_cache (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    provider TEXT NOT NULL,
+                    question TEXT NOT NULL,
+                    vector BLOB NOT NULL,
+                    answer TEXT NOT NULL,
+                    sources TEXT NOT NULL,
+                    latency REAL NOT NULL,
+                    created_at REAL NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS query_cache_stats (
+                    name TEXT PRIMARY KEY,
+                    value REAL NOT NULL
+                )
+                """
+            )
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    # 임베딩 제공자는 처음 사용할 때 생성 (벡터 인덱스와 같은 제공자)
+    @property
+    def provider(self):
+        if self._provider is None:
+            self._provider = get_embedding_provider()
+        return self._provider
+
+    def embed(self, question):
+        return np.asarray(self.provider.embed([question])[0], dtype=np.float32)
+
+    def _add_stats(self, conn, **values):
+        for name, value in values.items():
+            conn.execute(
+                "INSERT INTO query_cache_stats (name, value) VALUES (?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+                (name, value),
+            )
+
+    # 캐시 조회: (캐시 항목 또는 None, 질문 벡터) 반환
+    # 질문 벡터는 캐시에 없을 때 store() 에 그대로 넘겨서 다시 임베딩하지 않음
+    def lookup(self, question):
+        vector = self.embed(question)
+        now = time.time()
+        conn = self._connect()
+        try:
+            with conn:
+                rows = conn.execute(
+                    "SELECT id, question, vector, answer, sources, latency FROM query_cache "
+                    "WHERE provider = ? AND created_at >= ?",
+                    (self.provider.name, now - self.ttl_seconds if self.ttl_seconds else 0),
+                ).fetchall()
+
+                entry = None
+                if rows:
+                    matrix = np.stack([np.frombuffer(row[2], dtype=np.float32) for row in rows])
+                    scores = matrix @ vector
+                    best = int(np.argmax(scores))
+                    if scores[best] >= self.threshold:
+                        row = rows[best]
+                        entry = {
+                            "question": row[1],
+                            "answer": row[3],
+                            "sources": json.loads(row[4]),
+                            "score": float(scores[best]),
+                            "latency": row[5],
+                        }
+
+                if entry is None:
+                    self._add_stats(conn, misses=1)
+                else:
+                    self._add_stats(conn, hits=1, saved_seconds=entry["latency"])
+            return entry, vector
+        finally:
+            conn.close()
+
+    # 답변 저장 (latency: 원래 답변에 걸린 시간, 캐시 적중 시 절약된 시간으로 집계)
+    def store(self, question, vector, answer, sources=(), latency=0.0):
+        now = time.time()
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT INTO query_cache "
+                    "(provider, question, vector, answer, sources, latency, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        self.provider.name,
+                        question,
+                        np.asarray(vector, dtype=np.float32).tobytes(),
+                        answer,
+                        json.dumps(list(sources), ensure_ascii=False),
+                        latency,
+                        now,
+                    ),
+                )
+                if self.ttl_seconds:
+                    conn.execute(
+                        "DELETE FROM query_cache WHERE created_at < ?", (now - self.ttl_seconds,)
+                    )
+                if self.max_entries:
+                    conn.execute(
+                        "DELETE FROM query_cache WHERE id NOT IN "
+                        "(SELECT id FROM query_cache ORDER BY id DESC LIMIT ?)",
+                        (self.max_entries,),
+                    )
+        finally:
+            conn.close()
+
+    # 새 문서가 추가되면 캐시된 답변을 모두 삭제
+    def invalidate(self):
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("DELETE FROM query_cache")
+        finally:
+            conn.close()
+
+    # 적중률과 절약된 시간 (워커 프로세스 전체 누적)
+    def stats(self):
+        conn = self._connect()
+        try:
+            values = dict(conn.execute("SELECT name, value FROM query_cache_stats").fetchall())
+        finally:
+            conn.close()
+        hits = int(values.get("hits", 0))
+        misses = int(values.get("misses", 0))
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+            "saved_seconds": values.get("saved_seconds", 0.0),
+        }
@@ -0,0 +1,224 @@
+import os
+import time
+import threading
+
+import numpy as np
+
+from clients import get_search_client, search_endpoint
+from metadata_store import get_metadata_store
+from vector_index import HashingEmbeddingProvider, get_embedding_provider
+
+# 문서 검색 방식: azure (Azure AI Search 하이브리드 검색) / local (프로세스 내 인덱스, 오프라인/테스트용)
+RETRIEVAL_BACKEND = os.getenv("RETRIEVAL_BACKEND", "azure" if search_endpoint else "local")
+RETRIEVAL_TOP_K = int(os.getenv("RETRIEVAL_TOP_K", "5"))
+# local 방식 검색기를 메타데이터 저장소에서 다시 읽어 만드는 주기 (초, 다른 프로세스가 저장한 문서 반영)
+# 이 프로세스에서 저장한 문서는 add_retrieval_document 로 바로 추가
+RETRIEVAL_REFRESH_SECONDS = float(os.getenv("RETRIEVAL_REFRESH_SECONDS", "300"))
+
+# Azure AI Search 인덱스 필드 이름
+SEARCH_ID_FIELD = os.getenv("SEARCH_ID_FIELD", "id")
+SEARCH_TITLE_FIELD = os.getenv("SEARCH_TITLE_FIELD", "title")
+SEARCH_CONTENT_FIELD = os.getenv("SEARCH_CONTENT_FIELD", "content")
+SEARCH_URL_FIELD = os.getenv("SEARCH_URL_FIELD", "url")
+SEARCH_VECTOR_FIELD = os.getenv("SEARCH_VECTOR_FIELD", "contentVector")
+
+# Reciprocal Rank Fusion 상수 (Azure AI Search 하이브리드 검색과 같은 값)
+RRF_K = 60
+
+
+# 검색 결과 문서
+class SearchResult:
+    def __init__(self, id, title="", url="", content="", score=None):
+        self.id = id
+        self.title = title
+        self.url = url
+        self.content = content
+        self.score = score
+
+    # 유사 문서 카드 / 캐시에 저장하는 형태
+    # 하이브리드 검색 점수는 유사도(%)가 아니므로 relevance 로 저장
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "title": self.title,
+            "link": self.url,
+            "content": self.content,
+            "relevance": self.score,
+        }
+
+
+# Azure AI Search 하이브리드 검색 (키워드 + 벡터 쿼리를 한 번의 요청으로)
+# GPT 를 거치지 않으므로 답변 생성 없이 바로 구조화된 결과를 받음
+class AzureSearchRetriever:
+    def __init__(self, provider=None):
+        self._provider = provider
+        self.select = [SEARCH_ID_FIELD, SEARCH_TITLE_FIELD, SEARCH_URL_FIELD, SEARCH_CONTENT_FIELD]
+
+    @property
+    def provider(self):
+        if self._provider is None:
+            self._provider = get_embedding_provider("azure")
+        return self._provider
+
+    # query: 키워드 검색어 / vector_text: 임베딩할 텍스트 (없으면 query)
+    def search(self, query, k=RETRIEVAL_TOP_K, vector_text=None):
+        from azure.search.documents.models import VectorizedQuery
+
+        vector = self.provider.embed([vector_text or query])[0]
+        results = get_search_client().search(
+            search_text=query,
+            vector_queries=[
+                VectorizedQuery(
+                    vector=vector.tolist(), k_nearest_neighbors=k, fields=SEARCH_VECTOR_FIELD
+                )
+            ],
+            select=self.select,
+            top=k,
+        )
+        return [
+            SearchResult(
+                id=result.get(SEARCH_ID_FIELD),
+                title=result.get(SEARCH_TITLE_FIELD) or "",
+                url=result.get(SEARCH_URL_FIELD) or "",
+                content=result.get(SEARCH_CONTENT_FIELD) or "",
+                score=result.get("@search.score"),
+            )
+            for result in results
+        ]
+
+
+# 메타데이터 행을 검색 인덱스 문서로 변환
+def _metadata_document(row):
+    return {
+        "id": row["id"],
+        "title": row.get("filename", ""),
+        "url": row.get("blob_url", ""),
+        "content": "\n".join(
+            (row.get("topic", ""), row.get("summary", ""), row.get("keywords", ""))
+        ),
+    }
+
+
+# 프로세스 내 하이브리드 검색 인덱스 (Azure AI Search 대신 오프라인 실행 / 테스트에 사용)
+# 벡터 순위와 키워드 일치 순위를 RRF 로 합침
+class LocalRetriever:
+    def __init__(self, documents=(), provider=None):
+        self.provider = provider or HashingEmbeddingProvider()
+        self.documents = []
+        self._matrix = None
+        self._rows = {}
+        self._lock = threading.Lock()
+        self.add(documents)
+
+    # 메타데이터 저장소의 문서로 인덱스 생성
+    @classmethod
+    def from_metadata(cls, rows, provider=None):
+        return cls([_metadata_document(row) for row in rows], provider=provider)
+
+    # documents: id, title, url, content 를 가진 dict 목록 (이미 있는 id 는 새 내용으로 교체)
+    # 검색 중인 스레드가 문서 목록과 행렬을 함께 보도록 새 목록을 만들어 한 번에 바꿈
+    def add(self, documents):
+        documents = list(documents)
+        if not documents:
+            return
+        vectors = self.provider.embed(
+            [f"{document.get('title', '')}\n{document.get('content', '')}" for document in documents]
+        )
+        with self._lock:
+            merged = list(self.documents)
+            rows = dict(self._rows)
+            new_rows = []
+            replaced = {}
+            for document, vector in zip(documents, vectors):
+                row = rows.get(document["id"])
+                if row is None:
+                    row = rows[document["id"]] = len(merged)
+                    merged.append(document)
+                    new_rows.append(vector)
+                else:
+                    merged[row] = document
+                    replaced[row] = vector
+            matrix = self._matrix
+            if replaced:
+                matrix = matrix.copy()
+                for row, vector in replaced.items():
+                    matrix[row] = vector
+            if new_rows:
+                new_rows = np.asarray(new_rows)
+                matrix = new_rows if matrix is None else np.vstack([matrix, new_rows])
+            self.documents, self._matrix, self._rows = merged, matrix, rows
+
+    def _keyword_scores(self, documents, query):
+        terms = {term.lower() for term in query.split() if len(term) > 1}
+        scores = np.zeros(len(documents), dtype=np.float32)
+        for i, document in enumerate(documents):
+            text = f"{document.get('title', '')} {document.get('content', '')}".lower()
+            scores[i] = sum(1 for term in terms if term in text)
+        return scores
+
+    def search(self, query, k=RETRIEVAL_TOP_K, vector_text=None):
+        with self._lock:
+            documents, matrix = self.documents, self._matrix
+        if not documents:
+            return []
+
+        vector = self.provider.embed([vector_text or query])[0]
+        vector_order = np.argsort(-(matrix @ vector))
+        keyword_scores = self._keyword_scores(documents, query)
+        keyword_order = [i for i in np.argsort(-keyword_scores, kind="stable") if keyword_scores[i] > 0]
+
+        fused = {}
+        for order in (vector_order, keyword_order):
+            for rank, i in enumerate(order):
+                fused[int(i)] = fused.get(int(i), 0.0) + 1.0 / (RRF_K + rank + 1)
+
+        best = sorted(fused, key=fused.get, reverse=True)[:k]
+        return [
+            SearchResult(
+                id=documents[i]["id"],
+                title=documents[i].get("title", ""),
+                url=documents[i].get("url", ""),
+                content=documents[i].get("content", ""),
+                score=fused[i],
+            )
+            for i in best
+        ]
+
+
+_retriever = None
+_retriever_lock = threading.Lock()
+_local_retriever = None
+_local_built_at = 0.0
+
+
+# 메타데이터 저장소의 문서로 만든 local 방식 검색기 (질문마다 전체 문서를 다시 임베딩하지 않도록 재사용)
+def _get_local_retriever():
+    global _local_retriever, _local_built_at
+    with _retriever_lock:
+        if (
+            _local_retriever is None
+            or time.monotonic() - _local_built_at > RETRIEVAL_REFRESH_SECONDS
+        ):
+            _local_retriever = LocalRetriever.from_metadata(get_metadata_store().load_all())
+            _local_built_at = time.monotonic()
+        return _local_retriever
+
+
+# 새로 저장한 메타데이터 행을 local 방식 검색기에 반영 (아직 만들지 않았으면 처음 만들 때 읽음)
+def add_retrieval_document(row):
+    with _retriever_lock:
+        retriever = _local_retriever
+    if retriever is not None:
+        retriever.add([_metadata_document(row)])
+
+
+# 문서 검색기
+def get_retriever(backend=RETRIEVAL_BACKEND):
+    global _retriever
+    if backend == "local":
+        return _get_local_retriever()
+    if _retriever is None:
+        with _retriever_lock:
+            if _retriever is None:
+                _retriever = AzureSearchRetriever()
+    return _retriever
@@ -0,0 +1,60 @@
+import os
+from urllib.parse import quote
+
+from clients import BLOB_CONTAINER_NAME, get_blob_service_client
+
+# 큰 파일을 블록 단위로 나누어 동시에 올릴 때의 동시 요청 수
+BLOB_UPLOAD_CONCURRENCY = int(os.getenv("BLOB_UPLOAD_CONCURRENCY", "4"))
+# 원본 파일의 내용 해시를 저장하는 Blob 인덱스 태그 이름
+CONTENT_HASH_TAG = "content_sha256"
+
+
+# 같은 내용(해시)의 Blob 이 이미 있는지 인덱스 태그로 조회
+def find_blob_by_hash(container_client, sha256):
+    for blob in container_client.find_blobs_by_tags(f"\"{CONTENT_HASH_TAG}\" = '{sha256}'"):
+        return blob.name
+    return None
+
+
+# 파일 업로드 처리
+# 분석 파이프라인의 작업 스레드에서 실행되므로 결과 표시는 호출하는 쪽에서 처리
+# 반환값: (Blob 이름, 이미 같은 내용이 있어 업로드를 건너뛰었는지 여부)
+def upload_file_to_blob(buffer, blob_name):
+    container_client = get_blob_service_client().get_container_client(BLOB_CONTAINER_NAME)
+
+    existing = find_blob_by_hash(container_client, buffer.sha256)
+    if existing:
+        return existing, True
+
+    container_client.upload_blob(
+        name=blob_name,
+        data=buffer.open(),
+        length=buffer.size,
+        overwrite=True,
+        tags={CONTENT_HASH_TAG: buffer.sha256},
+        max_concurrency=BLOB_UPLOAD_CONCURRENCY,
+    )
+    return blob_name, False
+
+
+# 원본 문서 Blob URL
+def blob_url(blob_name):
+    account_url = get_blob_service_client().url.rstrip("/")
+    return f"{account_url}/{BLOB_CONTAINER_NAME}/{quote(blob_name)}"
+
+
+# 분석 결과 메타데이터 행 생성
+# blob_name: 원본이 저장된 Blob 이름 (같은 내용의 Blob 이 다른 이름으로 이미 있으면 그 이름, 없으면 파일명)
+def build_metadata_row(
+    document_id, filename, topic, summary, keywords, content_hash="", blob_name=None
+):
+    return {
+        "id": document_id,
+        "filename": filename,
+        "content_hash": content_hash,
+        "topic": topic,
+        "summary": summary,
+        "keywords": ", ".join(keywords),  # 문자열로 저장
+        "blob_url": blob_url(blob_name or filename),
+    }
+
@@ -0,0 +1,57 @@
+import analysis_cache
+from analysis_cache import AnalysisCache, make_cache_key, make_prompt_version
+
+
+def test_cache_key_changes_with_content_prompt_and_model():
+    key = make_cache_key("본문", "v1", "gpt")
+    assert key == make_cache_key("본문", "v1", "gpt")
+    assert key != make_cache_key("본문", "v2", "gpt")
+    assert key != make_cache_key("본문", "v1", "gpt-mini")
+    # 구분 문자로 이어 붙이므로 경계가 달라지면 다른 키
+    assert make_cache_key("ab", "c", "") != make_cache_key("a", "bc", "")
+    assert make_prompt_version("a", "b") != make_prompt_version("ab")
+
+
+def test_get_returns_stored_value(tmp_path):
+    cache = AnalysisCache(path=str(tmp_path / "cache.sqlite3"))
+    assert cache.get("key") is None
+
+    cache.set("key", {"topic": "주제", "keywords": ["a", "b"]})
+    assert cache.get("key") == {"topic": "주제", "keywords": ["a", "b"]}
+
+    cache.delete("key")
+    assert cache.get("key") is None
+
+
+def test_namespaces_do_not_share_entries(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    AnalysisCache(path=path, namespace="analysis").set("key", 1)
+    assert AnalysisCache(path=path, namespace="chunk").get("key") is None
+
+
+def test_expired_entries_are_dropped(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(analysis_cache.time, "time", lambda: now[0])
+    cache = AnalysisCache(path=str(tmp_path / "cache.sqlite3"), ttl_seconds=60)
+    cache.set("key", "value")
+
+    now[0] += 59
+    assert cache.get("key") == "value"
+    now[0] += 2
+    assert cache.get("key") is None
+
+
+def test_least_recently_used_entry_is_evicted(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(analysis_cache.time, "time", lambda: now[0])
+    cache = AnalysisCache(path=str(tmp_path / "cache.sqlite3"), max_entries=2, ttl_seconds=0)
+
+    for key in ("a", "b"):
+        now[0] += 1
+        cache.set(key, key)
+    now[0] += 1
+    cache.get("a")
+    now[0] += 1
+    cache.set("c", "c")
+
+    assert [cache.get(key) for key in ("a", "b", "c")] == ["a", None, "c"]
@@ -0,0 +1,81 @@
+import time
+import threading
+
+import pytest
+
+from analysis_pipeline import DependencyFailed, Stage, run_pipeline
+
+
+def final_results(stages):
+    return {result.name: result for result in run_pipeline(stages) if not result.partial}
+
+
+def test_dependencies_receive_results_as_keyword_arguments():
+    results = final_results(
+        [
+            Stage("content", lambda: "본문"),
+            Stage("topic", lambda content: f"주제({content})", depends=("content",)),
+            Stage(
+                "summary",
+                lambda content, topic: f"{topic}: {content}",
+                depends=("content", "topic"),
+            ),
+        ]
+    )
+    assert results["summary"].value == "주제(본문): 본문"
+    assert all(result.ok for result in results.values())
+
+
+def test_independent_stages_run_concurrently():
+    barrier = threading.Barrier(3, timeout=5)
+
+    def stage():
+        # 세 단계가 동시에 실행되지 않으면 barrier 에서 시간 초과
+        barrier.wait()
+        return True
+
+    results = final_results([Stage(name, stage) for name in ("topic", "summary", "keywords")])
+    assert all(result.value for result in results.values())
+
+
+def test_failure_fails_dependents_only():
+    def fail():
+        raise RuntimeError("boom")
+
+    results = final_results(
+        [
+            Stage("topic", fail),
+            Stage("summary", lambda: "요약"),
+            Stage("checklist", lambda topic: topic, depends=("topic",)),
+        ]
+    )
+    assert isinstance(results["topic"].error, RuntimeError)
+    assert results["summary"].value == "요약"
+    assert isinstance(results["checklist"].error, DependencyFailed)
+
+
+def test_stream_stage_yields_partials_then_joined_value():
+    def summary():
+        for piece in ("가", "나", "다"):
+            time.sleep(0.06)
+            yield piece
+
+    results = list(run_pipeline([Stage("summary", summary, stream=True)]))
+    partials = [result.value for result in results if result.partial]
+
+    assert partials and all("가나다".startswith(value) for value in partials)
+    assert results[-1].value == "가나다" and not results[-1].partial
+
+
+def test_invalid_dependencies_are_rejected():
+    with pytest.raises(ValueError):
+        list(run_pipeline([Stage("topic", lambda missing: None, depends=("missing",))]))
+    with pytest.raises(ValueError):
+        list(
+            run_pipeline(
+                [
+                    Stage("a", lambda b: b, depends=("b",)),
+                    Stage("b", lambda a: a, depends=("a",)),
+                ]
+            )
+        )
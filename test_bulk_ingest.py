@@ -0,0 +1,47 @@
+import os
+import json
+
+from bulk_ingest import Checkpoint, ingest_document, iter_documents
+from doc_analysis import analysis_cache, analysis_cache_key
+
+
+def test_iter_documents_lists_supported_files_in_order(tmp_path):
+    for name in ("b.pdf", "a.TXT", "c.png", "sub/d.docx"):
+        path = tmp_path / name
+        path.parent.mkdir(exist_ok=True)
+        path.write_bytes(b"")
+
+    names = [os.path.relpath(path, tmp_path) for path in iter_documents(str(tmp_path))]
+    assert names == ["a.TXT", "b.pdf", os.path.join("sub", "d.docx")]
+
+
+def test_checkpoint_resumes_finished_documents_only(tmp_path):
+    path = tmp_path / "checkpoint.jsonl"
+    checkpoint = Checkpoint(str(path))
+    checkpoint.record({"sha256": "ok", "status": "ok"})
+    checkpoint.record({"sha256": "failed", "status": "failed"})
+    # 기록 도중 중단된 마지막 줄은 무시
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"sha256": "partial", "sta')
+
+    resumed = Checkpoint(str(path))
+    assert resumed.is_done("ok")
+    assert not resumed.is_done("failed")
+    assert not resumed.is_done("partial")
+
+
+def test_cached_and_empty_documents_are_recorded_without_analysis(tmp_path):
+    checkpoint = Checkpoint(str(tmp_path / "checkpoint.jsonl"))
+    cached = tmp_path / "cached.txt"
+    cached.write_text("이미 분석한 문서입니다.", encoding="utf-8")
+    empty = tmp_path / "empty.txt"
+    empty.write_text("  \n", encoding="utf-8")
+    analysis_cache.set(analysis_cache_key("이미 분석한 문서입니다."), {"topic": "주제"})
+
+    assert ingest_document(str(cached), checkpoint)["status"] == "cached"
+    assert ingest_document(str(empty), checkpoint)["status"] == "empty"
+    # 다시 실행하면 체크포인트에 있는 문서는 건너뜀
+    assert ingest_document(str(cached), checkpoint)["status"] == "skipped"
+
+    with open(checkpoint.path, encoding="utf-8") as f:
+        assert [json.loads(line)["status"] for line in f] == ["cached", "empty"]
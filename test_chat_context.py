@@ -0,0 +1,75 @@
+import pytest
+
+import chunking
+from chat_context import MESSAGE_OVERHEAD_TOKENS, ChatContext
+
+
+@pytest.fixture(autouse=True)
+def approximate_tokens(monkeypatch):
+    monkeypatch.setattr(chunking, "_get_encoding", lambda: None)
+
+
+class RecordingSummarizer:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, summary, messages, max_tokens):
+        self.calls.append([message["content"] for message in messages])
+        return f"{summary}+{len(messages)}"
+
+
+def conversation(turns):
+    messages = [{"role": "system", "content": "시스템"}]
+    for number in range(turns):
+        messages.append({"role": "user", "content": "질" * 16})
+        messages.append({"role": "assistant", "content": "답" * 16})
+    return messages
+
+
+def test_short_conversation_is_sent_as_is():
+    summarize = RecordingSummarizer()
+    context = ChatContext(max_tokens=1000, summary_max_tokens=100, summarize=summarize)
+    messages = conversation(3)
+
+    assert context.window(messages) == messages
+    assert summarize.calls == []
+
+
+def test_old_messages_are_folded_into_summary():
+    summarize = RecordingSummarizer()
+    # 메시지 하나 = 16 + 4 토큰, 최근 대화 예산 = 200 - 7 - 40 = 153 토큰
+    context = ChatContext(
+        max_tokens=200, summary_max_tokens=40, fold_ratio=0.6, summarize=summarize
+    )
+    messages = conversation(5)
+
+    window = context.window(messages)
+
+    # 예산의 60%(91 토큰) 이하가 되도록 최근 메시지 4개만 남김
+    assert len(summarize.calls) == 1 and len(summarize.calls[0]) == 6
+    assert window[0] == messages[0]
+    assert window[1] == {"role": "system", "content": "이전 대화 요약:\n+6"}
+    assert window[2:] == messages[-4:]
+    assert sum(16 + MESSAGE_OVERHEAD_TOKENS for _ in window[2:]) <= 153 * 0.6
+
+    # 여유를 두었으므로 다음 질문에서는 다시 요약하지 않음
+    messages.append({"role": "user", "content": "질" * 16})
+    context.window(messages)
+    assert len(summarize.calls) == 1
+
+
+def test_latest_question_is_kept_even_over_budget():
+    context = ChatContext(max_tokens=50, summary_max_tokens=10, summarize=RecordingSummarizer())
+    messages = [{"role": "user", "content": "긴" * 200}]
+
+    assert context.window(messages) == messages
+
+
+def test_reset_conversation_clears_summary():
+    context = ChatContext(max_tokens=200, summary_max_tokens=40, summarize=RecordingSummarizer())
+    context.window(conversation(5))
+    assert context.summary
+
+    messages = conversation(1)
+    assert context.window(messages) == messages
+    assert context.summary == ""
@@ -0,0 +1,75 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+import checklist_suggest
+from checklist_suggest import (
+    ChecklistSuggestionBatcher,
+    checklist_similarity,
+    find_duplicate_item,
+    suggest_checklist_item,
+)
+
+CHECKLIST = ["개인정보 처리방침 명시 여부 확인", "서버 접근 권한 검토"]
+
+
+# GPT 제안 대신 answers 의 답변을 순서대로 돌려주고 호출을 calls 에 기록
+@pytest.fixture
+def gpt(monkeypatch):
+    gpt = SimpleNamespace(calls=[], answers=[])
+
+    def suggest(feedback, checklist):
+        gpt.calls.append(("single", feedback))
+        return gpt.answers.pop(0)
+
+    def suggest_batch(requests):
+        gpt.calls.append(("batch", [feedback for feedback, _ in requests]))
+        return [f"{feedback}을 해야 함" for feedback, _ in requests]
+
+    monkeypatch.setattr(checklist_suggest, "gpt_suggest_checklist_items", suggest)
+    monkeypatch.setattr(checklist_suggest, "gpt_suggest_checklist_items_batch", suggest_batch)
+    monkeypatch.setattr(checklist_suggest, "CHECKLIST_SUGGEST_BATCH_SECONDS", 0)
+    return gpt
+
+
+def test_similarity_ignores_particles_and_filler_words():
+    assert checklist_similarity("서버 접근 권한을 반드시 확인해야 함", "서버 접근 권한 검토") == 1.0
+    assert checklist_similarity("배포 일정 공유", "서버 접근 권한 검토") == 0.0
+    assert find_duplicate_item("서버의 접근 권한 검토 필요", CHECKLIST)[0] == CHECKLIST[1]
+    assert find_duplicate_item("배포 일정 공유", CHECKLIST)[0] is None
+
+
+def test_duplicate_feedback_skips_gpt(gpt):
+    assert suggest_checklist_item("서버의 접근 권한을 검토", CHECKLIST) is None
+    assert gpt.calls == []
+
+
+def test_suggestion_is_filtered_when_none_or_duplicate(gpt):
+    gpt.answers.extend(["배포 일정을 공유해야 함", "없음", "서버 접근 권한을 검토해야 함"])
+
+    assert suggest_checklist_item("배포 일정 알려주세요", CHECKLIST) == "배포 일정을 공유해야 함"
+    assert suggest_checklist_item("로그 보관", CHECKLIST) is None
+    assert suggest_checklist_item("계정 관리", CHECKLIST) is None
+    assert len(gpt.calls) == 3
+
+
+def test_batcher_combines_requests_within_window(gpt):
+    batcher = ChecklistSuggestionBatcher(window_seconds=0.2, max_batch=8)
+    barrier = threading.Barrier(3)
+    results = {}
+
+    def submit(feedback):
+        barrier.wait()
+        results[feedback] = batcher.submit(feedback, CHECKLIST).result(timeout=5)
+
+    threads = [threading.Thread(target=submit, args=(name,)) for name in ("배포", "로그", "배포")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # 같은 피드백은 하나로 합치고 나머지는 한 번의 요청으로 묶음
+    assert len(gpt.calls) == 1 and gpt.calls[0][0] == "batch"
+    assert sorted(gpt.calls[0][1]) == ["로그", "배포"]
+    assert results == {"배포": "배포을 해야 함", "로그": "로그을 해야 함"}
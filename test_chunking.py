@@ -0,0 +1,67 @@
+import pytest
+
+import chunking
+from chunking import PAGE_SEPARATOR, estimate_tokens, needs_map_reduce, split_into_chunks
+
+
+# tiktoken 설치 여부와 관계없이 같은 결과가 나오도록 근사치 토큰 수 사용
+@pytest.fixture(autouse=True)
+def approximate_tokens(monkeypatch):
+    monkeypatch.setattr(chunking, "_get_encoding", lambda: None)
+
+
+def make_document(paragraphs=60, pages=3):
+    per_page = paragraphs // pages
+    return PAGE_SEPARATOR.join(
+        "\n\n".join(
+            f"{page}쪽 {number}번째 문단입니다. 내용이 조금 있습니다."
+            for number in range(page * per_page, (page + 1) * per_page)
+        )
+        for page in range(pages)
+    )
+
+
+def test_estimate_tokens_counts_non_ascii_per_character():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("가나다") == 3
+    assert estimate_tokens("abcdefgh") == 2
+    assert estimate_tokens("가나다abcd") == 4
+
+
+def test_needs_map_reduce_over_threshold():
+    assert not needs_map_reduce("가" * 10, threshold=10)
+    assert needs_map_reduce("가" * 11, threshold=10)
+
+
+def test_chunks_fit_budget_and_keep_paragraphs_in_order():
+    text = make_document()
+    chunks = split_into_chunks(text, max_tokens=200)
+
+    assert len(chunks) > 1
+    assert all(estimate_tokens(chunk) <= 200 for chunk in chunks)
+    paragraphs = [p for page in text.split(PAGE_SEPARATOR) for p in page.split("\n\n")]
+    assert [p for chunk in chunks for p in chunk.split("\n\n")] == paragraphs
+
+
+def test_oversized_paragraph_is_split_by_sentence_then_characters():
+    sentences = "첫 문장입니다. 둘째 문장입니다. " + "가" * 45
+    chunks = split_into_chunks(sentences, max_tokens=20)
+
+    assert chunks[0] == "첫 문장입니다. 둘째 문장입니다."
+    assert chunks[1:] == ["가" * 20, "가" * 20, "가" * 5]
+
+
+# 한글 한 글자가 여러 토큰인 인코딩 (UTF-8 바이트 하나를 토큰 하나로 셈)
+class ByteEncoding:
+    def encode(self, text, disallowed_special=()):
+        return list(text.encode("utf-8"))
+
+
+def test_forced_split_measures_tokens_not_characters(monkeypatch):
+    monkeypatch.setattr(chunking, "_get_encoding", lambda: ByteEncoding())
+    sentence = "가" * 45
+    chunks = split_into_chunks(sentence, max_tokens=20)
+
+    assert "".join(chunks) == sentence
+    assert all(estimate_tokens(chunk) <= 20 for chunk in chunks)
+    assert chunks[0] == "가" * 6
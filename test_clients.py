@@ -0,0 +1,61 @@
+import os
+import sys
+import time
+import subprocess
+import threading
+
+import pytest
+
+import clients
+
+
+@pytest.fixture(autouse=True)
+def fresh_clients():
+    clients.reset_clients()
+    yield
+    clients.reset_clients()
+
+
+def test_client_is_created_once_across_threads(monkeypatch):
+    created = []
+
+    def create():
+        time.sleep(0.05)
+        created.append(object())
+        return created[-1]
+
+    monkeypatch.setattr(clients, "_create_openai_client", create)
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(clients.get_docs_client())) for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(created) == 1
+    assert all(result is created[0] for result in results)
+    # 임베딩 클라이언트는 문서 클라이언트의 연결 풀을 그대로 사용
+    assert clients.get_embedding_client() is created[0]
+
+
+def test_set_client_replaces_shared_client():
+    fake = object()
+    clients.set_client("search", fake)
+    assert clients.get_search_client() is fake
+
+
+def test_import_does_not_load_azure_sdks():
+    code = (
+        "import sys, clients; "
+        "print([m for m in ('openai', 'azure.storage.blob') if m in sys.modules])"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    assert output.strip() == "[]"
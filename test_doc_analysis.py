@@ -0,0 +1,138 @@
+from types import SimpleNamespace
+
+import pytest
+
+import chunking
+import doc_analysis
+from doc_analysis import (
+    compare_document_sections,
+    find_similar_documents_stream,
+    get_call_latency,
+    gpt_summarize_document_stream,
+    prepare_analysis_content,
+    record_document_sections,
+)
+
+
+@pytest.fixture(autouse=True)
+def approximate_tokens(monkeypatch):
+    monkeypatch.setattr(chunking, "_get_encoding", lambda: None)
+
+
+# 구간 요약 대신 요약한 구간을 기록
+@pytest.fixture
+def summarized(monkeypatch):
+    summarized = []
+
+    def summarize(chunk):
+        summarized.append(chunk)
+        return f"요약 {len(chunk)}"
+
+    monkeypatch.setattr(doc_analysis, "gpt_summarize_chunk", summarize)
+    return summarized
+
+
+# 토큰 예산을 넘는 긴 문서 (문단마다 내용이 달라 구간 경계가 문서 전체에 흩어짐)
+def long_document(tag=""):
+    return "\n\n".join(
+        f"{number}번 문단{tag if number == 150 else ''}: " + f"내용 {number * 7919 % 1009} " * 12
+        for number in range(300)
+    )
+
+
+def test_revision_resummarizes_only_changed_sections(summarized):
+    original = long_document()
+    revised = long_document(tag=" (수정)")
+
+    prepare_analysis_content(original)
+    first = len(summarized)
+    assert first > 3
+
+    summarized.clear()
+    prepare_analysis_content(revised)
+    assert 1 <= len(summarized) <= 2
+    assert any("(수정)" in chunk for chunk in summarized)
+
+
+def test_compare_document_sections_counts_changed_sections():
+    original = long_document()
+    assert compare_document_sections("report.docx", original) is None
+
+    record_document_sections("report.docx", original)
+    unchanged = compare_document_sections("report.docx", original)
+    revision = compare_document_sections("report.docx", long_document(tag=" (수정)"))
+
+    assert unchanged["changed"] == 0
+    assert 1 <= revision["changed"] <= 2
+    assert revision["total"] == unchanged["total"]
+    # 짧은 문서는 구간을 비교하지 않음
+    assert compare_document_sections("report.docx", "짧은 문서") is None
+
+
+# 스트리밍 응답 chunk 를 돌려주고 요청 인자를 기록하는 게이트웨이
+class StreamingGateway:
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.requests = []
+
+    def chat_completion(self, **kwargs):
+        self.requests.append(kwargs)
+        return iter(self.chunks)
+
+
+def delta_chunk(content, context=None):
+    delta = SimpleNamespace(content=content, context=context)
+    return SimpleNamespace(choices=[SimpleNamespace(delta=delta)], usage=None)
+
+
+@pytest.fixture
+def gateway(monkeypatch):
+    def install(chunks):
+        gateway = StreamingGateway(chunks)
+        monkeypatch.setattr(doc_analysis, "get_llm_gateway", lambda: gateway)
+        return gateway
+
+    return install
+
+
+def test_summary_stream_yields_pieces_and_records_usage(gateway):
+    usage = SimpleNamespace(prompt_tokens=90, completion_tokens=10, total_tokens=100)
+    fake = gateway([
+        # 콘텐츠 필터 결과만 담긴 빈 chunk 와 내용 없는 delta 는 건너뜀
+        SimpleNamespace(choices=[], usage=None),
+        delta_chunk(None),
+        delta_chunk("첫 문장. "),
+        delta_chunk("둘째 문장."),
+        SimpleNamespace(choices=[], usage=usage),
+    ])
+    before = len(get_call_latency())
+
+    assert list(gpt_summarize_document_stream("가" * 400)) == ["첫 문장. ", "둘째 문장."]
+
+    request = fake.requests[0]
+    assert request["stream"] is True
+    assert request["stream_options"] == {"include_usage": True}
+    # 라우팅 결과가 deployment 와 출력 예산으로 반영됨
+    assert request["max_tokens"] == 200
+    assert "route" not in request
+
+    calls = get_call_latency()[before:]
+    assert [call["name"] for call in calls] == ["summary"]
+    assert calls[0]["stream"] is True
+    assert calls[0]["tier"] == "large"
+    assert 0 <= calls[0]["ttft"] <= calls[0]["total"]
+
+
+def test_similar_stream_collects_citations(gateway):
+    citations = [{"title": "보안 점검.docx", "url": "https://blob/a"}, {"filepath": "b.pdf"}]
+    context = {"citations": citations}
+    gateway([delta_chunk("유사 문서: ", context), delta_chunk("보안 점검")])
+    sources = []
+
+    pieces = list(find_similar_documents_stream([{"role": "user", "content": "보안"}], sources))
+
+    assert "".join(pieces) == "유사 문서: 보안 점검"
+    assert sources == [
+        {"title": "보안 점검.docx", "url": "https://blob/a"},
+        {"title": "b.pdf", "url": ""},
+    ]
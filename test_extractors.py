@@ -0,0 +1,181 @@
+import io
+import time
+import zipfile
+import threading
+import multiprocessing
+from concurrent import futures
+
+import pytest
+from PyPDF2 import PdfReader
+
+import extractors
+from extractors import extract_docx_content, iter_docx_blocks, iter_pdf_pages
+
+
+# 페이지마다 텍스트 한 줄이 있는 최소 PDF
+def make_pdf(texts):
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        None,
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    kids = []
+    for text in texts:
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(
+            "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>"
+        )
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    out = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+    out += (
+        f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n"
+    ).encode()
+    return out
+
+
+# 본문 XML 만 있는 최소 DOCX
+def make_docx(body):
+    document = (
+        '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+        f"<w:body>{body}</w:body></w:document>"
+    )
+    out = io.BytesIO()
+    with zipfile.ZipFile(out, "w") as archive:
+        archive.writestr("word/document.xml", document)
+    return out.getvalue()
+
+
+# 프로세스 대신 스레드로 페이지를 추출하는 풀 (테스트에서 페이지 추출 함수를 바꿔 끼우기 위해)
+# 작업 프로세스처럼 스레드마다 PDF 를 따로 읽어 둠
+class ThreadContext:
+    RawArray = staticmethod(multiprocessing.RawArray)
+
+    def Pool(self, processes, initializer, initargs):
+        return ThreadPool(processes, *initargs)
+
+
+class ThreadResult:
+    def __init__(self, future):
+        self.future = future
+
+    def get(self, timeout=None):
+        try:
+            return self.future.result(timeout=timeout)
+        except futures.TimeoutError:
+            raise multiprocessing.TimeoutError
+
+
+class ThreadPool:
+    def __init__(self, processes, pdf_bytes, started):
+        self.local = threading.local()
+        self.pdf_bytes = pdf_bytes
+        self.started = started
+        self.executor = futures.ThreadPoolExecutor(max_workers=processes)
+
+    def extract(self, index):
+        if not hasattr(self.local, "reader"):
+            self.local.reader = PdfReader(io.BytesIO(self.pdf_bytes))
+        self.started[index] = time.time()
+        return extractors._extract_page_text(self.local.reader.pages[index])
+
+    def apply_async(self, fn, args):
+        return ThreadResult(self.executor.submit(self.extract, *args))
+
+    def terminate(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def join(self):
+        pass
+
+
+# 텍스트에 "hang" 이 들어간 페이지는 release 될 때까지 멈춤
+@pytest.fixture
+def hanging_pages(monkeypatch):
+    release = threading.Event()
+    extract = extractors._extract_page_text
+
+    def slow_extract(page):
+        text = extract(page)
+        if "hang" in text:
+            release.wait(10)
+        return text
+
+    monkeypatch.setattr(extractors, "_extract_page_text", slow_extract)
+    yield
+    release.set()
+
+
+def test_small_pdf_pages_in_order():
+    pages = list(iter_pdf_pages(make_pdf(["page one", "page two"])))
+    assert pages == [(1, "page one"), (2, "page two")]
+
+
+def test_large_pdf_uses_process_pool():
+    texts = [f"page {number}" for number in range(20)]
+    pages = list(iter_pdf_pages(make_pdf(texts), max_workers=2))
+    assert pages == [(number + 1, text) for number, text in enumerate(texts)]
+
+
+def test_hung_page_skipped_on_serial_path(hanging_pages, monkeypatch):
+    monkeypatch.setattr(extractors.multiprocessing, "get_context", lambda method: ThreadContext())
+
+    started = time.monotonic()
+    pages = list(iter_pdf_pages(make_pdf(["page one", "hang", "page three"]), page_timeout=0.3))
+
+    assert pages == [(1, "page one"), (2, ""), (3, "page three")]
+    assert time.monotonic() - started < 2
+
+
+def test_hung_pages_do_not_add_up_on_pool_path(hanging_pages, monkeypatch):
+    monkeypatch.setattr(extractors.multiprocessing, "get_context", lambda method: ThreadContext())
+    texts = [f"page {number}" for number in range(20)]
+    for number in (2, 3, 4, 10):
+        texts[number] = "hang"
+
+    started = time.monotonic()
+    pages = list(iter_pdf_pages(make_pdf(texts), max_workers=2, page_timeout=0.3))
+
+    assert [text for _, text in pages] == [
+        "" if text == "hang" else text for text in texts
+    ]
+    # 멈춘 페이지 4개를 작업자 2개가 나눠 기다리므로 page_timeout x 4 보다 짧음
+    assert time.monotonic() - started < 4 * 0.3 + 0.5
+
+
+def test_docx_paragraphs_and_cells_in_order():
+    docx = make_docx(
+        "<w:p><w:r><w:t>first</w:t></w:r></w:p>"
+        "<w:tbl><w:tr>"
+        "<w:tc><w:p><w:r><w:t>a</w:t></w:r></w:p><w:p><w:r><w:t>b</w:t></w:r></w:p></w:tc>"
+        "<w:tc><w:p/></w:tc>"
+        "</w:tr></w:tbl>"
+        "<w:p><w:r><w:t>last</w:t></w:r></w:p>"
+    )
+    assert list(iter_docx_blocks(docx)) == [
+        ("paragraph", "first"),
+        ("cell", "a\nb"),
+        ("cell", ""),
+        ("paragraph", "last"),
+    ]
+    assert extract_docx_content(docx) == "first\na\nb\nlast\n"
+
+
+def test_docx_tab_stop_definitions_are_not_text():
+    docx = make_docx(
+        "<w:p>"
+        '<w:pPr><w:tabs><w:tab w:val="left" w:pos="720"/></w:tabs></w:pPr>'
+        "<w:r><w:t>name</w:t><w:tab/><w:t>value</w:t><w:br/><w:t>next</w:t></w:r>"
+        "</w:p>"
+    )
+    assert list(iter_docx_blocks(docx)) == [("paragraph", "name\tvalue\nnext")]
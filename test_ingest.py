@@ -0,0 +1,51 @@
+import io
+import hashlib
+
+import ingest
+from ingest import IngestBuffer
+
+DATA = "문서 내용입니다.\n".encode("utf-8") * 100
+SHA256 = hashlib.sha256(DATA).hexdigest()
+
+
+def test_from_upload_hashes_the_upload_buffer():
+    upload = io.BytesIO(DATA)
+    upload.name = "a.txt"
+    buffer = IngestBuffer.from_upload(upload)
+
+    assert buffer.sha256 == SHA256
+    assert buffer.size == len(DATA)
+    assert buffer.content_type == "text/plain"
+    assert buffer.text() == DATA.decode("utf-8")
+
+
+def test_from_stream_spills_large_input_to_a_temporary_file(monkeypatch):
+    monkeypatch.setattr(ingest, "INGEST_SPOOL_MAX_BYTES", 100)
+    monkeypatch.setattr(ingest, "INGEST_READ_CHUNK_BYTES", 64)
+    buffer = IngestBuffer.from_stream(io.BufferedReader(io.BytesIO(DATA)), "a.pdf")
+
+    assert buffer._owner is not None
+    assert buffer.sha256 == SHA256
+    assert bytes(buffer.view()) == DATA
+    assert buffer.content_type == "application/pdf"
+
+
+def test_from_path_maps_the_file(tmp_path):
+    path = tmp_path / "a.docx"
+    path.write_bytes(DATA)
+    empty = tmp_path / "empty.txt"
+    empty.write_bytes(b"")
+
+    buffer = IngestBuffer.from_path(str(path))
+    assert (buffer.name, buffer.sha256, bytes(buffer.view())) == ("a.docx", SHA256, DATA)
+    assert IngestBuffer.from_path(str(empty)).sha256 == hashlib.sha256(b"").hexdigest()
+
+
+def test_open_returns_independent_readers():
+    buffer = IngestBuffer.from_stream(io.BytesIO(DATA), "a.txt")
+    first, second = buffer.open(), buffer.open()
+
+    assert first.read(10) == DATA[:10]
+    assert second.read(10) == DATA[:10]
+    first.seek(-5, io.SEEK_END)
+    assert first.read() == DATA[-5:]
@@ -0,0 +1,141 @@
+import time
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+import job_queue
+from analysis_pipeline import Stage
+from job_queue import DONE, FAILED, QUEUED, RUNNING, AnalysisJobQueue
+
+
+def wait_for(queue, job_id, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = queue.get(job_id)
+        if job["status"] in (DONE, FAILED):
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"작업이 끝나지 않음: {job['status']}")
+
+
+# 요약 단계가 release 될 때까지 스트리밍 중간에서 멈추는 분석 단계
+@pytest.fixture
+def pipeline(monkeypatch):
+    pipeline = SimpleNamespace(stored=[], release=threading.Event())
+
+    def build_stages(buffer, content, document_id, filename, stream=False):
+        def summary():
+            yield "요약 "
+            pipeline.release.wait(5)
+            yield "끝"
+
+        return [
+            Stage("blob", lambda: (filename, False)),
+            Stage("topic", lambda: content.upper()),
+            Stage("summary", summary, stream=True),
+        ]
+
+    monkeypatch.setattr(job_queue, "build_analysis_stages", build_stages)
+    monkeypatch.setattr(
+        job_queue, "collect_analysis_result", lambda results: {"topic": results["topic"].value}
+    )
+    monkeypatch.setattr(
+        job_queue, "store_analysis_result", lambda *args: pipeline.stored.append(args)
+    )
+    yield pipeline
+    pipeline.release.set()
+
+
+def test_job_records_results_and_partials(tmp_path, pipeline):
+    queue = AnalysisJobQueue(path=str(tmp_path / "jobs.sqlite3"), workers=1)
+    job_id, created = queue.submit("key", None, "content", "a.txt")
+    assert created
+
+    # 스트리밍 중인 단계는 중간 결과로 기록
+    deadline = time.monotonic() + 5
+    while "summary" not in queue.get(job_id)["partials"]:
+        assert time.monotonic() < deadline
+        time.sleep(0.02)
+    job = queue.get(job_id)
+    assert job["status"] == RUNNING
+    assert job["partials"]["summary"].value == "요약 "
+    assert job["results"]["topic"].value == "CONTENT"
+
+    pipeline.release.set()
+    job = wait_for(queue, job_id)
+
+    assert job["status"] == DONE
+    assert job["partials"] == {}
+    assert job["results"]["summary"].value == "요약 끝"
+    assert job["results"]["blob"].value == ["a.txt", False]
+    assert pipeline.stored == [
+        ("key", "content", "a.txt", job["document_id"], {"topic": "CONTENT"}, "a.txt")
+    ]
+
+
+def test_running_job_is_shared_by_key(tmp_path, pipeline):
+    queue = AnalysisJobQueue(path=str(tmp_path / "jobs.sqlite3"), workers=1)
+    first, _ = queue.submit("key", None, "content", "a.txt")
+    second, created = queue.submit("key", None, "content", "b.txt")
+
+    assert second == first
+    assert not created
+
+    # 작업자가 하나뿐이므로 첫 작업이 실행되기 시작한 뒤 제출한 다른 문서의 작업은 대기
+    deadline = time.monotonic() + 5
+    while queue.get(first)["status"] != RUNNING:
+        assert time.monotonic() < deadline
+        time.sleep(0.02)
+    other, _ = queue.submit("other", None, "content", "c.txt")
+    job = queue.get(other)
+    assert job["status"] == QUEUED
+    assert job["queued_ahead"] == 0
+
+    pipeline.release.set()
+    assert wait_for(queue, first)["status"] == DONE
+    assert wait_for(queue, other)["status"] == DONE
+
+    # 끝난 작업은 재사용하지 않고 새로 분석
+    again, created = queue.submit("key", None, "content", "a.txt")
+    assert created and again != first
+
+
+def test_failed_stage_setup_marks_job_failed(tmp_path, monkeypatch):
+    def build_stages(*args, **kwargs):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(job_queue, "build_analysis_stages", build_stages)
+    queue = AnalysisJobQueue(path=str(tmp_path / "jobs.sqlite3"), workers=1)
+    job_id, _ = queue.submit("key", None, "content", "a.txt")
+
+    job = wait_for(queue, job_id)
+    assert job["status"] == FAILED
+    assert job["error"] == "RuntimeError: boom"
+
+
+def test_stale_job_is_reported_failed(tmp_path, pipeline):
+    queue = AnalysisJobQueue(path=str(tmp_path / "jobs.sqlite3"), workers=1, stale_seconds=60)
+    job_id, _ = queue.submit("key", None, "content", "a.txt")
+    deadline = time.monotonic() + 5
+    while "summary" not in queue.get(job_id)["partials"]:
+        assert time.monotonic() < deadline
+        time.sleep(0.02)
+
+    # 작업하던 프로세스가 종료되어 갱신 시각이 멈춘 작업
+    conn = queue._connect()
+    try:
+        conn.execute("UPDATE jobs SET updated_at = updated_at - 120 WHERE id = ?", (job_id,))
+    finally:
+        conn.close()
+
+    job = queue.get(job_id)
+    assert job["status"] == FAILED
+    assert "중단" in job["error"]
+
+    # 뒤늦게 끝난 작업자가 상태를 되돌리지 않고, 다시 제출하면 새 작업으로 분석
+    pipeline.release.set()
+    again, created = queue.submit("key", None, "content", "a.txt")
+    assert created and again != job_id
+    assert wait_for(queue, again)["status"] == DONE
+    assert queue.get(job_id)["status"] == FAILED
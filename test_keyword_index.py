@@ -0,0 +1,39 @@
+from keyword_index import KeywordIndex, tokenize
+
+
+def test_tokenize_keeps_nouns_ending_in_particle_like_syllables():
+    assert tokenize("게이트웨이 전문가 워크플로 재평가 연구결과 디스플레이를") == [
+        "게이트웨이",
+        "전문가",
+        "워크플로",
+        "재평가",
+        "연구결과",
+        "디스플레이",
+    ]
+
+
+def test_tokenize_strips_particles_and_endings():
+    assert tokenize("보안정책은 서버에서 인증서를 갱신합니다") == ["보안정책", "서버", "인증서", "갱신"]
+    assert tokenize("API 데이터베이스의 성능으로는") == ["api", "데이터베이스", "성능"]
+
+
+def test_tokenize_drops_stopwords_and_single_characters():
+    assert tokenize("및 등 a 그리고 문서 the") == ["문서"]
+
+
+def test_extract_ranks_terms_rare_across_documents(tmp_path):
+    index = KeywordIndex(path=str(tmp_path / "keywords.sqlite3"))
+    index.add("a", tokenize("서버 배포 절차"))
+    index.add("b", tokenize("서버 모니터링 절차"))
+
+    keywords = index.extract("c", "서버 서버 인증서 인증서 절차", num_keywords=2)
+
+    assert keywords == ["인증서", "서버"]
+
+
+def test_add_counts_each_document_once(tmp_path):
+    index = KeywordIndex(path=str(tmp_path / "keywords.sqlite3"))
+    index.add("a", ["서버", "서버", "배포"])
+    index.add("a", ["서버"])
+
+    assert index.document_frequencies(["서버", "배포", "없음"]) == (1, {"서버": 1, "배포": 1})
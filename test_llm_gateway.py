@@ -0,0 +1,198 @@
+from types import SimpleNamespace
+
+import pytest
+
+import llm_gateway
+from llm_gateway import AdaptiveConcurrency, LLMGateway, SharedRateLimiter
+
+
+class StatusError(Exception):
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+        self.response = SimpleNamespace(status_code=status_code, headers=headers or {})
+
+
+class RecordingLimiter:
+    def __init__(self):
+        self.adjusted = []
+        self.blocked = []
+
+    def acquire(self, scope, tokens):
+        return 0.0
+
+    def adjust(self, scope, tokens):
+        self.adjusted.append((scope, tokens))
+
+    def block(self, scope, seconds):
+        self.blocked.append((scope, seconds))
+
+
+def make_gateway(max_retries=2):
+    return LLMGateway(
+        rate_limiter=RecordingLimiter(),
+        concurrency=AdaptiveConcurrency(initial=4, maximum=16),
+        max_retries=max_retries,
+    )
+
+
+def usage(total_tokens):
+    return SimpleNamespace(
+        prompt_tokens=total_tokens - 1, completion_tokens=1, total_tokens=total_tokens
+    )
+
+
+def test_concurrency_increases_only_on_success():
+    concurrency = AdaptiveConcurrency(initial=4, maximum=16)
+
+    started = concurrency.acquire()
+    concurrency.release(started, succeeded=True)
+    assert concurrency.limit == pytest.approx(4.25)
+
+    started = concurrency.acquire()
+    concurrency.release(started)
+    assert concurrency.limit == pytest.approx(4.25)
+    assert concurrency._in_flight == 0
+
+
+def test_concurrency_halves_once_per_throttled_burst():
+    concurrency = AdaptiveConcurrency(initial=8, maximum=16)
+    first = concurrency.acquire()
+    second = concurrency.acquire()
+
+    concurrency.release(first, throttled=True)
+    concurrency.release(second, throttled=True)
+
+    # 한도를 줄이기 전에 시작한 두 번째 요청의 429 는 다시 반영하지 않음
+    assert concurrency.limit == 4
+
+
+def test_non_retryable_error_does_not_raise_limit():
+    gateway = make_gateway()
+
+    def create(**kwargs):
+        raise StatusError(400)
+
+    with pytest.raises(StatusError):
+        gateway._call(create, {}, "model", 10)
+
+    assert gateway.concurrency.limit == 4
+    assert gateway.concurrency._in_flight == 0
+    assert gateway.stats()["failed"] == 1
+
+
+def test_last_failed_retry_does_not_raise_limit(monkeypatch):
+    monkeypatch.setattr(llm_gateway.time, "sleep", lambda seconds: None)
+    gateway = make_gateway(max_retries=2)
+    calls = []
+
+    def create(**kwargs):
+        calls.append(kwargs)
+        raise StatusError(503)
+
+    with pytest.raises(StatusError):
+        gateway._call(create, {}, "model", 10)
+
+    assert len(calls) == 3
+    assert gateway.concurrency.limit == 4
+    assert gateway.stats()["retries"] == 2
+
+
+def test_throttled_request_blocks_scope_and_retries():
+    gateway = make_gateway()
+    responses = [StatusError(429, {"retry-after-ms": "250"}), "ok"]
+
+    def create(**kwargs):
+        response = responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    assert gateway._call(create, {}, "model", 10) == "ok"
+    assert gateway.rate_limiter.blocked == [("model", 0.25)]
+    assert gateway.concurrency.limit == pytest.approx(2.5)
+    assert gateway.stats()["throttled"] == 1
+
+
+def test_stream_holds_slot_until_consumed(monkeypatch):
+    def create(**kwargs):
+        def chunks():
+            yield SimpleNamespace(choices=["a"], usage=None)
+            yield SimpleNamespace(choices=[], usage=usage(120))
+
+        return chunks()
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    monkeypatch.setattr(llm_gateway, "get_docs_client", lambda: client)
+    gateway = make_gateway()
+
+    response = gateway.chat_completion(
+        model="model", messages=[{"role": "user", "content": "hi"}], max_tokens=50, stream=True
+    )
+    assert gateway.concurrency._in_flight == 1
+    assert gateway.rate_limiter.adjusted == []
+
+    assert len(list(response)) == 2
+    assert gateway.concurrency._in_flight == 0
+    assert gateway.concurrency.limit == pytest.approx(4.25)
+    # 예상 토큰 수(프롬프트 + max_tokens)와 실제 사용량의 차이만큼 보정
+    assert gateway.rate_limiter.adjusted == [("model", 120 - (1 + 4 + 50))]
+
+
+def test_stream_closed_early_releases_without_raising_limit(monkeypatch):
+    closed = []
+
+    def create(**kwargs):
+        def chunks():
+            try:
+                yield SimpleNamespace(choices=["a"], usage=None)
+                yield SimpleNamespace(choices=["b"], usage=None)
+            finally:
+                closed.append(True)
+
+        return chunks()
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    monkeypatch.setattr(llm_gateway, "get_docs_client", lambda: client)
+    gateway = make_gateway()
+
+    response = gateway.chat_completion(model="model", messages=[], stream=True)
+    next(response)
+    response.close()
+
+    assert closed == [True]
+    assert gateway.concurrency._in_flight == 0
+    assert gateway.concurrency.limit == 4
+
+
+def test_completion_adjusts_reserved_tokens(monkeypatch):
+    def create(**kwargs):
+        return SimpleNamespace(usage=usage(30))
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    monkeypatch.setattr(llm_gateway, "get_docs_client", lambda: client)
+    gateway = make_gateway()
+
+    gateway.chat_completion(model="model", messages=[], max_tokens=100)
+    assert gateway.rate_limiter.adjusted == [("model", 30 - 100)]
+
+
+def test_shared_rate_limiter_waits_for_refill(tmp_path, monkeypatch):
+    limiter = SharedRateLimiter(path=str(tmp_path / "rate.sqlite3"), rpm=60, tpm=1000)
+    now = [1000.0]
+    slept = []
+
+    def sleep(seconds):
+        slept.append(seconds)
+        now[0] += seconds
+
+    monkeypatch.setattr(llm_gateway.time, "time", lambda: now[0])
+    monkeypatch.setattr(llm_gateway.time, "sleep", sleep)
+
+    assert limiter.acquire("model", 900) == 0.0
+    assert slept == []
+
+    # 남은 토큰(약 100)보다 큰 요청은 충전될 때까지 대기
+    waited = limiter.acquire("model", 500)
+    assert waited >= 400 * 60 / 1000
+    assert waited == pytest.approx(sum(slept))
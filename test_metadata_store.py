@@ -0,0 +1,75 @@
+import pytest
+
+from metadata_store import (
+    MANIFEST_PREFIX,
+    SEGMENT_PREFIX,
+    LocalMetadataBackend,
+    MetadataStore,
+)
+
+
+def make_store(directory, **kwargs):
+    kwargs.setdefault("flush_interval", 0)
+    return MetadataStore(LocalMetadataBackend(str(directory)), **kwargs)
+
+
+def row(document_id, topic, updated_at):
+    return {
+        "id": document_id,
+        "topic": topic,
+        "content_hash": f"hash-{document_id}",
+        "updated_at": updated_at,
+    }
+
+
+def test_rows_are_written_in_batches(tmp_path):
+    store = make_store(tmp_path, flush_rows=3, compact_segments=0)
+    for number in range(5):
+        store.append(row(str(number), "주제", f"2025-01-0{number + 1}"))
+
+    assert len(store.backend.list(SEGMENT_PREFIX)) == 1
+    # 저장 전인 행도 조회에 포함
+    assert len(store.load_all()) == 5
+    store.flush()
+    assert len(store.backend.list(SEGMENT_PREFIX)) == 2
+    assert len(make_store(tmp_path).load_all()) == 5
+
+
+def test_latest_row_wins_and_lookup_by_hash(tmp_path):
+    store = make_store(tmp_path, flush_rows=1, compact_segments=0)
+    store.append(row("a", "새 주제", "2025-02-01"))
+    store.append(row("a", "이전 주제", "2025-01-01"))
+
+    index = store.load_all()
+    assert index.get("a")["topic"] == "새 주제"
+    assert index.get_by_hash("hash-a")["id"] == "a"
+    assert index.get("missing") is None
+
+
+def test_compaction_merges_segments_into_one_manifest(tmp_path):
+    store = make_store(tmp_path, flush_rows=1, compact_segments=3)
+    store.append(row("a", "1", "2025-01-01"))
+    store.append(row("b", "1", "2025-01-01"))
+    store.append(row("a", "2", "2025-01-02"))
+
+    assert store.backend.list(SEGMENT_PREFIX) == []
+    assert len(store.backend.list(MANIFEST_PREFIX)) == 1
+    index = store.load_all()
+    assert {item["id"]: item["topic"] for item in index} == {"a": "2", "b": "1"}
+
+
+def test_failed_flush_keeps_rows_for_retry(tmp_path):
+    store = make_store(tmp_path, flush_rows=10)
+    store.append(row("a", "주제", "2025-01-01"))
+    write = store.backend.write
+
+    def fail(name, data):
+        raise OSError("disk full")
+
+    store.backend.write = fail
+    with pytest.raises(OSError):
+        store.flush()
+    store.backend.write = write
+
+    assert store.flush() is not None
+    assert len(make_store(tmp_path).load_all()) == 1
@@ -0,0 +1,86 @@
+import pytest
+
+import chunking
+import model_router
+from model_router import route_task, routing_version
+
+
+@pytest.fixture(autouse=True)
+def approximate_tokens(monkeypatch):
+    monkeypatch.setattr(chunking, "_get_encoding", lambda: None)
+
+
+@pytest.fixture(autouse=True)
+def tiers(monkeypatch):
+    # small / large 가 서로 다른 deployment 를 가리키도록 설정
+    monkeypatch.setitem(model_router.MODEL_TIERS, "small", "small-deployment")
+    monkeypatch.setitem(model_router.MODEL_TIERS, "large", "large-deployment")
+
+
+# 근사 토큰 계산에서 한글은 글자당 1토큰
+def korean(tokens):
+    return "가" * tokens
+
+
+def test_budget_is_clamped_to_task_range():
+    route = route_task("topic", korean(100))
+    assert (route.tier, route.model) == ("small", "small-deployment")
+    assert route.input_tokens == 100
+    assert route.max_tokens == 40
+
+    assert route_task("topic", korean(3000)).max_tokens == 60
+    assert route_task("topic", korean(5900)).max_tokens == 100
+    assert route_task("summary", korean(100)).model == "large-deployment"
+
+
+def test_small_task_escalates_on_long_input(monkeypatch):
+    monkeypatch.setattr(model_router, "MODEL_ESCALATION_TOKENS", 1000)
+
+    assert not route_task("chunk_summary", korean(1000)).escalated
+    route = route_task("chunk_summary", korean(1001))
+    assert route.escalated
+    assert (route.tier, route.model) == ("large", "large-deployment")
+    # large 등급 작업은 올릴 등급이 없음
+    assert not route_task("summary", korean(5000)).escalated
+
+
+def test_scale_multiplies_range_and_limit_caps_budget():
+    assert route_task("keywords", korean(100), scale=3).max_tokens == 30
+    assert route_task("keywords", korean(5000), scale=3).max_tokens == 180
+
+    assert route_task("summary", korean(1000), limit=200).max_tokens == 200
+    assert route_task("summary", korean(100), limit=200).max_tokens == 150
+    # 예산이 없는 작업은 호출하는 쪽의 상한만 적용
+    assert route_task("similar", korean(100)).max_tokens is None
+    assert route_task("similar", korean(100), limit=80).max_tokens == 80
+
+
+def test_messages_count_every_content():
+    messages = [
+        {"role": "system", "content": korean(30)},
+        {"role": "user", "content": korean(70)},
+        {"role": "assistant", "content": None},
+    ]
+    assert route_task("chat_summary", messages).input_tokens == 100
+
+
+def test_env_overrides_task_tier(monkeypatch):
+    before = routing_version("summary", "topic")
+
+    monkeypatch.setenv("MODEL_TIER_SUMMARY", "small")
+    route = route_task("summary", korean(100))
+    assert (route.tier, route.model) == ("small", "small-deployment")
+    assert routing_version("summary", "topic") != before
+
+    # 알 수 없는 등급은 무시하고 기본 등급 사용
+    monkeypatch.setenv("MODEL_TIER_SUMMARY", "medium")
+    assert route_task("summary", korean(100)).tier == "large"
+    assert routing_version("summary", "topic") == before
+
+
+def test_routing_version_tracks_deployments(monkeypatch):
+    before = routing_version("topic")
+    assert "topic=small" in before
+
+    monkeypatch.setitem(model_router.MODEL_TIERS, "small", "other-deployment")
+    assert routing_version("topic") != before
@@ -0,0 +1,90 @@
+import io
+from types import SimpleNamespace
+
+import pytest
+
+import clients
+from doc_analysis import (
+    analysis_cache,
+    analysis_cache_key,
+    find_near_duplicate_analysis,
+    store_analysis_result,
+    store_near_duplicate_analysis,
+)
+from ingest import IngestBuffer
+from keyword_index import get_keyword_index
+from metadata_store import get_metadata_store
+from near_duplicates import NearDuplicateIndex, diff_lines
+
+WORDS = "서버 권한 로그 계정 암호 백업 방화벽 패치 인증서 감사 접근 보관 기간 담당자 승인".split()
+REPORT = "\n".join(
+    f"{number}. {WORDS[number % 15]} {WORDS[number * 7 % 15]} {WORDS[number * 4 % 15]} 항목을 "
+    f"{number * 37 % 101}일마다 {WORDS[number * 11 % 15]}와 함께 점검합니다."
+    for number in range(60)
+)
+REVISED = REPORT + "\n작성일: 2025-07-01"
+OTHER = "\n".join(f"{number}. 분기 매출은 전년 대비 {number}% 늘었습니다." for number in range(30))
+
+
+@pytest.fixture
+def blob_client():
+    clients.set_client("blob", SimpleNamespace(url="https://account.blob.core.windows.net/"))
+    yield
+    clients.reset_clients()
+
+
+def test_find_returns_near_duplicate_with_diff(tmp_path):
+    index = NearDuplicateIndex(path=str(tmp_path / "nd.sqlite3"))
+    index.add("report", REPORT, "report.txt", "doc-1", "u/report.txt")
+    index.add("other", OTHER, "other.txt")
+
+    match = index.find(REVISED)
+
+    assert match["key"] == "report"
+    assert (match["filename"], match["document_id"], match["link"]) == (
+        "report.txt",
+        "doc-1",
+        "u/report.txt",
+    )
+    assert 0.95 <= match["similarity"] < 1
+    assert match["diff"][-1] == "+ 작성일: 2025-07-01"
+    # 같은 내용의 문서(분석 캐시 키)는 제외
+    assert index.find(REPORT, exclude_key="report") is None
+    assert index.find("전혀 다른 짧은 문서") is None
+
+
+def test_diff_lines_marks_removed_and_added_lines():
+    assert diff_lines("가\n나\n다", "가\n라\n다") == ["- 나", "+ 라"]
+    assert len(diff_lines("", "\n".join(map(str, range(50))), limit=5)) == 5
+
+
+def test_reused_analysis_is_stored_like_a_fresh_one(blob_client):
+    analysis = {
+        "topic": "보안 점검",
+        "summary": "요약",
+        "keywords": ["보안", "점검"],
+        "checklist": ["권한 확인"],
+        "similar": [],
+    }
+    store_analysis_result(
+        analysis_cache_key(REPORT), REPORT, "report.txt", "doc-1", analysis, "report.txt"
+    )
+
+    cache_key = analysis_cache_key(REVISED)
+    match, reused = find_near_duplicate_analysis(REVISED, cache_key)
+    assert match["filename"] == "report.txt"
+    assert reused == analysis
+
+    buffer = IngestBuffer.from_stream(io.BytesIO(REVISED.encode("utf-8")), "revised.txt")
+    blob, stored = store_near_duplicate_analysis(
+        buffer, REVISED, cache_key, "doc-2", "revised.txt", reused, upload=False
+    )
+
+    assert blob == ("revised.txt", False)
+    # 다시 실행하면 분석 캐시에서 바로 찾고, 메타데이터 / 키워드 색인에도 새 문서로 기록
+    assert analysis_cache.get(cache_key) == stored
+    assert stored["topic"] == "보안 점검"
+    row = get_metadata_store().load_all().get("doc-2")
+    assert row["filename"] == "revised.txt"
+    assert row["blob_url"].endswith("/revised.txt")
+    assert get_keyword_index().document_frequencies(["작성일"])[1] == {"작성일": 1}
@@ -0,0 +1,93 @@
+import numpy as np
+import pytest
+
+import neighbor_graph
+from metadata_store import MetadataIndex
+from neighbor_graph import NeighborGraph, cluster_keywords
+from vector_index import HashingEmbeddingProvider, LocalVectorIndex
+
+
+def make_index(directory):
+    return LocalVectorIndex(directory=str(directory), provider=HashingEmbeddingProvider(dim=16))
+
+
+def add_random(index, start, count, seed):
+    vectors = np.random.RandomState(seed).normal(size=(count, 8))
+    index.add([{"id": f"doc-{start + i}"} for i in range(count)], vectors=vectors)
+
+
+# 그래프의 이웃 목록이 전체 유사도 행렬로 구한 top-k 와 같은지 확인
+def assert_matches_full_computation(graph, index):
+    matrix, records = index.snapshot()
+    scores = np.asarray(matrix) @ np.asarray(matrix).T
+    np.fill_diagonal(scores, -np.inf)
+    for row, record in enumerate(records):
+        expected = [records[j]["id"] for j in np.argsort(-scores[row])[: graph.k]]
+        assert [hit["id"] for hit in graph.neighbors(record["id"])] == expected
+
+
+def test_incremental_sync_matches_full_computation(tmp_path, monkeypatch):
+    # 작은 블록으로 나눠도 결과가 같은지 확인
+    monkeypatch.setattr(neighbor_graph, "GRAPH_BLOCK_ROWS", 7)
+    index = make_index(tmp_path)
+    graph = NeighborGraph(index, k=4)
+
+    add_random(index, 0, 20, seed=1)
+    assert graph.sync() == 20
+    add_random(index, 20, 9, seed=2)
+    assert graph.sync() == 9
+    assert graph.sync() == 0
+    assert_matches_full_computation(graph, index)
+
+
+def test_sync_after_interrupted_append_keeps_rows_paired(tmp_path):
+    index = make_index(tmp_path)
+    graph = NeighborGraph(index, k=4)
+    add_random(index, 0, 10, seed=1)
+    graph.sync()
+
+    # 이웃 번호만 쓰고 유사도는 쓰기 전에 멈춘 프로세스
+    with open(tmp_path / "neighbors.i32", "ab") as f:
+        f.write(np.zeros((3, 4), dtype=np.int32).tobytes())
+
+    add_random(index, 10, 5, seed=2)
+    assert NeighborGraph(index, k=4).sync() == 5
+    assert_matches_full_computation(NeighborGraph(index, k=4), index)
+
+
+def test_small_corpus_has_no_self_neighbor(tmp_path):
+    index = make_index(tmp_path)
+    graph = NeighborGraph(index, k=5)
+    index.add([{"id": "a"}, {"id": "b"}], vectors=[[1.0, 0.0], [0.6, 0.8]])
+    graph.sync()
+
+    hits = graph.neighbors("a")
+    assert [hit["id"] for hit in hits] == ["b"]
+    assert hits[0]["score"] == pytest.approx(0.6, abs=1e-3)
+    assert graph.neighbors("missing") == []
+
+
+def test_clusters_join_mutual_close_neighbors(tmp_path):
+    index = make_index(tmp_path)
+    graph = NeighborGraph(index, k=2)
+    index.add(
+        [{"id": name} for name in "abcde"],
+        vectors=[[1, 0, 0], [0.95, 0.3, 0], [0.9, 0.4, 0.1], [0, 0, 1], [0, 1, 0]],
+    )
+    graph.sync()
+
+    clusters = graph.clusters(threshold=0.8)
+    assert [sorted(r["id"] for r in group["documents"]) for group in clusters] == [["a", "b", "c"]]
+
+
+def test_cluster_keywords_counts_member_keywords():
+    metadata = MetadataIndex(
+        [
+            {"id": "1", "content_hash": "a", "keywords": "보안, 서버"},
+            {"id": "2", "content_hash": "b", "keywords": "보안, 로그"},
+            {"id": "3", "keywords": "보안"},
+        ]
+    )
+    documents = [{"id": "a"}, {"id": "b"}, {"id": "x", "document_id": "3"}]
+
+    assert cluster_keywords(documents, metadata, top=2) == ["보안", "서버"]
@@ -0,0 +1,58 @@
+import pytest
+
+from query_cache import SemanticQueryCache
+from vector_index import HashingEmbeddingProvider
+
+
+def make_cache(tmp_path, **kwargs):
+    return SemanticQueryCache(
+        path=str(tmp_path / "query_cache.sqlite3"),
+        provider=HashingEmbeddingProvider(dim=256),
+        **kwargs,
+    )
+
+
+def test_similar_question_reuses_answer(tmp_path):
+    cache = make_cache(tmp_path, threshold=0.8)
+    entry, vector = cache.lookup("보안 점검 체크리스트가 있는 문서는?")
+    assert entry is None
+    cache.store("보안 점검 체크리스트가 있는 문서는?", vector, "a.pdf 입니다.", ["a.pdf"], 2.5)
+
+    entry, _ = cache.lookup("보안 점검 체크리스트가 있는 문서는")
+    assert entry["answer"] == "a.pdf 입니다."
+    assert entry["sources"] == ["a.pdf"]
+    assert entry["score"] >= 0.8
+
+    entry, _ = cache.lookup("지난달 매출 보고서를 찾아줘")
+    assert entry is None
+
+    assert cache.stats() == {
+        "hits": 1,
+        "misses": 2,
+        "hit_rate": pytest.approx(1 / 3),
+        "saved_seconds": 2.5,
+    }
+
+
+def test_invalidate_and_max_entries(tmp_path):
+    cache = make_cache(tmp_path, threshold=0.99, max_entries=2)
+    for question in ("첫 질문", "둘째 질문", "셋째 질문"):
+        _, vector = cache.lookup(question)
+        cache.store(question, vector, question)
+
+    assert cache.lookup("첫 질문")[0] is None
+    assert cache.lookup("셋째 질문")[0]["answer"] == "셋째 질문"
+
+    cache.invalidate()
+    assert cache.lookup("셋째 질문")[0] is None
+
+
+def test_other_embedding_provider_does_not_match(tmp_path):
+    cache = make_cache(tmp_path, threshold=0.5)
+    _, vector = cache.lookup("질문")
+    cache.store("질문", vector, "답변")
+
+    other = SemanticQueryCache(
+        path=cache.path, threshold=0.5, provider=HashingEmbeddingProvider(dim=128)
+    )
+    assert other.lookup("질문")[0] is None
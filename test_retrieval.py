@@ -0,0 +1,119 @@
+from types import SimpleNamespace
+
+import numpy as np
+
+import clients
+import retrieval
+from retrieval import (
+    AzureSearchRetriever,
+    LocalRetriever,
+    add_retrieval_document,
+    get_retriever,
+)
+from vector_index import HashingEmbeddingProvider
+
+DOCUMENTS = [
+    {"id": "a", "title": "보안 점검.pdf", "url": "u/a", "content": "서버 보안 점검 절차와 체크리스트"},
+    {"id": "b", "title": "매출 보고서.docx", "url": "u/b", "content": "분기별 매출과 영업 이익"},
+    {"id": "c", "title": "배포 가이드.txt", "url": "u/c", "content": "서버 배포 절차"},
+]
+
+
+def test_local_retriever_fuses_keyword_and_vector_ranks():
+    retriever = LocalRetriever(DOCUMENTS, provider=HashingEmbeddingProvider(dim=256))
+
+    results = retriever.search("서버 보안 점검", k=2)
+
+    assert [result.id for result in results] == ["a", "c"]
+    assert results[0].score > results[1].score
+    assert results[0].to_dict() == {
+        "id": "a",
+        "title": "보안 점검.pdf",
+        "link": "u/a",
+        "content": "서버 보안 점검 절차와 체크리스트",
+        "relevance": results[0].score,
+    }
+    assert LocalRetriever(provider=HashingEmbeddingProvider(dim=16)).search("서버") == []
+
+
+def test_local_retriever_from_metadata_rows():
+    rows = [
+        {
+            "id": "a",
+            "filename": "a.pdf",
+            "blob_url": "u/a",
+            "topic": "보안",
+            "summary": "요약",
+            "keywords": "서버, 점검",
+        }
+    ]
+    retriever = LocalRetriever.from_metadata(rows, provider=HashingEmbeddingProvider(dim=16))
+
+    assert retriever.documents == [
+        {"id": "a", "title": "a.pdf", "url": "u/a", "content": "보안\n요약\n서버, 점검"}
+    ]
+
+
+def test_azure_retriever_sends_one_hybrid_query():
+    requests = []
+
+    def search(**kwargs):
+        requests.append(kwargs)
+        return [{"id": "a", "title": "a.pdf", "url": "u/a", "content": "본문", "@search.score": 0.03}]
+
+    provider = SimpleNamespace(embed=lambda texts: np.ones((len(texts), 4), dtype=np.float32))
+    clients.set_client("search", SimpleNamespace(search=search))
+    try:
+        results = AzureSearchRetriever(provider=provider).search("보안 점검", k=3)
+    finally:
+        clients.reset_clients()
+
+    assert [(result.id, result.title, result.score) for result in results] == [("a", "a.pdf", 0.03)]
+    (request,) = requests
+    assert request["search_text"] == "보안 점검"
+    assert request["top"] == 3
+    assert request["vector_queries"][0].k_nearest_neighbors == 3
+    assert request["vector_queries"][0].vector == [1.0, 1.0, 1.0, 1.0]
+
+
+def test_local_retriever_replaces_document_with_same_id():
+    retriever = LocalRetriever(DOCUMENTS, provider=HashingEmbeddingProvider(dim=256))
+    retriever.add([dict(DOCUMENTS[1], content="서버 보안 점검 결과")])
+
+    assert [document["id"] for document in retriever.documents] == ["a", "b", "c"]
+    assert retriever._matrix.shape[0] == 3
+    assert retriever.documents[1]["content"] == "서버 보안 점검 결과"
+
+
+# 읽은 횟수를 세는 메타데이터 저장소
+class CountingStore:
+    def __init__(self, rows):
+        self.rows = rows
+        self.loads = 0
+
+    def load_all(self):
+        self.loads += 1
+        return list(self.rows)
+
+
+def metadata_row(document_id, topic):
+    return {"id": document_id, "filename": f"{document_id}.pdf", "topic": topic, "keywords": ""}
+
+
+def test_local_backend_reuses_retriever_and_adds_saved_documents(monkeypatch):
+    store = CountingStore([metadata_row("a", "서버 보안 점검")])
+    monkeypatch.setattr(retrieval, "get_metadata_store", lambda: store)
+    monkeypatch.setattr(retrieval, "_local_retriever", None)
+
+    assert [result.id for result in get_retriever("local").search("보안")] == ["a"]
+    add_retrieval_document(metadata_row("b", "매출 보고"))
+    results = get_retriever("local").search("매출 보고", k=2)
+
+    assert store.loads == 1
+    assert results[0].id == "b"
+
+    # 다른 프로세스가 저장한 문서는 주기적으로 다시 읽어서 반영
+    monkeypatch.setattr(retrieval, "RETRIEVAL_REFRESH_SECONDS", 0)
+    store.rows.append(metadata_row("c", "배포 가이드"))
+    assert "c" in [result.id for result in get_retriever("local").search("배포", k=3)]
+    assert store.loads == 2
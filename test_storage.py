@@ -0,0 +1,56 @@
+import io
+from types import SimpleNamespace
+
+import pytest
+
+import clients
+import storage
+from ingest import IngestBuffer
+
+
+class FakeContainer:
+    def __init__(self):
+        self.blobs = {}
+
+    def find_blobs_by_tags(self, query):
+        return [
+            SimpleNamespace(name=name)
+            for name, tags in self.blobs.items()
+            if f"'{tags[storage.CONTENT_HASH_TAG]}'" in query
+        ]
+
+    def upload_blob(self, name, data, tags=None, **kwargs):
+        data.read()
+        self.blobs[name] = tags
+
+
+@pytest.fixture
+def container(monkeypatch):
+    container = FakeContainer()
+    service = SimpleNamespace(
+        url="https://account.blob.core.windows.net/",
+        get_container_client=lambda name: container,
+    )
+    monkeypatch.setattr(storage, "BLOB_CONTAINER_NAME", "docs")
+    clients.set_client("blob", service)
+    yield container
+    clients.reset_clients()
+
+
+def test_upload_skips_content_that_is_already_stored(container):
+    buffer = IngestBuffer.from_stream(io.BytesIO(b"same"), "a.txt")
+
+    assert storage.upload_file_to_blob(buffer, "a.txt") == ("a.txt", False)
+    assert storage.upload_file_to_blob(buffer, "b.txt") == ("a.txt", True)
+    assert list(container.blobs) == ["a.txt"]
+
+
+def test_metadata_row_links_to_stored_blob(container):
+    row = storage.build_metadata_row("id", "b 문서.txt", "주제", "요약", ["a", "b"], "hash", "a.txt")
+
+    assert row["filename"] == "b 문서.txt"
+    assert row["keywords"] == "a, b"
+    assert row["blob_url"] == "https://account.blob.core.windows.net/docs/a.txt"
+    assert storage.build_metadata_row("id", "b 문서.txt", "", "", [])["blob_url"].endswith(
+        "/docs/b%20%EB%AC%B8%EC%84%9C.txt"
+    )
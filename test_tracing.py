@@ -0,0 +1,86 @@
+import threading
+
+import pytest
+
+import tracing
+from tracing import (
+    copy_context,
+    recent_spans,
+    render_prometheus,
+    span,
+    summarize_spans,
+    tokens_per_trace,
+    trace,
+)
+
+
+@pytest.fixture
+def log_path(tmp_path, monkeypatch):
+    path = str(tmp_path / "traces.jsonl")
+    monkeypatch.setattr(tracing, "TRACE_LOG_PATH", path)
+    return path
+
+
+def test_spans_are_grouped_under_trace(log_path):
+    with trace("upload", filename="a.txt"):
+        with span("cache.analysis") as attrs:
+            attrs["cache_hit"] = False
+
+        # 다른 스레드에서도 복사한 컨텍스트로 실행하면 같은 trace 에 기록
+        def stage():
+            with span("stage.topic", total_tokens=30):
+                pass
+
+        thread = threading.Thread(target=copy_context().run, args=(stage,))
+        thread.start()
+        thread.join()
+
+    records = recent_spans(log_path)
+    assert [record["name"] for record in records] == ["cache.analysis", "stage.topic", "upload"]
+    assert len({record["trace"] for record in records}) == 1
+    assert {record["kind"] for record in records} == {"upload"}
+    assert records[0]["cache_hit"] is False
+    assert records[2]["filename"] == "a.txt"
+
+
+def test_span_records_error_and_reraises(log_path):
+    with pytest.raises(ValueError):
+        with span("extract"):
+            raise ValueError("bad file")
+
+    (record,) = recent_spans(log_path)
+    assert record["error"] == "ValueError: bad file"
+    assert record["trace"] is None
+
+
+def test_recent_spans_skips_partial_first_line(log_path):
+    for number in range(20):
+        tracing.record_span(f"span-{number}", 0.01)
+
+    records = recent_spans(log_path, max_bytes=300)
+    assert records
+    assert records[-1]["name"] == "span-19"
+    assert all(record["name"].startswith("span-") for record in records)
+
+
+def test_summaries_and_metrics():
+    spans = [
+        {"name": "gpt", "duration": 0.1, "total_tokens": 10, "trace": "t1", "kind": "upload"},
+        {"name": "gpt", "duration": 0.3, "total_tokens": 30, "trace": "t1", "kind": "upload"},
+        {"name": "gpt", "duration": 0.2, "error": "boom", "trace": "t2", "kind": "chat"},
+        {"name": "cache", "duration": 0.01, "cache_hit": True, "trace": "t1", "kind": "upload"},
+        {"name": "cache", "duration": 0.01, "cache_hit": False, "trace": "t1", "kind": "upload"},
+    ]
+
+    rows = {row["name"]: row for row in summarize_spans(spans)}
+    assert rows["gpt"]["count"] == 3
+    assert rows["gpt"]["p50_ms"] == 200.0
+    assert rows["gpt"]["errors"] == 1
+    assert rows["gpt"]["avg_tokens"] == 20.0
+    assert rows["cache"]["cache_hit_rate"] == 0.5
+    assert tokens_per_trace(spans) == {"t1": 40}
+
+    metrics = render_prometheus(spans)
+    assert 'docinspector_span_duration_seconds_count{name="gpt"} 3' in metrics
+    assert 'docinspector_span_errors{name="gpt"} 1' in metrics
+    assert 'docinspector_span_tokens{name="gpt",type="total_tokens"} 40' in metrics
@@ -0,0 +1,74 @@
+import multiprocessing
+
+import numpy as np
+import pytest
+
+from vector_index import HashingEmbeddingProvider, LocalVectorIndex
+
+
+def make_index(directory):
+    return LocalVectorIndex(directory=str(directory), provider=HashingEmbeddingProvider(dim=64))
+
+
+def add_document(directory, barrier):
+    index = make_index(directory)
+    barrier.wait()
+    index.add([{"id": "doc", "title": "a.txt"}], texts=["같은 문서"])
+
+
+def test_search_returns_nearest_documents(tmp_path):
+    index = make_index(tmp_path)
+    index.add(
+        [{"id": "a"}, {"id": "b"}, {"id": "c"}],
+        vectors=[[1.0, 0.0, 0.0], [0.8, 0.6, 0.0], [0.0, 0.0, 1.0]],
+    )
+
+    hits = index.search_vectors(np.array([1.0, 0.1, 0.0]), k=2)[0]
+
+    assert [hit["id"] for hit in hits] == ["a", "b"]
+    assert hits[0]["score"] == pytest.approx(1 / np.sqrt(1.01))
+    hits = index.search_vectors([1.0, 0.1, 0.0], k=2, exclude_ids=["a"])[0]
+    assert [hit["id"] for hit in hits] == ["b", "c"]
+
+
+def test_add_skips_existing_ids(tmp_path):
+    index = make_index(tmp_path)
+    assert index.add([{"id": "a"}, {"id": "a"}], texts=["첫 문서", "첫 문서"]) == 1
+    assert index.add([{"id": "a"}, {"id": "b"}], texts=["첫 문서", "둘째 문서"]) == 1
+
+    # 다른 프로세스처럼 새로 연 인덱스에서도 같은 항목
+    matrix, records = make_index(tmp_path).snapshot()
+    assert [record["id"] for record in records] == ["a", "b"]
+    assert matrix.shape == (2, 64)
+
+
+def test_add_from_several_processes_records_document_once(tmp_path):
+    context = multiprocessing.get_context("spawn")
+    barrier = context.Barrier(4)
+    processes = [
+        context.Process(target=add_document, args=(tmp_path, barrier)) for _ in range(4)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(30)
+        assert process.exitcode == 0
+
+    assert len(make_index(tmp_path)) == 1
+
+
+def test_add_after_interrupted_write_keeps_rows_paired(tmp_path):
+    index = make_index(tmp_path)
+    index.add([{"id": "a"}], vectors=[[1.0, 0.0, 0.0]])
+
+    # 벡터만 쓰고(짝 없는 행) 항목은 쓰다 만 채로 멈춘 프로세스
+    with open(tmp_path / "vectors.f32", "ab") as f:
+        f.write(np.array([[0.0, 0.0, 1.0]], dtype=np.float32).tobytes())
+    with open(tmp_path / "records.jsonl", "ab") as f:
+        f.write(b'{"id": "lo')
+
+    make_index(tmp_path).add([{"id": "b"}], vectors=[[0.0, 1.0, 0.0]])
+
+    matrix, records = make_index(tmp_path).snapshot()
+    assert [record["id"] for record in records] == ["a", "b"]
+    np.testing.assert_allclose(matrix, [[1.0, 0.0, 0.0], [0.0, 1.0, 0.0]])
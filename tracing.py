@@ -0,0 +1,223 @@
+import os
+import json
+import time
+import uuid
+import threading
+import contextvars
+from contextlib import contextmanager
+
+import numpy as np
+
+# 성능 추적 설정
+# 단계별 실행 기록(span)을 JSONL 파일에 한 줄씩 추가하고 (여러 워커 프로세스가 같은 파일 공유)
+# Prometheus textfile collector 가 읽을 수 있는 지표 파일을 주기적으로 갱신
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "1") == "1"
+TRACE_LOG_PATH = os.getenv("TRACE_LOG_PATH", ".cache/traces.jsonl")
+TRACE_LOG_MAX_BYTES = int(os.getenv("TRACE_LOG_MAX_BYTES", str(20 * 1024 * 1024)))
+TRACE_METRICS_PATH = os.getenv("TRACE_METRICS_PATH", ".cache/metrics.prom")
+TRACE_METRICS_INTERVAL_SECONDS = float(os.getenv("TRACE_METRICS_INTERVAL_SECONDS", "10"))
+# 성능 화면과 지표 계산에 사용하는 최근 기록 크기
+TRACE_RECENT_BYTES = 2 * 1024 * 1024
+
+TOKEN_KEYS = ("prompt_tokens", "completion_tokens", "total_tokens")
+
+_current_trace = contextvars.ContextVar("current_trace", default=None)
+_current_span = contextvars.ContextVar("current_span", default=None)
+_write_lock = threading.Lock()
+_metrics_written_at = 0.0
+
+
+def _write(record):
+    if not TRACING_ENABLED:
+        return
+    line = json.dumps(record, ensure_ascii=False) + "\n"
+    with _write_lock:
+        directory = os.path.dirname(TRACE_LOG_PATH)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        try:
+            if os.path.getsize(TRACE_LOG_PATH) > TRACE_LOG_MAX_BYTES:
+                os.replace(TRACE_LOG_PATH, TRACE_LOG_PATH + ".1")
+        except FileNotFoundError:
+            pass
+        with open(TRACE_LOG_PATH, "a", encoding="utf-8") as f:
+            f.write(line)
+
+
+# 기록 한 건 저장 (현재 trace 에 속하게 됨)
+def record_span(name, duration, error=None, **attrs):
+    trace = _current_trace.get()
+    record = {
+        "trace": trace["id"] if trace else None,
+        "kind": trace["kind"] if trace else None,
+        "name": name,
+        "start": time.time() - duration,
+        "duration": duration,
+        "error": error,
+    }
+    record.update(attrs)
+    _write(record)
+
+
+# 구간 실행 시간 측정 (with 안에서 발생한 예외는 기록 후 그대로 전달)
+# yield 한 dict 에 넣은 값(캐시 적중 여부 등)도 함께 기록됨
+@contextmanager
+def span(name, **attrs):
+    attrs = dict(attrs)
+    token = _current_span.set(attrs)
+    started = time.perf_counter()
+    error = None
+    try:
+        yield attrs
+    except BaseException as e:
+        error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current_span.reset(token)
+        record_span(name, time.perf_counter() - started, error=error, **attrs)
+
+
+# 문서 한 건 처리 등 하나의 작업 단위 (안에서 기록되는 span 을 하나로 묶음)
+@contextmanager
+def trace(kind, **attrs):
+    token = _current_trace.set({"id": uuid.uuid4().hex[:16], "kind": kind})
+    try:
+        with span(kind, **attrs) as root:
+            yield root
+    finally:
+        _current_trace.reset(token)
+        _maybe_write_metrics()
+
+
+# 현재 trace / span 을 다른 스레드에서 이어서 사용하기 위한 실행 컨텍스트
+def copy_context():
+    return contextvars.copy_context()
+
+
+# 최근 기록 읽기 (파일 끝에서부터 TRACE_RECENT_BYTES 만큼)
+def recent_spans(path=TRACE_LOG_PATH, max_bytes=TRACE_RECENT_BYTES):
+    try:
+        with open(path, "rb") as f:
+            size = f.seek(0, os.SEEK_END)
+            f.seek(max(0, size - max_bytes))
+            data = f.read()
+    except FileNotFoundError:
+        return []
+
+    lines = data.split(b"\n")
+    if len(data) == max_bytes:
+        lines = lines[1:]  # 중간부터 읽은 첫 줄
+    spans = []
+    for line in lines:
+        if line.strip():
+            try:
+                spans.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return spans
+
+
+# 이름별 실행 횟수, p50 / p95 / 최대 시간, 오류 수, 평균 토큰 수, 캐시 적중률
+def summarize_spans(spans):
+    groups = {}
+    for record in spans:
+        groups.setdefault(record["name"], []).append(record)
+
+    rows = []
+    for name, records in sorted(groups.items()):
+        durations = np.array([r["duration"] for r in records])
+        tokens = [r["total_tokens"] for r in records if "total_tokens" in r]
+        cache = [r["cache_hit"] for r in records if "cache_hit" in r]
+        rows.append(
+            {
+                "name": name,
+                "count": len(records),
+                "p50_ms": round(float(np.percentile(durations, 50)) * 1000, 1),
+                "p95_ms": round(float(np.percentile(durations, 95)) * 1000, 1),
+                "max_ms": round(float(durations.max()) * 1000, 1),
+                "errors": sum(1 for r in records if r.get("error")),
+                "avg_tokens": round(sum(tokens) / len(tokens), 1) if tokens else None,
+                "cache_hit_rate": round(sum(cache) / len(cache), 3) if cache else None,
+            }
+        )
+    return rows
+
+
+# 문서(trace)별 토큰 사용량 (kind: upload / bulk_ingest, 캐시를 사용해 토큰을 쓰지 않은 문서는 제외)
+def tokens_per_trace(spans, kinds=("upload", "bulk_ingest")):
+    totals = {}
+    for record in spans:
+        if record.get("kind") in kinds and record.get("trace") and record.get("total_tokens"):
+            totals[record["trace"]] = totals.get(record["trace"], 0) + record["total_tokens"]
+    return totals
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+
+# Prometheus text 형식 지표 (최근 기록 기준)
+def render_prometheus(spans):
+    lines = [
+        "# HELP docinspector_span_duration_seconds Span duration over recent spans.",
+        "# TYPE docinspector_span_duration_seconds summary",
+    ]
+    groups = {}
+    for record in spans:
+        groups.setdefault(record["name"], []).append(record)
+
+    for name, records in sorted(groups.items()):
+        durations = np.array([r["duration"] for r in records])
+        label = _label(name)
+        for quantile in (0.5, 0.95):
+            value = float(np.percentile(durations, quantile * 100))
+            lines.append(
+                f'docinspector_span_duration_seconds{{name="{label}",quantile="{quantile}"}} '
+                f"{value:.6f}"
+            )
+        lines.append(f'docinspector_span_duration_seconds_sum{{name="{label}"}} {durations.sum():.6f}')
+        lines.append(f'docinspector_span_duration_seconds_count{{name="{label}"}} {len(records)}')
+
+    lines += [
+        "# HELP docinspector_span_errors Failed spans over recent spans.",
+        "# TYPE docinspector_span_errors gauge",
+    ]
+    for name, records in sorted(groups.items()):
+        errors = sum(1 for r in records if r.get("error"))
+        lines.append(f'docinspector_span_errors{{name="{_label(name)}"}} {errors}')
+
+    lines += [
+        "# HELP docinspector_span_tokens Tokens used over recent spans.",
+        "# TYPE docinspector_span_tokens gauge",
+    ]
+    for name, records in sorted(groups.items()):
+        for key in TOKEN_KEYS:
+            total = sum(r.get(key, 0) for r in records)
+            if total:
+                lines.append(f'docinspector_span_tokens{{name="{_label(name)}",type="{key}"}} {total}')
+    return "\n".join(lines) + "\n"
+
+
+def write_metrics(path=TRACE_METRICS_PATH):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(render_prometheus(recent_spans()))
+    os.replace(tmp_path, path)
+
+
+# 작업이 끝날 때 지표 파일 갱신 (TRACE_METRICS_INTERVAL_SECONDS 에 한 번)
+def _maybe_write_metrics():
+    global _metrics_written_at
+    if not TRACING_ENABLED or not TRACE_METRICS_PATH:
+        return
+    now = time.monotonic()
+    if now - _metrics_written_at < TRACE_METRICS_INTERVAL_SECONDS:
+        return
+    _metrics_written_at = now
+    try:
+        write_metrics()
+    except OSError:
+        pass
@@ -0,0 +1,265 @@
+import os
+import json
+import hashlib
+import threading
+
+import numpy as np
+
+from clients import embedding_name
+from llm_gateway import get_llm_gateway
+
+# Windows 에는 fcntl 이 없으므로 파일 잠금 없이 동작
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# 로컬 벡터 인덱스 설정
+VECTOR_INDEX_DIR = os.getenv("VECTOR_INDEX_DIR", ".cache/vector_index")
+# 임베딩 제공자: azure (Azure OpenAI 임베딩) / hashing (오프라인용 결정적 임베딩)
+EMBEDDING_PROVIDER = os.getenv("EMBEDDING_PROVIDER", "azure" if embedding_name else "hashing")
+HASHING_EMBEDDING_DIM = int(os.getenv("HASHING_EMBEDDING_DIM", "512"))
+# 한 번에 행렬곱을 수행할 행 수 (메모리 사용량 제한)
+SEARCH_BLOCK_ROWS = 65536
+
+
+def _normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+# Azure OpenAI 임베딩
+class AzureEmbeddingProvider:
+    def __init__(self, deployment=embedding_name, batch_size=16):
+        self.deployment = deployment
+        self.batch_size = batch_size
+        self.name = f"azure:{deployment}"
+
+    def embed(self, texts):
+        vectors = []
+        for start in range(0, len(texts), self.batch_size):
+            response = get_llm_gateway().embeddings(
+                model=self.deployment, input=texts[start : start + self.batch_size]
+            )
+            vectors.extend(item.embedding for item in response.data)
+        return _normalize(vectors)
+
+
+# 글자 n-gram 해싱 임베딩 (네트워크 없이 같은 입력에 항상 같은 벡터)
+class HashingEmbeddingProvider:
+    def __init__(self, dim=HASHING_EMBEDDING_DIM, ngram_range=(2, 3)):
+        self.dim = dim
+        self.ngram_range = ngram_range
+        self.name = f"hashing:{dim}"
+
+    def _embed_one(self, text):
+        vector = np.zeros(self.dim, dtype=np.float32)
+        text = " ".join((text or "").lower().split())
+        for n in range(self.ngram_range[0], self.ngram_range[1] + 1):
+            for start in range(len(text) - n + 1):
+                digest = hashlib.blake2b(text[start : start + n].encode("utf-8"), digest_size=8).digest()
+                value = int.from_bytes(digest, "little")
+                vector[value % self.dim] += 1.0 if (value >> 63) & 1 else -1.0
+        return vector
+
+    def embed(self, texts):
+        return _normalize([self._embed_one(text) for text in texts])
+
+
+def get_embedding_provider(name=EMBEDDING_PROVIDER):
+    if name == "hashing":
+        return HashingEmbeddingProvider()
+    return AzureEmbeddingProvider()
+
+
+# 로컬 벡터 인덱스
+# 정규화된 float32 벡터를 파일에 이어 붙이고 memory-map 으로 읽어서
+# 행렬곱 + argpartition 으로 top-k 검색 (여러 프로세스가 같은 폴더를 공유 가능)
+class LocalVectorIndex:
+    def __init__(self, directory=VECTOR_INDEX_DIR, provider=None):
+        self.directory = directory
+        self.provider = provider or get_embedding_provider()
+        self._vectors_path = os.path.join(directory, "vectors.f32")
+        self._records_path = os.path.join(directory, "records.jsonl")
+        self._info_path = os.path.join(directory, "index.json")
+        self._lock = threading.Lock()
+
+        self.dim = None
+        self._records = []
+        self._records_offset = 0
+        self._matrix = None
+        self._ids = set()
+
+        os.makedirs(directory, exist_ok=True)
+        if os.path.exists(self._info_path):
+            with open(self._info_path, encoding="utf-8") as f:
+                info = json.load(f)
+            if info["provider"] != self.provider.name:
+                raise ValueError(
+                    f"벡터 인덱스({directory})는 '{info['provider']}' 임베딩으로 만들어졌습니다. "
+                    f"현재 임베딩: '{self.provider.name}'"
+                )
+            self.dim = info["dim"]
+
+    def _write_info(self):
+        with open(self._info_path, "w", encoding="utf-8") as f:
+            json.dump({"provider": self.provider.name, "dim": self.dim}, f)
+
+    # 다른 프로세스가 추가한 항목까지 반영
+    def _refresh(self):
+        if os.path.exists(self._records_path):
+            with open(self._records_path, "rb") as f:
+                f.seek(self._records_offset)
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break  # 아직 쓰는 중인 줄
+                    record = json.loads(line)
+                    self._records.append(record)
+                    self._ids.add(record["id"])
+                    self._records_offset += len(line)
+
+        if self.dim is None or not os.path.exists(self._vectors_path):
+            self._matrix = None
+            return
+
+        rows = min(len(self._records), os.path.getsize(self._vectors_path) // (self.dim * 4))
+        if rows == 0:
+            self._matrix = None
+        elif self._matrix is None or self._matrix.shape[0] != rows:
+            self._matrix = np.memmap(self._vectors_path, dtype=np.float32, mode="r", shape=(rows, self.dim))
+
+    def __len__(self):
+        with self._lock:
+            self._refresh()
+            return 0 if self._matrix is None else self._matrix.shape[0]
+
+    def __contains__(self, document_id):
+        with self._lock:
+            self._refresh()
+            return document_id in self._ids
+
+    # 현재 벡터 행렬(memory-map, 없으면 None)과 행 순서대로의 항목 목록
+    def snapshot(self):
+        with self._lock:
+            self._refresh()
+            return self._matrix, list(self._records)
+
+    def embed(self, texts):
+        return self.provider.embed(list(texts))
+
+    # 문서 추가 (records: id 를 포함한 dict 목록, vectors 가 없으면 texts 로 임베딩)
+    # 이미 있는 id 는 건너뛰고 추가한 항목 수 반환 (여러 프로세스가 같은 문서를 동시에 추가해도 한 번만 기록)
+    def add(self, records, texts=None, vectors=None):
+        records = list(records)
+        if not records:
+            return 0
+        with self._lock:
+            self._refresh()
+            if all(record["id"] in self._ids for record in records):
+                return 0
+        if vectors is None:
+            vectors = self.embed(texts)
+        vectors = _normalize(vectors)
+
+        with self._lock:
+            if self.dim is None:
+                self.dim = int(vectors.shape[1])
+                self._write_info()
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(f"벡터 차원이 다릅니다: {vectors.shape[1]} != {self.dim}")
+
+            with open(self._records_path, "ab") as records_file:
+                if fcntl is not None:
+                    fcntl.flock(records_file, fcntl.LOCK_EX)
+                try:
+                    # 잠금을 잡은 뒤 다시 읽어서 그 사이 다른 프로세스가 추가한 id 도 제외
+                    self._refresh()
+                    seen = set(self._ids)
+                    keep = []
+                    for row, record in enumerate(records):
+                        if record["id"] not in seen:
+                            seen.add(record["id"])
+                            keep.append(row)
+                    if not keep:
+                        return 0
+                    # 벡터를 쓰고 항목을 쓰기 전에 멈춘 프로세스가 남긴 부분(짝 없는 벡터 행, 쓰다 만 줄)을
+                    # 잘라냄 (남겨 두면 이후 항목이 모두 다른 벡터와 짝지어짐)
+                    records_file.truncate(self._records_offset)
+                    with open(self._vectors_path, "ab") as vectors_file:
+                        vectors_file.truncate(len(self._records) * self.dim * 4)
+                        vectors_file.write(vectors[keep].astype(np.float32).tobytes())
+                    records_file.write(
+                        "".join(
+                            json.dumps(records[row], ensure_ascii=False) + "\n" for row in keep
+                        ).encode("utf-8")
+                    )
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(records_file, fcntl.LOCK_UN)
+                return len(keep)
+
+    # 여러 쿼리 벡터에 대한 top-k 검색 (블록 단위 행렬곱)
+    def search_vectors(self, queries, k=5, exclude_ids=()):
+        queries = _normalize(np.atleast_2d(queries))
+        with self._lock:
+            self._refresh()
+            matrix = self._matrix
+            records = self._records
+
+        if matrix is None:
+            return [[] for _ in range(len(queries))]
+
+        exclude = set(exclude_ids)
+        want = min(k + len(exclude), matrix.shape[0])
+        best_scores = np.full((len(queries), 0), -np.inf, dtype=np.float32)
+        best_index = np.zeros((len(queries), 0), dtype=np.int64)
+
+        for start in range(0, matrix.shape[0], SEARCH_BLOCK_ROWS):
+            block = np.asarray(matrix[start : start + SEARCH_BLOCK_ROWS])
+            scores = queries @ block.T
+            top = min(want, scores.shape[1])
+            index = np.argpartition(-scores, top - 1, axis=1)[:, :top]
+            best_scores = np.concatenate([best_scores, np.take_along_axis(scores, index, axis=1)], axis=1)
+            best_index = np.concatenate([best_index, index + start], axis=1)
+
+            # 블록마다 후보를 want 개로 줄여 메모리 사용량 유지
+            if best_scores.shape[1] > want:
+                keep = np.argpartition(-best_scores, want - 1, axis=1)[:, :want]
+                best_scores = np.take_along_axis(best_scores, keep, axis=1)
+                best_index = np.take_along_axis(best_index, keep, axis=1)
+
+        results = []
+        for scores, index in zip(best_scores, best_index):
+            order = np.argsort(-scores)
+            hits = []
+            for i in order:
+                record = records[int(index[i])]
+                if record["id"] in exclude:
+                    continue
+                hits.append(dict(record, score=float(scores[i])))
+                if len(hits) == k:
+                    break
+            results.append(hits)
+        return results
+
+    # 텍스트로 top-k 유사 문서 검색
+    def search(self, text, k=5, exclude_ids=()):
+        if len(self) == 0:
+            return []
+        return self.search_vectors(self.embed([text]), k=k, exclude_ids=exclude_ids)[0]
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+# 프로세스 공유 로컬 벡터 인덱스
+def get_vector_index():
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = LocalVectorIndex()
+    return _index